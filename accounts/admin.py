@@ -0,0 +1,5 @@
+from django.contrib import admin
+
+from accounts.models import Accounts
+
+admin.site.register(Accounts)
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:02
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Case, F, Sum, When
+
+
+def set_opening_balances(apps, schema_editor):
+    """
+    Keep the balances as they are, making the opening balance whatever is
+    not explained by the records already in the account.
+    """
+    Accounts = apps.get_model("accounts", "Accounts")
+    Records = apps.get_model("records", "Records")
+    ledgers = dict(
+        Records.objects.values_list("account_id").annotate(
+            total=Sum(
+                Case(
+                    When(type=1, then=F("value")),
+                    default=-F("value"),
+                )
+            )
+        )
+    )
+    for account in Accounts.objects.all():
+        account.opening_balance = account.balance - ledgers.get(
+            account.id, Decimal("0.00")
+        )
+        account.save(update_fields=["opening_balance"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("records", "0002_records_user_date_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accounts",
+            name="opening_balance",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0.00"), max_digits=12
+            ),
+        ),
+        migrations.RunPython(set_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:04
+
+from collections import defaultdict
+from datetime import UTC
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, F, Sum, When
+from django.db.models.functions import TruncMonth
+
+
+def create_checkpoints(apps, schema_editor):
+    Records = apps.get_model("records", "Records")
+    BalanceCheckpoints = apps.get_model("accounts", "BalanceCheckpoints")
+    month_totals = (
+        Records.objects.annotate(month=TruncMonth("date", tzinfo=UTC))
+        .values_list("account_id", "month")
+        .annotate(
+            total=Sum(
+                Case(
+                    When(type=1, then=F("value")),
+                    default=-F("value"),
+                )
+            )
+        )
+        .order_by("account_id", "month")
+    )
+    closing_balances = defaultdict(Decimal)
+    checkpoints = []
+    for account_id, month, total in month_totals:
+        closing_balances[account_id] += total
+        checkpoints.append(
+            BalanceCheckpoints(
+                account_id=account_id,
+                month=month.date(),
+                closing_balance=closing_balances[account_id],
+            )
+        )
+    BalanceCheckpoints.objects.bulk_create(checkpoints, batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0002_accounts_opening_balance"),
+        ("records", "0002_records_user_date_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BalanceCheckpoints",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField()),
+                (
+                    "closing_balance",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=12
+                    ),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="checkpoints",
+                        to="accounts.accounts",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="balancecheckpoints",
+            constraint=models.UniqueConstraint(
+                fields=("account", "month"),
+                name="unique_account_month_checkpoint",
+            ),
+        ),
+        migrations.RunPython(create_checkpoints, migrations.RunPython.noop),
+    ]
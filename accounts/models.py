@@ -0,0 +1,247 @@
+from datetime import UTC, date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models, transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Round
+
+from entities.entities import Account, RecordType
+from entities.money import MINOR_UNITS, from_cents
+from use_cases.accounts.accounts import BalanceReconciliation
+from use_cases.accounts.exceptions import (
+    AccountVersionConflictException,
+    MissingAccountException,
+)
+from users.models import CustomUser
+
+
+class Accounts(models.Model):
+    name = models.CharField(max_length=150)
+    # kept up to date by every record write, see records.ledger
+    balance = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00")
+    )
+    # the balance before any record, so that balance always equals it plus
+    # the signed sum of the records of the account
+    opening_balance = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00")
+    )
+    user = models.ForeignKey(
+        CustomUser, related_name="accounts", on_delete=models.CASCADE
+    )
+    # bumped by every update of the account itself, see
+    # AccountRepository.update and adjust_balance
+    version = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ["name"]
+
+
+def month_start(moment: datetime) -> date:
+    """
+    It returns the first day of the month of `moment`, in UTC, which is what
+    balance checkpoints are keyed by
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(UTC)
+    return date(moment.year, moment.month, 1)
+
+
+class BalanceCheckpoints(models.Model):
+    """
+    The signed sum of every record of the account up to the end of `month`,
+    that is, its closing balance without its opening balance. There is a
+    checkpoint for every month in which the account has had records, so the
+    latest checkpoint before a month is always the closing balance of the
+    previous month.
+    """
+
+    account = models.ForeignKey(
+        Accounts, related_name="checkpoints", on_delete=models.CASCADE
+    )
+    month = models.DateField()
+    closing_balance = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00")
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "month"],
+                name="unique_account_month_checkpoint",
+            )
+        ]
+
+
+def cents(path: str = "value"):
+    """
+    The amount at `path` in integer cents. Summing cents keeps SQL sums
+    exact even where decimals are summed as floats, as on SQLite, see
+    entities.money.
+    """
+    return Cast(
+        Round(F(path) * Value(10**MINOR_UNITS)), models.BigIntegerField()
+    )
+
+
+def signed_cents_sum(path: str = ""):
+    """
+    It sums the records under `path` in cents, adding incomes and
+    subtracting expenses
+    """
+    return Coalesce(
+        Sum(
+            Case(
+                When(
+                    **{f"{path}type": RecordType.INCOME.value},
+                    then=cents(f"{path}value"),
+                ),
+                default=-cents(f"{path}value"),
+            )
+        ),
+        Value(0),
+    )
+
+
+def to_account_entity(account: Accounts) -> Account:
+    return Account(
+        str(account.id),
+        account.balance,
+        user_id=str(account.user_id),
+        name=account.name,
+        version=account.version,
+    )
+
+
+class AccountRepository:
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+
+    def _accounts(self):
+        return Accounts.objects.filter(user_id=self.user_id)
+
+    def create(self, account: Account) -> Account:
+        balance = account.balance or Decimal("0.00")
+        created_account = Accounts.objects.create(
+            name=account.name,
+            balance=balance,
+            opening_balance=balance,
+            user_id=self.user_id,
+        )
+        return to_account_entity(created_account)
+
+    def update(self, id: str, account: Account) -> Account:
+        """
+        A single UPDATE of the name, which only matches the account at its
+        expected version when `account` carries one. The balance of
+        `account` is ignored: record writes move it without bumping the
+        version, so writing back a balance read before them would undo
+        them. See adjust_balance.
+        """
+        accounts = self._accounts().filter(id=id)
+        if account.version is not None:
+            accounts = accounts.filter(version=account.version)
+        if not accounts.update(name=account.name, version=F("version") + 1):
+            if (
+                account.version is not None
+                and self._accounts().filter(id=id).exists()
+            ):
+                raise AccountVersionConflictException()
+            raise MissingAccountException()
+        return self.get(id)
+
+    def adjust_balance(self, id: str, balance: Decimal) -> Account:
+        """
+        A single UPDATE setting the balance, which is an adjustment of the
+        opening balance by the difference with the balance of the row as it
+        is written, so the balance doesn't drift away from the records
+        """
+        adjusted = (
+            self._accounts()
+            .filter(id=id)
+            .update(
+                balance=balance,
+                opening_balance=F("opening_balance")
+                + Value(balance)
+                - F("balance"),
+                version=F("version") + 1,
+            )
+        )
+        if not adjusted:
+            raise MissingAccountException()
+        return self.get(id)
+
+    @transaction.atomic
+    def delete(self, id: str) -> list[str]:
+        """
+        The account is locked first, as record writes lock it, so no record
+        can be added to it between reading its records and deleting them
+
+        :return: list[str] with the ids of the records deleted with it
+        """
+        try:
+            account = self._accounts().select_for_update().get(id=id)
+        except ObjectDoesNotExist as e:
+            raise MissingAccountException() from e
+        record_ids = [
+            str(record_id)
+            for record_id in account.records.values_list("id", flat=True)
+        ]
+        account.delete()
+        return record_ids
+
+    def get_all(self) -> list[Account]:
+        return [to_account_entity(account) for account in self._accounts()]
+
+    def get(self, id: str) -> Account:
+        try:
+            return to_account_entity(self._accounts().get(id=id))
+        except ObjectDoesNotExist as e:
+            raise MissingAccountException() from e
+
+    def reconcile(self, id: str) -> BalanceReconciliation:
+        accounts = (
+            self._accounts()
+            .filter(id=id)
+            .annotate(ledger_cents=signed_cents_sum("records__"))
+        )
+        try:
+            account = accounts.get()
+        except ObjectDoesNotExist as e:
+            raise MissingAccountException() from e
+
+        return BalanceReconciliation(
+            account_id=str(account.id),
+            stored_balance=account.balance,
+            ledger_balance=account.opening_balance
+            + from_cents(account.ledger_cents),
+        )
+
+    def get_balance_at(self, id: str, moment: datetime) -> Decimal:
+        try:
+            account = self._accounts().get(id=id)
+        except ObjectDoesNotExist as e:
+            raise MissingAccountException() from e
+
+        month = month_start(moment)
+        checkpoint = (
+            account.checkpoints.filter(month__lt=month)
+            .order_by("-month")
+            .values_list("closing_balance", flat=True)
+            .first()
+        )
+        # only the records of the month of `moment` are left to be summed
+        month_total = account.records.filter(
+            user_id=account.user_id,
+            date__gte=datetime(month.year, month.month, 1, tzinfo=UTC),
+            date__lte=moment,
+        ).aggregate(total=signed_cents_sum())["total"]
+        return (
+            account.opening_balance
+            + (checkpoint or Decimal("0.00"))
+            + from_cents(month_total)
+        )
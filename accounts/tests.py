@@ -0,0 +1,288 @@
+from dataclasses import replace
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import pytest
+
+from accounts.models import AccountRepository, Accounts
+from entities.entities import Account, Expense, Income
+from records.models import Records, RecordsRepository
+from use_cases.accounts.exceptions import (
+    AccountVersionConflictException,
+    MissingAccountException,
+)
+from users.models import CustomUser
+
+
+@pytest.fixture
+def custom_user():
+    return CustomUser.objects.create_user(
+        email="johndoe@me.com", password="password"
+    )
+
+
+@pytest.fixture
+def repo(custom_user):
+    return AccountRepository(str(custom_user.id))
+
+
+@pytest.fixture
+def account(custom_user):
+    return Account(
+        None,
+        Decimal("10.50"),
+        user_id=str(custom_user.id),
+        name="Main",
+    )
+
+
+@pytest.mark.django_db
+def test_account_repository_create(repo, account):
+    created_account = repo.create(account)
+    assert created_account.id is not None
+    assert created_account.name == account.name
+    assert created_account.balance == account.balance
+    assert created_account.user_id == account.user_id
+
+
+@pytest.mark.django_db
+def test_account_repository_update(repo, account):
+    created_account = repo.create(account)
+    updated_account = repo.update(
+        created_account.id,
+        Account(
+            created_account.id,
+            None,
+            user_id=account.user_id,
+            name="My CC",
+        ),
+    )
+    assert updated_account.name == "My CC"
+    assert updated_account.balance == account.balance
+
+
+@pytest.mark.django_db
+def test_account_repository_update_keeps_the_balance(repo, custom_user):
+    created_account = repo.create(
+        Account(
+            None, Decimal("100.00"), user_id=str(custom_user.id), name="Main"
+        )
+    )
+    read_account = repo.get(created_account.id)
+    RecordsRepository().create(
+        Expense(
+            None,
+            "Coffee",
+            Decimal("30.00"),
+            datetime(2023, 4, 8, tzinfo=UTC),
+            account=read_account,
+        )
+    )
+    updated_account = repo.update(
+        created_account.id, replace(read_account, name="Renamed")
+    )
+    assert updated_account.name == "Renamed"
+    assert updated_account.balance == Decimal("70.00")
+    assert repo.reconcile(created_account.id).is_consistent
+
+
+@pytest.mark.django_db
+def test_account_repository_adjust_balance_adjusts_opening_balance(
+    repo, account
+):
+    created_account = repo.create(account)
+    RecordsRepository().create(
+        Expense(
+            None,
+            "Coffee",
+            Decimal("5.50"),
+            datetime(2023, 4, 8, tzinfo=UTC),
+            account=created_account,
+        )
+    )
+    adjusted_account = repo.adjust_balance(created_account.id, Decimal("25.00"))
+    assert adjusted_account.balance == Decimal("25.00")
+    assert adjusted_account.version == created_account.version + 1
+    assert Accounts.objects.get(id=created_account.id).opening_balance == (
+        Decimal("30.50")
+    )
+    assert repo.reconcile(created_account.id).is_consistent
+
+
+@pytest.mark.django_db
+def test_account_repository_adjust_balance_missing_account(repo):
+    with pytest.raises(MissingAccountException):
+        repo.adjust_balance("1", Decimal("25.00"))
+
+
+@pytest.mark.django_db
+def test_account_repository_update_missing_account(repo, account):
+    with pytest.raises(MissingAccountException):
+        repo.update("1", account)
+
+
+@pytest.mark.django_db
+def test_account_repository_get_all_is_scoped_by_user(repo, account):
+    repo.create(account)
+    other_user = CustomUser.objects.create_user(
+        email="janedoe@me.com", password="password"
+    )
+    AccountRepository(str(other_user.id)).create(account)
+    assert len(repo.get_all()) == 1
+
+
+@pytest.mark.django_db
+def test_account_repository_delete(repo, account):
+    created_account = repo.create(account)
+    repo.delete(created_account.id)
+    with pytest.raises(MissingAccountException):
+        repo.get(created_account.id)
+    with pytest.raises(MissingAccountException):
+        repo.delete(created_account.id)
+
+
+@pytest.mark.django_db
+def test_account_repository_delete_returns_the_records_deleted(repo, account):
+    created_account = repo.create(account)
+    created_record = RecordsRepository().create(
+        Expense(
+            None,
+            "Coffee",
+            Decimal("5.50"),
+            datetime(2023, 4, 8, tzinfo=UTC),
+            account=created_account,
+        )
+    )
+    assert repo.delete(created_account.id) == [created_record.id]
+    assert not Records.objects.exists()
+
+
+@pytest.mark.django_db
+def test_account_repository_reconcile(repo, account):
+    created_account = repo.create(account)
+    reconciliation = repo.reconcile(created_account.id)
+    assert reconciliation.ledger_balance == account.balance
+    assert reconciliation.is_consistent
+
+    Accounts.objects.filter(id=created_account.id).update(
+        balance=Decimal("99.00")
+    )
+    reconciliation = repo.reconcile(created_account.id)
+    assert reconciliation.difference == Decimal("99.00") - account.balance
+
+
+@pytest.mark.django_db
+def test_account_repository_reconcile_is_exact(repo, account):
+    created_account = repo.create(account)
+    # none of these is exact in binary floating point
+    values = ["0.10", "0.20", "19.99", "0.07", "299.81", "1.03"] * 5
+    RecordsRepository().create_many(
+        [
+            (Income if index % 2 else Expense)(
+                None,
+                "Coffee",
+                Decimal(value),
+                datetime(2023, 1, 1 + index, tzinfo=UTC),
+                account=created_account,
+            )
+            for index, value in enumerate(values)
+        ]
+    )
+    reconciliation = repo.reconcile(created_account.id)
+    assert reconciliation.ledger_balance == Decimal("-1582.50")
+    assert str(reconciliation.ledger_balance) == "-1582.50"
+    assert reconciliation.is_consistent
+
+
+@pytest.mark.django_db
+def test_account_repository_reconcile_missing_account(repo):
+    with pytest.raises(MissingAccountException):
+        repo.reconcile("1")
+
+
+@pytest.mark.django_db
+def test_account_repository_get_balance_at(
+    repo, account, django_assert_num_queries
+):
+    created_account = repo.create(account)
+    RecordsRepository().create_many(
+        [
+            record_class(
+                None,
+                "Coffee",
+                Decimal(value),
+                datetime(*date, tzinfo=UTC),
+                account=created_account,
+            )
+            for record_class, value, date in [
+                (Income, "100.00", (2022, 11, 30)),
+                (Expense, "20.00", (2023, 1, 10)),
+                (Expense, "5.00", (2023, 3, 1, 12)),
+                (Income, "7.00", (2023, 3, 20)),
+            ]
+        ]
+    )
+
+    def balance_at(*date):
+        return repo.get_balance_at(
+            created_account.id, datetime(*date, tzinfo=UTC)
+        )
+
+    assert balance_at(2022, 11, 29) == Decimal("10.50")
+    assert balance_at(2022, 12, 15) == Decimal("110.50")
+    assert balance_at(2023, 3, 1) == Decimal("90.50")
+    assert balance_at(2023, 3, 1, 12) == Decimal("85.50")
+    assert balance_at(2023, 3, 31) == Decimal("92.50")
+    # the account, the closing balance of the month before and the records
+    # of the month
+    with django_assert_num_queries(3):
+        balance_at(2024, 1, 1)
+
+
+@pytest.mark.django_db
+def test_account_repository_get_balance_at_is_exact(repo, account):
+    created_account = repo.create(account)
+    # none of these is exact in binary floating point
+    values = ["0.10", "0.20", "19.99", "0.07", "299.81", "1.03"] * 3
+    RecordsRepository().create_many(
+        [
+            (Expense if index % 3 else Income)(
+                None,
+                "Coffee",
+                Decimal(value),
+                datetime(2023, 3, 1 + index, tzinfo=UTC),
+                account=created_account,
+            )
+            for index, value in enumerate(values)
+        ]
+    )
+    balance = repo.get_balance_at(
+        created_account.id, datetime(2023, 3, 31, tzinfo=UTC)
+    )
+    assert str(balance) == "-952.08"
+
+
+@pytest.mark.django_db
+def test_account_repository_get_balance_at_missing_account(repo):
+    with pytest.raises(MissingAccountException):
+        repo.get_balance_at("1", datetime(2023, 1, 1, tzinfo=UTC))
+
+
+@pytest.mark.django_db
+def test_account_repository_update_checks_version(repo, account):
+    created_account = repo.create(account)
+    assert created_account.version == 1
+    updated_account = repo.update(
+        created_account.id, replace(created_account, name="My CC")
+    )
+    assert updated_account.version == 2
+    with pytest.raises(AccountVersionConflictException):
+        repo.update(created_account.id, replace(created_account, name="Old"))
+    assert repo.get(created_account.id).name == "My CC"
+    # without a version, the update is unconditional
+    assert (
+        repo.update(
+            created_account.id, replace(created_account, version=None)
+        ).version
+        == 3
+    )
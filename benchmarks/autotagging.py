@@ -0,0 +1,78 @@
+"""
+It compares tagging records by checking every rule against each
+description with tagging them with the rules compiled into a RuleMatcher,
+see use_cases.autotagging. The loop costs one substring check per rule,
+while the matcher costs one step per character of the description,
+however many rules there are.
+
+    python -m benchmarks.autotagging [--rules 500] [--size 10000] [--repeat 5]
+"""
+import argparse
+import random
+import string
+import timeit
+
+from entities.entities import Tag, TaggingRule
+from use_cases.autotagging.autotagging import RuleMatcher
+
+
+def word(length: int) -> str:
+    return "".join(random.choices(string.ascii_lowercase, k=length))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=500)
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args()
+
+    rules = [
+        TaggingRule(str(id), word(random.randint(4, 10)), Tag(f"Tag {id % 50}"))
+        for id in range(options.rules)
+    ]
+    descriptions = [
+        " ".join(
+            random.choice(rules).pattern.upper()
+            if random.random() < 0.3
+            else word(random.randint(3, 8))
+            for _ in range(4)
+        )
+        for _ in range(options.size)
+    ]
+
+    patterns = [(rule.pattern.casefold(), rule.tag.name) for rule in rules]
+
+    def loop() -> list[set[str]]:
+        result = []
+        for description in descriptions:
+            folded = description.casefold()
+            result.append(
+                {name for pattern, name in patterns if pattern in folded}
+            )
+        return result
+
+    matcher = RuleMatcher(rules)
+
+    def compiled() -> list[set[str]]:
+        return [matcher.match(description) for description in descriptions]
+
+    assert loop() == compiled()
+
+    def best(run) -> float:
+        return min(timeit.repeat(run, number=1, repeat=options.repeat))
+
+    loop_timing = best(loop)
+    compiled_timing = best(compiled)
+    print(f"{'rules loop':>12}: {loop_timing * 1000:8.1f} ms")
+    print(
+        f"{'matcher':>12}: {compiled_timing * 1000:8.1f} ms "
+        f"({loop_timing / compiled_timing:5.1f}x the loop)"
+    )
+    print(
+        f"{'compiling':>12}: {best(lambda: RuleMatcher(rules)) * 1000:8.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
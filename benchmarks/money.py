@@ -0,0 +1,59 @@
+"""
+It compares summing amounts as Decimals with summing them as cents, the way
+the ledger and the analytics cubes do, see entities.money. Converting to
+cents costs more than a single Decimal sum, so cents pay off where amounts
+are converted once and aggregated many times, as in the cubes.
+
+    python -m benchmarks.money [--size 100000] [--repeat 5]
+"""
+import argparse
+import random
+import timeit
+from decimal import Decimal
+
+import numpy as np
+
+from entities.money import from_cents, to_cents
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args()
+
+    values = [
+        Decimal(random.randint(-(10**8), 10**8)).scaleb(-2)
+        for _ in range(options.size)
+    ]
+    cents = [to_cents(value) for value in values]
+    cents_array = np.array(cents, dtype=np.int64)
+    decimal_total = str(sum(values, Decimal("0.00")))
+    assert str(from_cents(sum(cents))) == decimal_total
+    assert str(from_cents(cents_array.sum())) == decimal_total
+
+    def best(run) -> float:
+        return min(timeit.repeat(run, number=1, repeat=options.repeat))
+
+    decimal_sum = best(lambda: sum(values, Decimal("0.00")))
+    timings = {
+        "Decimal sum": decimal_sum,
+        "cents sum": best(lambda: from_cents(sum(cents))),
+        "cents sum, NumPy": best(lambda: from_cents(cents_array.sum())),
+    }
+    for name, timing in timings.items():
+        print(
+            f"{name:>18}: {timing * 1000:8.3f} ms "
+            f"({decimal_sum / timing:6.1f}x Decimal)"
+        )
+    conversion = best(lambda: [to_cents(value) for value in values])
+    print(f"{'to cents':>18}: {conversion * 1000:8.3f} ms")
+    print(
+        "converting pays off after "
+        f"{conversion / (decimal_sum - timings['cents sum, NumPy']):.0f} "
+        "aggregations with NumPy"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+It compares the memory taken by a list of Records with the one taken by a
+RecordBatch holding the same records, see entities.RecordBatch. As on
+bank statements, the descriptions are nearly all distinct.
+
+    python -m benchmarks.record_batch [--size 1000000]
+"""
+import argparse
+import tracemalloc
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+from entities.entities import Account, Expense, Record, RecordBatch, Tag
+
+
+def allocated(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    built = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del built
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    options = parser.parse_args()
+
+    accounts = [
+        Account(str(i), Decimal("0.00"), user_id="1", name=f"Account {i}")
+        for i in range(3)
+    ]
+    tags = [Tag("Bills"), Tag("Food"), Tag("House")]
+    first_day = datetime(2023, 1, 1, tzinfo=UTC)
+
+    def records() -> list[Record]:
+        return [
+            Expense(
+                str(i + 1),
+                f"CARD PURCHASE {i:07d} MERCHANT #{i % 1000} SAO PAULO BR",
+                Decimal(i % 100_000).scaleb(-2),
+                first_day + timedelta(minutes=i),
+                account=accounts[i % 3],
+                tags=[tags[i % 3]],
+                version=1,
+            )
+            for i in range(options.size)
+        ]
+
+    records_size = allocated(records)
+    built_records = records()
+    batch_size = allocated(lambda: RecordBatch.from_records(built_records))
+    print(f"list of Records: {records_size / 2**20:8.1f} MiB")
+    print(f"    RecordBatch: {batch_size / 2**20:8.1f} MiB")
+    print(f"          ratio: {records_size / batch_size:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
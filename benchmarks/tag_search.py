@@ -0,0 +1,65 @@
+"""
+It times searching the tags of a user with thousands of them by prefix in
+their TagIndex, see use_cases.tags, against filtering and ranking the whole
+list of tags as clients of get_all_tags had to.
+
+    python -m benchmarks.tag_search [--tags 5000] [--repeat 1000]
+"""
+import argparse
+import random
+import string
+import timeit
+from functools import partial
+
+from entities.entities import Tag
+from use_cases.tags.tags import TagIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tags", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=1000)
+    options = parser.parse_args()
+
+    usage = [
+        (
+            Tag("".join(random.choices(string.ascii_letters, k=8))),
+            random.randint(0, 1000),
+        )
+        for _ in range(options.tags)
+    ]
+    index = TagIndex(usage)
+
+    def scan(prefix: str) -> list[Tag]:
+        prefix = prefix.casefold()
+        return [
+            tag
+            for tag, _ in sorted(
+                (
+                    (tag, count)
+                    for tag, count in usage
+                    if tag.name.casefold().startswith(prefix)
+                ),
+                key=lambda item: (-item[1], item[0].name),
+            )[:10]
+        ]
+
+    for prefix in ("", "a", "ab", "abc"):
+        assert index.search(prefix, 10) == scan(prefix)
+        indexed, scanned = (
+            min(timeit.repeat(run, number=1, repeat=options.repeat))
+            for run in (
+                partial(index.search, prefix, 10),
+                partial(scan, prefix),
+            )
+        )
+        print(
+            f"prefix {prefix!r:>6}: index {indexed * 1e6:8.1f} µs, "
+            f"scan {scanned * 1e6:8.1f} µs"
+        )
+    build = min(timeit.repeat(lambda: TagIndex(usage), number=1, repeat=20))
+    print(f"building the index: {build * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
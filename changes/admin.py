@@ -0,0 +1,5 @@
+from django.contrib import admin
+
+from changes.models import Changes
+
+admin.site.register(Changes)
@@ -0,0 +1,103 @@
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import Accounts, to_account_entity
+from changes.models import ChangeLogRepository
+from entities.entities import Expense
+from records.api.views import RecordsList
+from use_cases.changes.changes import Change, ChangeKind, Operation
+from users.models import CustomUser
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def custom_user():
+    return CustomUser.objects.create_user(
+        email="johndoe@me.com", password="password"
+    )
+
+
+@pytest.fixture
+def changes(custom_user):
+    ChangeLogRepository().append(
+        [
+            Change(
+                str(custom_user.id),
+                ChangeKind.TAG,
+                Operation.UPSERT,
+                f"Tag {i}",
+                {"name": f"Tag {i}", "color": None},
+            )
+            for i in range(5)
+        ]
+    )
+
+
+@pytest.mark.django_db
+def test_changes_list_follows_sequence(api_client, custom_user, changes):
+    url = f"/api/users/{custom_user.id}/changes/"
+    response = api_client.get(url, {"limit": 3})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["results"][0] == {
+        "sequence": 1,
+        "kind": "TAG",
+        "operation": "UPSERT",
+        "object_id": "Tag 0",
+        "data": {"name": "Tag 0", "color": None},
+    }
+    assert response.data["last"] == 3
+    assert response.data["has_more"]
+
+    response = api_client.get(url, {"after": response.data["last"]})
+    assert [change["sequence"] for change in response.data["results"]] == [
+        4,
+        5,
+    ]
+    assert response.data["last"] == 5
+    assert not response.data["has_more"]
+
+    response = api_client.get(url, {"after": 5})
+    assert response.data == {"results": [], "last": 5, "has_more": False}
+
+
+@pytest.mark.django_db
+def test_changes_list_invalid_after(api_client, custom_user):
+    response = api_client.get(
+        f"/api/users/{custom_user.id}/changes/", {"after": -1}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_changes_list_has_the_writes_of_the_api(api_client, custom_user):
+    account = to_account_entity(
+        Accounts.objects.create(name="Main", user=custom_user)
+    )
+    # the use cases the records endpoints write with
+    record = RecordsList.use_cases.create_record(
+        Expense(
+            None,
+            "Coffee",
+            Decimal("5.00"),
+            datetime(2023, 3, 1, tzinfo=UTC),
+            account=account,
+        )
+    )
+    response = api_client.get(f"/api/users/{custom_user.id}/changes/")
+    assert response.status_code == status.HTTP_200_OK
+    assert [
+        (change["kind"], change["operation"], change["object_id"])
+        for change in response.data["results"]
+    ] == [
+        ("RECORD", "UPSERT", str(record.id)),
+        ("ACCOUNT", "UPSERT", str(account.id)),
+    ]
+    assert response.data["results"][1]["data"]["balance"] == "-5.00"
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import ChangesList
+
+urlpatterns = [
+    path("users/<int:user_id>/changes/", ChangesList.as_view()),
+]
@@ -0,0 +1,67 @@
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from changes.models import ChangeLogRepository
+from use_cases.changes.changes import ChangeUseCases
+
+
+class ChangeOutputSerializer(serializers.Serializer):
+    sequence = serializers.IntegerField()
+    kind = serializers.CharField(source="kind.name")
+    operation = serializers.CharField(source="operation.name")
+    object_id = serializers.CharField()
+    data = serializers.JSONField(allow_null=True)  # type: ignore[assignment]
+
+
+class ChangesPageSerializer(serializers.Serializer):
+    results = ChangeOutputSerializer(many=True)
+    # the sequence to ask for the next changes after
+    last = serializers.IntegerField()
+    has_more = serializers.BooleanField()
+
+
+class ChangesList(APIView):
+    class FilterSerializer(serializers.Serializer):
+        after = serializers.IntegerField(required=False, default=0, min_value=0)
+        limit = serializers.IntegerField(
+            required=False, default=500, min_value=1, max_value=1000
+        )
+
+    use_cases = ChangeUseCases(ChangeLogRepository())
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="user_id",
+                required=True,
+                location=OpenApiParameter.PATH,
+                description="The ID of the user",
+            ),
+            FilterSerializer,
+        ],
+        responses={"200": ChangesPageSerializer},
+        methods=["GET"],
+    )
+    def get(self, request, user_id):
+        filters = self.FilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        after = filters.validated_data["after"]
+        limit = filters.validated_data["limit"]
+
+        # one extra change tells whether there are more
+        changes = self.use_cases.get_changes(
+            str(user_id), after=after, limit=limit + 1
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        return Response(
+            {
+                "results": ChangeOutputSerializer(changes, many=True).data,
+                "last": changes[-1].sequence if changes else after,
+                "has_more": has_more,
+            },
+            status=status.HTTP_200_OK,
+        )
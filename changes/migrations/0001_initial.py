@@ -0,0 +1,60 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Changes",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sequence", models.PositiveBigIntegerField()),
+                (
+                    "kind",
+                    models.PositiveSmallIntegerField(
+                        choices=[(0, "ACCOUNT"), (1, "RECORD"), (2, "TAG")]
+                    ),
+                ),
+                (
+                    "operation",
+                    models.PositiveSmallIntegerField(
+                        choices=[(0, "UPSERT"), (1, "DELETE")]
+                    ),
+                ),
+                ("object_id", models.CharField(max_length=255)),
+                ("data", models.JSONField(null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="changes",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="changes",
+            constraint=models.UniqueConstraint(
+                fields=("user", "sequence"), name="unique_user_sequence"
+            ),
+        ),
+    ]
@@ -0,0 +1,98 @@
+from collections.abc import Iterable
+
+from django.db import models, transaction
+from django.db.models import Max
+
+from use_cases.changes.changes import Change, ChangeKind, Operation
+from users.models import CustomUser
+
+
+class Changes(models.Model):
+    """
+    The append-only log of the writes of each user. Sequences are given per
+    user, while holding a lock on the user, so they are dense and a change
+    is never committed after one with a greater sequence.
+    """
+
+    user = models.ForeignKey(
+        CustomUser, related_name="changes", on_delete=models.CASCADE
+    )
+    sequence = models.PositiveBigIntegerField()
+    kind = models.PositiveSmallIntegerField(
+        choices=[(k.value, k.name) for k in ChangeKind]
+    )
+    operation = models.PositiveSmallIntegerField(
+        choices=[(o.value, o.name) for o in Operation]
+    )
+    object_id = models.CharField(max_length=255)
+    data = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # it is also the index syncs scan ranges of
+            models.UniqueConstraint(
+                fields=["user", "sequence"], name="unique_user_sequence"
+            ),
+        ]
+
+
+def to_change_entity(change: Changes) -> Change:
+    return Change(
+        str(change.user_id),
+        ChangeKind(change.kind),
+        Operation(change.operation),
+        change.object_id,
+        change.data,
+        sequence=change.sequence,
+    )
+
+
+class ChangeLogRepository:
+    def atomic(self):
+        return transaction.atomic()
+
+    @transaction.atomic
+    def append(self, changes: Iterable[Change]) -> None:
+        by_user: dict[str, list[Change]] = {}
+        for change in changes:
+            by_user.setdefault(change.user_id, []).append(change)
+        # users are locked in the same order by everyone, so appends never
+        # deadlock
+        list(
+            CustomUser.objects.select_for_update()
+            .filter(id__in=by_user)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        last_sequences = {
+            row["user_id"]: row["last"]
+            for row in Changes.objects.filter(user_id__in=by_user)
+            .values("user_id")
+            .annotate(last=Max("sequence"))
+            .order_by()
+        }
+        Changes.objects.bulk_create(
+            [
+                Changes(
+                    user_id=user_id,
+                    sequence=last_sequences.get(int(user_id), 0) + position,
+                    kind=change.kind.value,
+                    operation=change.operation.value,
+                    object_id=change.object_id,
+                    data=change.data,
+                )
+                for user_id, user_changes in by_user.items()
+                for position, change in enumerate(user_changes, start=1)
+            ]
+        )
+
+    def get_after(
+        self, user_id: str, sequence: int, limit: int = 500
+    ) -> list[Change]:
+        return [
+            to_change_entity(change)
+            for change in Changes.objects.filter(
+                user_id=int(user_id), sequence__gt=sequence
+            ).order_by("sequence")[:limit]
+        ]
@@ -0,0 +1,158 @@
+from dataclasses import replace
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import pytest
+
+from accounts.models import AccountRepository, Accounts, to_account_entity
+from changes.models import ChangeLogRepository, Changes
+from entities.entities import Expense, Tag
+from records.models import RecordsRepository
+from use_cases.accounts.accounts import AccountUseCases
+from use_cases.changes.changes import Change, ChangeKind, Operation
+from use_cases.records.records import RecordUseCases
+from use_cases.tags.exceptions import MissingTagException
+from users.models import CustomUser
+
+
+@pytest.fixture
+def custom_user():
+    return CustomUser.objects.create_user(
+        email="johndoe@me.com", password="password"
+    )
+
+
+@pytest.fixture
+def account(custom_user):
+    return to_account_entity(
+        Accounts.objects.create(name="Main", user=custom_user)
+    )
+
+
+@pytest.fixture
+def repo():
+    return ChangeLogRepository()
+
+
+def _change(user, object_id):
+    return Change(
+        str(user.id), ChangeKind.TAG, Operation.UPSERT, object_id, {"a": 1}
+    )
+
+
+@pytest.mark.django_db
+def test_change_log_sequences_are_dense_per_user(repo, custom_user):
+    other_user = CustomUser.objects.create_user(
+        email="janedoe@me.com", password="password"
+    )
+    repo.append([_change(custom_user, "a"), _change(other_user, "b")])
+    repo.append([_change(custom_user, "c"), _change(custom_user, "d")])
+    assert [
+        (change.sequence, change.object_id)
+        for change in repo.get_after(str(custom_user.id), 0)
+    ] == [(1, "a"), (2, "c"), (3, "d")]
+    assert [
+        change.sequence for change in repo.get_after(str(other_user.id), 0)
+    ] == [1]
+
+
+@pytest.mark.django_db
+def test_change_log_get_after(repo, custom_user, django_assert_num_queries):
+    repo.append([_change(custom_user, str(i)) for i in range(10)])
+    with django_assert_num_queries(1):
+        changes = repo.get_after(str(custom_user.id), 4, limit=3)
+    assert [change.sequence for change in changes] == [5, 6, 7]
+    assert changes[0].data == {"a": 1}
+
+
+@pytest.mark.django_db
+def test_record_writes_and_their_changes_are_atomic(repo, account):
+    use_cases = RecordUseCases(RecordsRepository(), repo)
+    record = use_cases.create_record(
+        Expense(
+            None,
+            "Water",
+            Decimal("10.00"),
+            datetime(2023, 4, 8, tzinfo=UTC),
+            account=account,
+        )
+    )
+    with pytest.raises(MissingTagException):
+        use_cases.update_record(
+            Expense(
+                record.id,
+                "Water",
+                Decimal("12.00"),
+                record.date,
+                account=account,
+                tags=[Tag("Car")],
+            )
+        )
+    changes = repo.get_after(account.user_id, 0)
+    assert [(change.kind, change.object_id) for change in changes] == [
+        (ChangeKind.RECORD, record.id),
+        (ChangeKind.ACCOUNT, account.id),
+    ]
+    assert changes[1].data["balance"] == "-10.00"
+    assert Changes.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_feed_keeps_the_balances_of_every_account_moved(
+    repo, account, custom_user
+):
+    savings = to_account_entity(
+        Accounts.objects.create(name="Savings", user=custom_user)
+    )
+    use_cases = RecordUseCases(RecordsRepository(), repo)
+    record = use_cases.create_record(
+        Expense(
+            None,
+            "Water",
+            Decimal("5.00"),
+            datetime(2023, 4, 8, tzinfo=UTC),
+            account=account,
+        )
+    )
+    # moved to the other account, then deleted
+    use_cases.update_record(replace(record, account=savings))
+    use_cases.delete_record(record.id)
+
+    balances = {}
+    for change in repo.get_after(account.user_id, 0):
+        if change.kind is ChangeKind.ACCOUNT:
+            balances[change.object_id] = change.data["balance"]
+    assert balances == {account.id: "0.00", savings.id: "0.00"}
+    assert balances == {
+        str(row.id): str(row.balance) for row in Accounts.objects.all()
+    }
+
+
+@pytest.mark.django_db
+def test_feed_deletes_the_records_of_a_deleted_account(repo, account):
+    records = RecordUseCases(RecordsRepository(), repo).create_records(
+        [
+            Expense(
+                None,
+                description,
+                Decimal("5.00"),
+                datetime(2023, 4, 8, tzinfo=UTC),
+                account=account,
+            )
+            for description in ["Water", "Power"]
+        ]
+    )
+    after = repo.get_after(account.user_id, 0)[-1].sequence
+    AccountUseCases(AccountRepository(account.user_id), repo).delete_account(
+        account.id
+    )
+    assert {
+        (change.kind, change.operation, change.object_id)
+        for change in repo.get_after(account.user_id, after)
+    } == {
+        *[
+            (ChangeKind.RECORD, Operation.DELETE, record.id)
+            for record in records
+        ],
+        (ChangeKind.ACCOUNT, Operation.DELETE, account.id),
+    }
@@ -44,6 +44,11 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     # Local
+    "accounts.apps.AccountsConfig",
+    "changes.apps.ChangesConfig",
+    "records.apps.RecordsConfig",
+    "recurrences.apps.RecurrencesConfig",
+    "reports.apps.ReportsConfig",
     "tags.apps.TagsConfig",
     "users.apps.UsersConfig",
     # 3rd party
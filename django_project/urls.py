@@ -20,6 +20,9 @@ from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("users.api.urls")),
+    path("api/", include("records.api.urls")),
+    path("api/", include("changes.api.urls")),
+    path("api/", include("tags.api.urls")),
     path(
         "",
         SpectacularSwaggerView.as_view(url_name="schema"),
@@ -1,7 +1,14 @@
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from dataclasses import KW_ONLY, dataclass, field
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 from decimal import Decimal
 from enum import Enum
+from typing import overload
+
+from entities.money import from_cents, to_cents
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
 
 
 @dataclass(frozen=True)
@@ -11,6 +18,9 @@ class Account:
     _: KW_ONLY
     user_id: str
     name: str
+    # bumped by every update, see AccountUseCases.update_account and
+    # adjust_balance
+    version: int | None = None
 
 
 @dataclass(frozen=True)
@@ -33,6 +43,8 @@ class Record:
     account: Account
     type: RecordType
     tags: list[Tag] | None = None
+    # bumped by every update, see RecordUseCases.update_record
+    version: int | None = None
 
 
 @dataclass(frozen=True)
@@ -45,6 +57,246 @@ class Income(Record):
     type: RecordType = field(default=RecordType.INCOME)
 
 
+class RecordBatch(Sequence[Record]):
+    """
+    Many records stored column-wise: ids, values in cents, dates in
+    microseconds from the epoch, types and versions in typed arrays,
+    descriptions as the offset and size of their UTF-8 bytes in a single
+    buffer, as they are mostly distinct, and accounts and sets of tags as
+    indexes into tables holding each distinct one once. A record takes tens
+    of bytes instead of the hundreds of a Record with its own str, Decimal,
+    datetime, Account and tags.
+
+    Records are only built when read, by indexing or iterating, and they
+    share their Account and Tag objects. Their ids must be integers and
+    their dates come back in UTC. Slices and filters share the tables of
+    the batch they come from.
+    """
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.descriptions = array("Q")
+        # in bytes, which a description of up to 255 characters fits in
+        self.description_sizes = array("H")
+        self.values = array("q")
+        self.dates = array("q")
+        self.types = array("b")
+        self.accounts = array("I")
+        self.tags = array("I")
+        # 0 when the record has no version
+        self.versions = array("I")
+        self.tables = _RecordTables()
+
+    @classmethod
+    def from_records(cls, records: Iterable[Record]) -> "RecordBatch":
+        batch = cls()
+        for record in records:
+            batch.append(
+                int(record.id) if record.id is not None else 0,
+                record.description,
+                record.value,
+                record.date,
+                record.account,
+                record.type,
+                record.tags or (),
+                record.version,
+            )
+        return batch
+
+    def append(
+        self,
+        id: int,
+        description: str,
+        value: Decimal,
+        date: datetime,
+        account: Account,
+        type: RecordType,
+        tags: Iterable[Tag] = (),
+        version: int | None = None,
+    ) -> None:
+        """
+        It adds a record from its fields, so repositories can fill a batch
+        without building a Record per row. An id of 0 stands for no id.
+        """
+        self.ids.append(id)
+        offset, size = self.tables.description(description)
+        self.descriptions.append(offset)
+        self.description_sizes.append(size)
+        self.values.append(to_cents(value))
+        self.dates.append((date - EPOCH) // timedelta(microseconds=1))
+        self.types.append(type.value)
+        self.accounts.append(self.tables.account(account))
+        self.tags.append(self.tables.tag_set(tags))
+        self.versions.append(version or 0)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @overload
+    def __getitem__(self, index: int) -> Record:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "RecordBatch":
+        ...
+
+    def __getitem__(self, index: int | slice) -> "Record | RecordBatch":
+        if isinstance(index, slice):
+            return self._with_columns(
+                column[index] for column in self._columns()
+            )
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        type = RecordType(self.types[index])
+        record_class = Income if type is RecordType.INCOME else Expense
+        tags = self.tables.tag_sets[self.tags[index]]
+        offset = self.descriptions[index]
+        return record_class(
+            str(self.ids[index]) if self.ids[index] else None,
+            self.tables.text[
+                offset : offset + self.description_sizes[index]
+            ].decode(),
+            from_cents(self.values[index]),
+            EPOCH + timedelta(microseconds=self.dates[index]),
+            account=self.tables.accounts[self.accounts[index]],
+            tags=list(tags) or None,
+            version=self.versions[index] or None,
+        )
+
+    def __iter__(self) -> Iterator[Record]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def _columns(self) -> list[array]:
+        return [
+            self.ids,
+            self.descriptions,
+            self.description_sizes,
+            self.values,
+            self.dates,
+            self.types,
+            self.accounts,
+            self.tags,
+            self.versions,
+        ]
+
+    def _with_columns(self, columns: Iterable[array]) -> "RecordBatch":
+        batch = RecordBatch()
+        (
+            batch.ids,
+            batch.descriptions,
+            batch.description_sizes,
+            batch.values,
+            batch.dates,
+            batch.types,
+            batch.accounts,
+            batch.tags,
+            batch.versions,
+        ) = columns
+        batch.tables = self.tables
+        return batch
+
+    def take(self, indexes: Iterable[int]) -> "RecordBatch":
+        """It returns a batch of the records at the given positions"""
+        indexes = list(indexes)
+        return self._with_columns(
+            array(column.typecode, [column[index] for index in indexes])
+            for column in self._columns()
+        )
+
+    def filter(
+        self,
+        account_id: str | None = None,
+        type: RecordType | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        tag: str | None = None,
+    ) -> "RecordBatch":
+        """
+        It returns a batch of the records matching every filter given,
+        comparing the columns without building any Record. Both `since` and
+        `until` are inclusive.
+        """
+        checks: list[tuple[array, Callable[[int], bool]]] = []
+        if account_id is not None:
+            accounts = {
+                index
+                for index, account in enumerate(self.tables.accounts)
+                if account.id == account_id
+            }
+            checks.append((self.accounts, accounts.__contains__))
+        if type is not None:
+            type_value = type.value
+            checks.append((self.types, lambda value: value == type_value))
+        if since is not None:
+            start = (since - EPOCH) // timedelta(microseconds=1)
+            checks.append((self.dates, lambda date: date >= start))
+        if until is not None:
+            end = (until - EPOCH) // timedelta(microseconds=1)
+            checks.append((self.dates, lambda date: date <= end))
+        if tag is not None:
+            tag_sets = {
+                index
+                for index, tags in enumerate(self.tables.tag_sets)
+                if any(t.name == tag for t in tags)
+            }
+            checks.append((self.tags, tag_sets.__contains__))
+        return self.take(
+            index
+            for index in range(len(self))
+            if all(check(column[index]) for column, check in checks)
+        )
+
+    def total(self) -> Decimal:
+        """The signed sum of the values, incomes minus expenses"""
+        return from_cents(
+            sum(
+                value if type == RecordType.INCOME.value else -value
+                for value, type in zip(self.values, self.types, strict=True)
+            )
+        )
+
+
+class _RecordTables:
+    """
+    The descriptions of batches, one after the other as UTF-8, and their
+    distinct accounts and sets of tags
+    """
+
+    def __init__(self) -> None:
+        self.text = bytearray()
+        self.accounts: list[Account] = []
+        self.account_indexes: dict[Account, int] = {}
+        self.tag_sets: list[tuple[Tag, ...]] = [()]
+        self.tag_set_indexes: dict[tuple[Tag, ...], int] = {(): 0}
+
+    def description(self, description: str) -> tuple[int, int]:
+        """
+        :return: tuple[int, int] with the offset and the size of its bytes
+        """
+        encoded = description.encode()
+        offset = len(self.text)
+        self.text += encoded
+        return offset, len(encoded)
+
+    def account(self, account: Account) -> int:
+        index = self.account_indexes.get(account)
+        if index is None:
+            index = self.account_indexes[account] = len(self.accounts)
+            self.accounts.append(account)
+        return index
+
+    def tag_set(self, tags: Iterable[Tag]) -> int:
+        tags = tuple(tags)
+        index = self.tag_set_indexes.get(tags)
+        if index is None:
+            index = self.tag_set_indexes[tags] = len(self.tag_sets)
+            self.tag_sets.append(tags)
+        return index
+
+
 @dataclass(frozen=True)
 class Transference:
     origin_account: Account
@@ -52,3 +304,43 @@ class Transference:
     description: str
     value: Decimal
     date: datetime
+
+
+class Frequency(Enum):
+    DAILY = 0
+    WEEKLY = 1
+    MONTHLY = 2
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    """
+    A record repeated every `interval` days, weeks or months from `starts`
+    until `ends`, if ever. Monthly rules keep the day of `starts`, falling
+    back to the last day of shorter months. Occurrences up to
+    `materialized_until` already exist as records.
+    """
+
+    id: str | None
+    description: str
+    value: Decimal
+    account: Account
+    type: RecordType
+    frequency: Frequency
+    starts: datetime
+    interval: int = 1
+    ends: datetime | None = None
+    tags: list[Tag] | None = None
+    materialized_until: datetime | None = None
+
+
+@dataclass(frozen=True)
+class TaggingRule:
+    """
+    Records whose description contains `pattern`, ignoring case, are
+    given `tag`
+    """
+
+    id: str | None
+    pattern: str
+    tag: Tag
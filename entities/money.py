@@ -0,0 +1,33 @@
+"""
+Amounts as integer cents. Every value and balance is stored with two
+decimal places, so it converts to cents and back without loss, and sums of
+many of them are far cheaper as integers than as Decimals. Decimals remain
+what entities and the API carry: cents are only used inside aggregations,
+in Python and in SQL alike, see accounts.models.cents, where they also keep
+databases that sum decimals as floats, as SQLite does, exact.
+"""
+from decimal import Decimal
+
+MINOR_UNITS = 2
+CENT = Decimal(1).scaleb(-MINOR_UNITS)
+
+
+def to_cents(value: Decimal) -> int:
+    """
+    :param value: a finite amount with at most two decimal places
+    :return: int
+    :raises: ValueError if the amount can't be written in cents exactly
+    """
+    if not value.is_finite():
+        raise ValueError(f"{value} is not an amount")
+    cents = value.scaleb(MINOR_UNITS)
+    if cents != cents.to_integral_value():
+        raise ValueError(f"{value} has fractions of a cent")
+    return int(cents)
+
+
+def from_cents(cents: int) -> Decimal:
+    """
+    :return: Decimal with exactly two decimal places
+    """
+    return Decimal(int(cents)).scaleb(-MINOR_UNITS)
@@ -0,0 +1,49 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from entities.money import from_cents, to_cents
+
+
+def test_to_cents():
+    assert to_cents(Decimal("10.50")) == 1050
+    assert to_cents(Decimal("10.5")) == 1050
+    assert to_cents(Decimal("-0.01")) == -1
+    assert to_cents(Decimal("1E+3")) == 100000
+    assert to_cents(Decimal("9999999999.99")) == 999999999999
+
+
+@pytest.mark.parametrize("value", ["1.005", "-0.001", "NaN", "Infinity"])
+def test_to_cents_rejects_what_is_not_cents(value):
+    with pytest.raises(ValueError):
+        to_cents(Decimal(value))
+
+
+def test_from_cents():
+    assert str(from_cents(1050)) == "10.50"
+    assert str(from_cents(-1)) == "-0.01"
+    assert str(from_cents(0)) == "0.00"
+    assert str(from_cents(999999999999)) == "9999999999.99"
+
+
+def test_cents_round_trip_is_lossless():
+    values = [
+        Decimal(random.randint(-(10**12), 10**12)).scaleb(-2)
+        for _ in range(1000)
+    ]
+    assert [from_cents(to_cents(value)) for value in values] == values
+    assert [str(from_cents(to_cents(value))) for value in values] == [
+        str(value) for value in values
+    ]
+
+
+def test_cents_sum_is_identical_to_the_decimal_sum():
+    for size in (0, 1, 10, 1000):
+        values = [
+            Decimal(random.randint(-(10**10), 10**10)).scaleb(-2)
+            for _ in range(size)
+        ]
+        assert str(from_cents(sum(map(to_cents, values)))) == str(
+            sum(values, Decimal("0.00"))
+        )
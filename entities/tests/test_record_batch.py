@@ -0,0 +1,141 @@
+import tracemalloc
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from entities.entities import (
+    Account,
+    Expense,
+    Income,
+    RecordBatch,
+    RecordType,
+    Tag,
+)
+
+
+@pytest.fixture(scope="function")
+def accounts():
+    return [
+        Account(str(i), Decimal("0.00"), user_id="1", name=f"Account {i}")
+        for i in range(1, 3)
+    ]
+
+
+def _records(accounts, count):
+    first_day = datetime(2023, 4, 1, tzinfo=UTC)
+    return [
+        (Income if i % 5 == 0 else Expense)(
+            str(i + 1),
+            # as on bank statements, nearly every description is distinct
+            f"CARD PURCHASE {i:06d} COFFEE SHOP #{i % 7}",
+            Decimal(i).scaleb(-2),
+            first_day + timedelta(hours=i),
+            account=accounts[i % 2],
+            tags=[Tag("Food", "#FF0000")] if i % 3 == 0 else None,
+            version=i % 4 or None,
+        )
+        for i in range(count)
+    ]
+
+
+def test_record_batch_round_trip(accounts):
+    records = _records(accounts, 50)
+    batch = RecordBatch.from_records(records)
+    assert len(batch) == 50
+    assert list(batch) == records
+    assert batch[-1] == records[-1]
+    # records share the account objects of the batch
+    assert batch[0].account is batch[2].account
+    with pytest.raises(IndexError):
+        batch[50]
+
+
+def test_record_batch_keeps_records_without_id(accounts):
+    record = Expense(
+        None,
+        "Water",
+        Decimal("10.00"),
+        datetime(2023, 4, 1, tzinfo=UTC),
+        account=accounts[0],
+    )
+    assert RecordBatch.from_records([record])[0] == record
+
+
+def test_record_batch_keeps_any_description(accounts):
+    records = [
+        Expense(
+            str(i + 1),
+            description,
+            Decimal("10.00"),
+            datetime(2023, 4, 1, tzinfo=UTC),
+            account=accounts[0],
+        )
+        for i, description in enumerate(["Café ☕", "", "x" * 255, "Café ☕"])
+    ]
+    batch = RecordBatch.from_records(records)
+    assert list(batch) == records
+    assert list(batch.take([3, 0])) == [records[3], records[0]]
+
+
+def test_record_batch_slices(accounts):
+    records = _records(accounts, 20)
+    batch = RecordBatch.from_records(records)
+    assert list(batch[5:10]) == records[5:10]
+    assert list(batch[::-3]) == records[::-3]
+    assert list(batch.take([3, 1])) == [records[3], records[1]]
+
+
+def test_record_batch_filter(accounts):
+    records = _records(accounts, 60)
+    batch = RecordBatch.from_records(records)
+    since = datetime(2023, 4, 1, 10, tzinfo=UTC)
+    until = datetime(2023, 4, 2, tzinfo=UTC)
+    assert list(
+        batch.filter(
+            account_id="1",
+            type=RecordType.EXPENSE,
+            since=since,
+            until=until,
+            tag="Food",
+        )
+    ) == [
+        record
+        for record in records
+        if record.account.id == "1"
+        and record.type is RecordType.EXPENSE
+        and since <= record.date <= until
+        and record.tags
+    ]
+    assert len(batch.filter(account_id="3")) == 0
+    assert len(batch.filter(tag="Car")) == 0
+
+
+def test_record_batch_total(accounts):
+    records = _records(accounts, 30)
+    assert RecordBatch.from_records(records).total() == sum(
+        (
+            record.value if record.type is RecordType.INCOME else -record.value
+            for record in records
+        ),
+        Decimal("0.00"),
+    )
+
+
+def _allocated(build):
+    tracemalloc.start()
+    try:
+        built = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del built
+    return size
+
+
+def test_record_batch_memory(accounts):
+    count = 20_000
+    records_size = _allocated(lambda: _records(accounts, count))
+    records = _records(accounts, count)
+    batch_size = _allocated(lambda: RecordBatch.from_records(records))
+    assert records_size / batch_size >= 5
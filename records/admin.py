@@ -0,0 +1,5 @@
+from django.contrib import admin
+
+from records.models import Records
+
+admin.site.register(Records)
@@ -0,0 +1,34 @@
+"""
+The rows analytics cubes are loaded from, read with one pass over the
+records of the user and one over their tags, see records.cursors
+"""
+from collections.abc import Iterator
+
+from entities.entities import RecordType
+from records.cursors import CHUNK_SIZE, with_tags
+from records.models import Records
+from use_cases.analytics.analytics import CubeCache, CubeRow
+
+# the cubes of the process, shared by the use cases reading and writing
+# records so that writes invalidate the cubes queries read
+CUBES = CubeCache()
+
+
+class AnalyticsRepository:
+    def get_rows(self, user_id: str) -> Iterator[CubeRow]:
+        records = (
+            Records.objects.filter(user_id=int(user_id))
+            .order_by("id")
+            .values_list("id", "date", "type", "value", "account_id")
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+        record_tags = (
+            Records.tags.through.objects.filter(records__user_id=int(user_id))
+            .order_by("records_id")
+            .values_list("records_id", "tags__name")
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+        for (_, date, type, value, account_id), tags in with_tags(
+            records, record_tags
+        ):
+            yield CubeRow(date, RecordType(type), value, str(account_id), tags)
@@ -0,0 +1,317 @@
+import csv
+import io
+import json
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import Accounts, to_account_entity
+from entities.entities import Income
+from records.analytics import CUBES
+from records.api.views import encode_cursor
+from records.export import iter_ledger
+from records.models import Records, RecordsRepository
+from tags.models import TAG_REGISTRIES, Tags
+from use_cases.records.records import RecordUseCases
+from users.models import CustomUser
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def tag_registries():
+    # ids are reused by rolled back tests, so no registry may outlive its test
+    TAG_REGISTRIES.entries.clear()
+    yield TAG_REGISTRIES
+    TAG_REGISTRIES.entries.clear()
+
+
+@pytest.fixture
+def custom_user():
+    return CustomUser.objects.create_user(
+        email="johndoe@me.com", password="password"
+    )
+
+
+@pytest.fixture
+def account(custom_user):
+    return Accounts.objects.create(name="Main", user=custom_user)
+
+
+@pytest.fixture
+def records(custom_user, account):
+    first_day = datetime(2023, 4, 1, tzinfo=UTC)
+    return Records.objects.bulk_create(
+        [
+            Records(
+                description=f"Coffee {i}",
+                value=Decimal("2.50"),
+                # pairs of records on the same date to exercise the id
+                # tie-breaker of the cursor
+                date=first_day + timedelta(days=i // 2),
+                type=0,
+                account=account,
+                user=custom_user,
+            )
+            for i in range(7)
+        ]
+    )
+
+
+@pytest.mark.django_db
+def test_records_list_follows_cursor(api_client, custom_user, records):
+    ids = []
+    url = f"/api/users/{custom_user.id}/records/?limit=3"
+    response = api_client.get(url)
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        ids.extend(record["id"] for record in response.data["results"])
+        if response.data["next"] is None:
+            break
+        response = api_client.get(url, {"cursor": response.data["next"]})
+
+    assert ids == [str(record.id) for record in records]
+
+
+@pytest.mark.django_db
+def test_records_list_filters(api_client, custom_user, account, records):
+    response = api_client.get(
+        f"/api/users/{custom_user.id}/records/",
+        {
+            "account": account.id,
+            "since": "2023-04-02T00:00:00Z",
+            "until": "2023-04-03T00:00:00Z",
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [record["description"] for record in response.data["results"]] == [
+        "Coffee 2",
+        "Coffee 3",
+        "Coffee 4",
+        "Coffee 5",
+    ]
+    assert response.data["results"][0]["type"] == "EXPENSE"
+    assert response.data["next"] is None
+
+
+@pytest.mark.django_db
+def test_records_list_invalid_cursor(api_client, custom_user):
+    response = api_client.get(
+        f"/api/users/{custom_user.id}/records/", {"cursor": "nope"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data == {
+        "message": "Validation error",
+        "extra": {"fields": {"cursor": ["Invalid cursor."]}},
+    }
+    for cursor in [
+        encode_cursor(datetime(2023, 3, 1, tzinfo=UTC), "abc"),
+        encode_cursor(datetime(2023, 3, 1, tzinfo=UTC), {"id": 1}),
+    ]:
+        response = api_client.get(
+            f"/api/users/{custom_user.id}/records/", {"cursor": cursor}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_records_list_invalid_account(api_client, custom_user):
+    response = api_client.get(
+        f"/api/users/{custom_user.id}/records/", {"account": "abc"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data == {
+        "message": "Validation error",
+        "extra": {"fields": {"account": ["A valid integer is required."]}},
+    }
+
+
+@pytest.fixture
+def tagged_records(custom_user, records):
+    bills = Tags.objects.create(name="Bills", color="#FF0000", user=custom_user)
+    house = Tags.objects.create(name="House", user=custom_user)
+    records[0].tags.add(house, bills)
+    records[3].tags.add(house)
+    return records
+
+
+def _export(api_client, custom_user, **params):
+    response = api_client.get(f"/api/users/{custom_user.id}/export/", params)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    return response, b"".join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_ledger_export_json_lines(
+    api_client, custom_user, account, tagged_records
+):
+    response, content = _export(api_client, custom_user)
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in content.splitlines()]
+    assert [row["kind"] for row in rows] == ["account", "tag", "tag"] + [
+        "record"
+    ] * 7
+    assert rows[0] == {
+        "kind": "account",
+        "id": account.id,
+        "name": "Main",
+        "balance": "0.00",
+    }
+    assert rows[1]["color"] == "#FF0000"
+    assert rows[3] == {
+        "kind": "record",
+        "id": tagged_records[0].id,
+        "date": "2023-04-01T00:00:00+00:00",
+        "description": "Coffee 0",
+        "type": "EXPENSE",
+        "value": "2.50",
+        "account_id": account.id,
+        "account": "Main",
+        "tags": ["Bills", "House"],
+    }
+    assert [row["tags"] for row in rows[4:]] == [[], [], ["House"], [], [], []]
+
+
+@pytest.mark.django_db
+def test_ledger_export_csv(api_client, custom_user, account, tagged_records):
+    response, content = _export(api_client, custom_user, output="csv")
+    assert response["Content-Type"] == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert len(rows) == 7
+    assert rows[0]["tags"] == "Bills|House"
+    assert rows[0]["account"] == "Main"
+    assert rows[1]["tags"] == ""
+
+
+@pytest.mark.django_db
+def test_ledger_export_is_scoped_by_user(api_client, custom_user, records):
+    other_user = CustomUser.objects.create_user(
+        email="janedoe@me.com", password="password"
+    )
+    _, content = _export(api_client, other_user)
+    assert content == ""
+
+
+@pytest.mark.django_db
+def test_ledger_export_invalid_output(api_client, custom_user):
+    response = api_client.get(
+        f"/api/users/{custom_user.id}/export/", {"output": "xml"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_ledger_export_queries_do_not_grow_with_records(
+    custom_user, tagged_records, django_assert_num_queries
+):
+    # accounts, tags, account names, records and their tags
+    with django_assert_num_queries(5):
+        assert len(list(iter_ledger(custom_user.id))) == 10
+
+
+@pytest.fixture
+def cubes():
+    # ids are reused by rolled back tests, so no cube may outlive its test
+    CUBES.entries.clear()
+    yield CUBES
+    CUBES.entries.clear()
+
+
+@pytest.mark.django_db
+def test_records_analytics(api_client, custom_user, account, records, cubes):
+    tag = Tags.objects.create(name="Coffee", user=custom_user)
+    tag.records.add(*records[:2])
+    url = f"/api/users/{custom_user.id}/analytics/"
+    response = api_client.get(url, {"group_by": "weekday", "type": "expense"})
+    assert response.status_code == status.HTTP_200_OK
+    # 2023-04-01 was a Saturday
+    assert response.data == {
+        "total": "17.50",
+        "groups": [
+            {"key": "0", "total": "5.00"},
+            {"key": "1", "total": "2.50"},
+            {"key": "5", "total": "5.00"},
+            {"key": "6", "total": "5.00"},
+        ],
+    }
+    response = api_client.get(url, {"group_by": "tag"})
+    assert response.data["groups"] == [{"key": "Coffee", "total": "-5.00"}]
+    response = api_client.get(url, {"group_by": "type", "tag": "Coffee"})
+    assert response.data["groups"] == [{"key": "EXPENSE", "total": "-5.00"}]
+    response = api_client.get(url, {"group_by": "hour"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_records_analytics_sees_record_writes(
+    api_client, custom_user, account, records, cubes
+):
+    url = f"/api/users/{custom_user.id}/analytics/"
+    assert api_client.get(url).data["total"] == "-17.50"
+    RecordUseCases(RecordsRepository(), cubes=cubes).create_record(
+        Income(
+            None,
+            "Salary",
+            Decimal("100.00"),
+            datetime(2023, 4, 5, tzinfo=UTC),
+            account=to_account_entity(account),
+        )
+    )
+    assert api_client.get(url).data["total"] == "82.50"
+
+
+@pytest.mark.django_db
+def test_records_list_tags(api_client, custom_user, tagged_records):
+    response = api_client.get(f"/api/users/{custom_user.id}/records/")
+    assert response.status_code == status.HTTP_200_OK
+    tags = {
+        record["id"]: [tag["name"] for tag in record["tags"] or []]
+        for record in response.data["results"]
+    }
+    assert tags[str(tagged_records[0].id)] == ["Bills", "House"]
+    assert tags[str(tagged_records[3].id)] == ["House"]
+    assert tags[str(tagged_records[1].id)] == []
+
+
+@pytest.mark.django_db
+def test_records_search(api_client, custom_user, tagged_records):
+    url = f"/api/users/{custom_user.id}/records/search/"
+    response = api_client.get(url, {"q": "coffee 1"})
+    assert response.status_code == status.HTTP_200_OK
+    assert [record["description"] for record in response.data] == ["Coffee 1"]
+
+    response = api_client.get(url, {"q": "coffee", "tag": "House"})
+    assert [record["description"] for record in response.data] == [
+        "Coffee 3",
+        "Coffee 0",
+    ]
+    assert response.data[1]["tags"] == [
+        {"name": "Bills", "color": "#FF0000"},
+        {"name": "House", "color": "#D9DDDC"},
+    ]
+
+
+@pytest.mark.django_db
+def test_records_search_requires_text(api_client, custom_user):
+    response = api_client.get(f"/api/users/{custom_user.id}/records/search/")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_records_search_invalid_account(api_client, custom_user):
+    response = api_client.get(
+        f"/api/users/{custom_user.id}/records/search/",
+        {"q": "coffee", "account": "abc"},
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data == {
+        "message": "Validation error",
+        "extra": {"fields": {"account": ["A valid integer is required."]}},
+    }
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from .views import (
+    LedgerExport,
+    RecordsAnalytics,
+    RecordsList,
+    RecordsSearchList,
+)
+
+urlpatterns = [
+    path("users/<int:user_id>/records/", RecordsList.as_view()),
+    path("users/<int:user_id>/export/", LedgerExport.as_view()),
+    path("users/<int:user_id>/analytics/", RecordsAnalytics.as_view()),
+    path("users/<int:user_id>/records/search/", RecordsSearchList.as_view()),
+]
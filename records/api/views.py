@@ -0,0 +1,288 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from changes.models import ChangeLogRepository
+from entities.entities import RecordType
+from records.analytics import CUBES, AnalyticsRepository
+from records.export import export_csv, export_json_lines
+from records.models import RecordsRepository
+from tags.models import TAG_REGISTRIES
+from use_cases.analytics.analytics import AnalyticsUseCases, Dimension
+from use_cases.records.records import RecordUseCases
+
+
+def encode_cursor(date: datetime, id: str) -> str:
+    return base64.urlsafe_b64encode(
+        json.dumps([date.isoformat(), id]).encode()
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    date, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(date), int(id)
+
+
+class TagOutputSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    color = serializers.CharField(allow_null=True)
+
+
+class RecordOutputSerializer(serializers.Serializer):
+    id = serializers.CharField()
+    description = serializers.CharField()
+    value = serializers.DecimalField(max_digits=12, decimal_places=2)
+    date = serializers.DateTimeField()
+    type = serializers.CharField(source="type.name")
+    account = serializers.CharField(source="account.id")
+    tags = TagOutputSerializer(many=True, allow_null=True)
+
+
+class RecordsPageSerializer(serializers.Serializer):
+    results = RecordOutputSerializer(many=True)
+    next = serializers.CharField(allow_null=True)
+
+
+class RecordsList(APIView):
+    class FilterSerializer(serializers.Serializer):
+        account = serializers.IntegerField(required=False)
+        since = serializers.DateTimeField(required=False)
+        until = serializers.DateTimeField(required=False)
+        cursor = serializers.CharField(required=False)
+        limit = serializers.IntegerField(
+            required=False, default=100, min_value=1, max_value=500
+        )
+
+        def validate_cursor(self, value):
+            try:
+                return decode_cursor(value)
+            except (binascii.Error, ValueError, TypeError) as e:
+                raise serializers.ValidationError("Invalid cursor.") from e
+
+    use_cases = RecordUseCases(
+        RecordsRepository(TAG_REGISTRIES), ChangeLogRepository(), cubes=CUBES
+    )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="user_id",
+                required=True,
+                location=OpenApiParameter.PATH,
+                description="The ID of the user",
+            ),
+            FilterSerializer,
+        ],
+        responses={"200": RecordsPageSerializer},
+        methods=["GET"],
+    )
+    def get(self, request, user_id):
+        filters = self.FilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        limit = filters.validated_data["limit"]
+
+        # one extra record tells whether there is a next page
+        records = self.use_cases.get_records_page(
+            str(user_id),
+            account=filters.validated_data.get("account"),
+            since=filters.validated_data.get("since"),
+            until=filters.validated_data.get("until"),
+            after=filters.validated_data.get("cursor"),
+            limit=limit + 1,
+        )
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            next_cursor = encode_cursor(records[-1].date, str(records[-1].id))
+
+        return Response(
+            {
+                "results": RecordOutputSerializer(records, many=True).data,
+                "next": next_cursor,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class LedgerExport(APIView):
+    """
+    The whole ledger of the user, streamed as it is read from the database
+    instead of being built in memory and serialized by DRF
+    """
+
+    class FilterSerializer(serializers.Serializer):
+        # `format` is taken by DRF's content negotiation
+        output = serializers.ChoiceField(
+            choices=["jsonl", "csv"], required=False, default="jsonl"
+        )
+
+    exports = {
+        "jsonl": (export_json_lines, "application/x-ndjson"),
+        "csv": (export_csv, "text/csv"),
+    }
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="user_id",
+                required=True,
+                location=OpenApiParameter.PATH,
+                description="The ID of the user",
+            ),
+            FilterSerializer,
+        ],
+        responses={"200": OpenApiTypes.STR},
+        methods=["GET"],
+    )
+    def get(self, request, user_id):
+        filters = self.FilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        output = filters.validated_data["output"]
+
+        export, content_type = self.exports[output]
+        response = StreamingHttpResponse(
+            export(user_id), content_type=content_type
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="ledger-{user_id}.{output}"'
+        return response
+
+
+class GroupTotalSerializer(serializers.Serializer):
+    key = serializers.CharField()
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class AnalyticsSerializer(serializers.Serializer):
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    groups = GroupTotalSerializer(many=True)
+
+
+class RecordsAnalytics(APIView):
+    """
+    The total of the records of the user matching the filters, and its
+    breakdown by the dimension asked for, if any. Without a type, expenses
+    count as negative values.
+    """
+
+    class FilterSerializer(serializers.Serializer):
+        group_by = serializers.ChoiceField(
+            choices=[dimension.name.lower() for dimension in Dimension],
+            required=False,
+        )
+        since = serializers.DateField(required=False)
+        until = serializers.DateField(required=False)
+        type = serializers.ChoiceField(
+            choices=[type.name.lower() for type in RecordType], required=False
+        )
+        account = serializers.CharField(required=False)
+        tag = serializers.CharField(required=False)
+
+    use_cases = AnalyticsUseCases(AnalyticsRepository(), CUBES)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="user_id",
+                required=True,
+                location=OpenApiParameter.PATH,
+                description="The ID of the user",
+            ),
+            FilterSerializer,
+        ],
+        responses={"200": AnalyticsSerializer},
+        methods=["GET"],
+    )
+    def get(self, request, user_id):
+        filters = self.FilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        group_by = filters.validated_data.get("group_by")
+        type = filters.validated_data.get("type")
+        query = {
+            "since": filters.validated_data.get("since"),
+            "until": filters.validated_data.get("until"),
+            "type": RecordType[type.upper()] if type else None,
+            "account_id": filters.validated_data.get("account"),
+            "tag": filters.validated_data.get("tag"),
+        }
+
+        groups = []
+        if group_by:
+            groups = [
+                {
+                    "key": key.name if isinstance(key, RecordType) else key,
+                    "total": total,
+                }
+                for key, total in self.use_cases.group_by(
+                    str(user_id), Dimension[group_by.upper()], **query
+                ).items()
+            ]
+        return Response(
+            AnalyticsSerializer(
+                {
+                    "total": self.use_cases.total(str(user_id), **query),
+                    "groups": groups,
+                }
+            ).data,
+            status=status.HTTP_200_OK,
+        )
+
+
+class RecordsSearchList(APIView):
+    """
+    The records of the user whose description has words starting with
+    every word of `q`, the most relevant first, then the latest
+    """
+
+    class FilterSerializer(serializers.Serializer):
+        q = serializers.CharField(max_length=255)
+        account = serializers.IntegerField(required=False)
+        since = serializers.DateTimeField(required=False)
+        until = serializers.DateTimeField(required=False)
+        tag = serializers.CharField(required=False)
+        limit = serializers.IntegerField(
+            required=False, default=50, min_value=1, max_value=500
+        )
+
+    use_cases = RecordUseCases(
+        RecordsRepository(TAG_REGISTRIES), ChangeLogRepository(), cubes=CUBES
+    )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="user_id",
+                required=True,
+                location=OpenApiParameter.PATH,
+                description="The ID of the user",
+            ),
+            FilterSerializer,
+        ],
+        responses={"200": RecordOutputSerializer(many=True)},
+        methods=["GET"],
+    )
+    def get(self, request, user_id):
+        filters = self.FilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        records = self.use_cases.search_records(
+            str(user_id),
+            filters.validated_data["q"],
+            account=filters.validated_data.get("account"),
+            since=filters.validated_data.get("since"),
+            until=filters.validated_data.get("until"),
+            tag=filters.validated_data.get("tag"),
+            limit=filters.validated_data["limit"],
+        )
+        return Response(
+            RecordOutputSerializer(records, many=True).data,
+            status=status.HTTP_200_OK,
+        )
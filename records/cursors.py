@@ -0,0 +1,34 @@
+"""
+The records of a user are read with their tags through two server-side
+cursors, one over the records and one over the rows linking them to their
+tags, both in the same order, and merged as they advance. There is neither
+a query per record nor a lookup table of every link in memory.
+"""
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+CHUNK_SIZE = 2000
+
+
+def with_tags(
+    records: Iterable[tuple[Any, ...]],
+    record_tags: Iterable[tuple[Any, ...]],
+    key_size: int = 1,
+) -> Iterator[tuple[tuple[Any, ...], list[Any]]]:
+    """
+    It yields each record row with the tags of the `record_tags` rows
+    sharing its key, the first `key_size` columns of both, a tag row being
+    the key followed by the tag. Both must be ordered by the key.
+
+    :return: Iterator of (record row, list of tags) in the order of `records`
+    """
+    record_tags = iter(record_tags)
+    pending_tag = next(record_tags, None)
+    for row in records:
+        key = row[:key_size]
+        tags = []
+        while pending_tag is not None and pending_tag[:key_size] <= key:
+            if pending_tag[:key_size] == key:
+                tags.append(pending_tag[key_size])
+            pending_tag = next(record_tags, None)
+        yield row, tags
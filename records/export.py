@@ -0,0 +1,130 @@
+"""
+Exports of a user's whole ledger. Rows are read through server-side
+cursors and written as they come, so exporting keeps a constant amount of
+memory whatever the number of records.
+"""
+import csv
+import json
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from accounts.models import Accounts
+from entities.entities import RecordType
+from records.cursors import CHUNK_SIZE, with_tags
+from records.models import Records
+from tags.models import Tags
+
+RECORD_COLUMNS = [
+    "id",
+    "date",
+    "description",
+    "type",
+    "value",
+    "account_id",
+    "account",
+    "tags",
+]
+
+
+def iter_records(user_id: int) -> Iterator[dict[str, Any]]:
+    """
+    It yields every record of the user by id, with their tags merged in
+    from a second cursor, see records.cursors
+    """
+    account_names = dict(
+        Accounts.objects.filter(user_id=user_id).values_list("id", "name")
+    )
+    records = (
+        Records.objects.filter(user_id=user_id)
+        .order_by("id")
+        .values_list("id", "date", "description", "type", "value", "account_id")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    record_tags = (
+        Records.tags.through.objects.filter(records__user_id=user_id)
+        .order_by("records_id", "tags__name")
+        .values_list("records_id", "tags__name")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for row, tags in with_tags(records, record_tags):
+        id, date, description, type, value, account_id = row
+        yield {
+            "id": id,
+            "date": date.isoformat(),
+            "description": description,
+            "type": RecordType(type).name,
+            "value": str(value),
+            "account_id": account_id,
+            "account": account_names[account_id],
+            "tags": tags,
+        }
+
+
+def iter_ledger(user_id: int) -> Iterator[dict[str, Any]]:
+    """
+    It yields every account, tag and record of the user, in this order,
+    each one tagged by its `kind`
+    """
+    for id, name, balance in (
+        Accounts.objects.filter(user_id=user_id)
+        .order_by("id")
+        .values_list("id", "name", "balance")
+        .iterator(chunk_size=CHUNK_SIZE)
+    ):
+        yield {
+            "kind": "account",
+            "id": id,
+            "name": name,
+            "balance": str(balance),
+        }
+    for id, name, color in (
+        Tags.objects.filter(user_id=user_id)
+        .order_by("id")
+        .values_list("id", "name", "color")
+        .iterator(chunk_size=CHUNK_SIZE)
+    ):
+        yield {"kind": "tag", "id": id, "name": name, "color": color}
+    for record in iter_records(user_id):
+        yield {"kind": "record", **record}
+
+
+def chunked(lines: Iterable[str], size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    It joins lines into chunks of `size` lines, so the response isn't
+    written to the socket one line at a time
+    """
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def export_json_lines(user_id: int) -> Iterator[str]:
+    return chunked(json.dumps(row) + "\n" for row in iter_ledger(user_id))
+
+
+class Line:
+    """A file-like object whose writes are returned instead of buffered"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def export_csv(user_id: int) -> Iterator[str]:
+    """
+    CSV holds a single table, so it lists the records only, with the name
+    of their account and their tag names, separated by "|", on each row
+    """
+    writer = csv.writer(Line())
+
+    def lines() -> Iterator[str]:
+        yield writer.writerow(RECORD_COLUMNS)
+        for record in iter_records(user_id):
+            record["tags"] = "|".join(record["tags"])
+            yield writer.writerow([record[column] for column in RECORD_COLUMNS])
+
+    return chunked(lines())
@@ -0,0 +1,275 @@
+"""
+Rows derived from records, such as the balance of their accounts, their
+monthly checkpoints and the spending rollups of reports, are kept up
+to date by the records repository in the same transaction as the record
+writes themselves. A write is described as the ledger entries it removes
+and the ones it adds: an update removes the old state of a record and adds
+the new one. Deltas are summed in cents, see entities.money, and only
+turned back into Decimals to be written.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, datetime
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.db.models import Case, DecimalField, F, IntegerField, Q, Value, When
+
+from accounts.models import Accounts, BalanceCheckpoints, month_start
+from entities.entities import RecordType
+from entities.money import from_cents
+from reports.models import SpendingRollups
+
+
+class LedgerEntry(NamedTuple):
+    account_id: int
+    user_id: int
+    date: datetime
+    type: int
+    # in cents and already signed, see use_cases.records.records.signed_value
+    value: int
+    tag_ids: tuple[int, ...] = ()
+
+
+# (user_id, account_id, tag_id, month, type), see reports.SpendingRollups
+RollupKey = tuple[int, int, int | None, date, int]
+
+
+def balance_deltas(
+    removed: Iterable[LedgerEntry], added: Iterable[LedgerEntry]
+) -> dict[int, int]:
+    deltas: dict[int, int] = defaultdict(int)
+    for entry in removed:
+        deltas[entry.account_id] -= entry.value
+    for entry in added:
+        deltas[entry.account_id] += entry.value
+    return {id: delta for id, delta in deltas.items() if delta}
+
+
+def apply_balance_deltas(deltas: dict[int, int]) -> None:
+    """
+    It shifts the balance of every account by its delta with a single
+    `UPDATE ... SET balance = balance + CASE ... END` statement, so the
+    stored balances never have to be recomputed from the records.
+    """
+    if not deltas:
+        return
+    Accounts.objects.filter(id__in=deltas).update(
+        balance=F("balance")
+        + Case(
+            *[
+                When(id=id, then=Value(from_cents(delta)))
+                for id, delta in sorted(deltas.items())
+            ],
+            default=Value(Decimal("0.00")),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+    )
+
+
+def checkpoint_deltas(
+    removed: Iterable[LedgerEntry], added: Iterable[LedgerEntry]
+) -> dict[int, dict[date, int]]:
+    deltas: dict[int, dict[date, int]] = defaultdict(lambda: defaultdict(int))
+    for entry in removed:
+        deltas[entry.account_id][month_start(entry.date)] -= entry.value
+    for entry in added:
+        deltas[entry.account_id][month_start(entry.date)] += entry.value
+    return {
+        account_id: {month: delta for month, delta in months.items() if delta}
+        for account_id, months in deltas.items()
+        if any(months.values())
+    }
+
+
+def apply_checkpoint_deltas(deltas: dict[int, dict[date, int]]) -> None:
+    """
+    A record changes the closing balance of its month and of every month
+    after it. The missing checkpoints of the months written to are created
+    from the closing balance of the month before them, then all of them are
+    shifted with a single UPDATE, whatever the number of accounts and months.
+    """
+    if not deltas:
+        return
+
+    existing: dict[int, list[tuple[date, Decimal]]] = defaultdict(list)
+    for account_id, month, closing_balance in (
+        BalanceCheckpoints.objects.filter(
+            Q(
+                *[
+                    Q(account_id=account_id, month__lte=max(months))
+                    for account_id, months in deltas.items()
+                ],
+                _connector=Q.OR,
+            )
+        )
+        .order_by("account_id", "month")
+        .values_list("account_id", "month", "closing_balance")
+    ):
+        existing[account_id].append((month, closing_balance))
+
+    missing = []
+    for account_id, months in deltas.items():
+        checkpoints = existing[account_id]
+        checkpoint_months = [month for month, _ in checkpoints]
+        for month in months:
+            position = bisect_left(checkpoint_months, month)
+            if (
+                position < len(checkpoint_months)
+                and checkpoint_months[position] == month
+            ):
+                continue
+            previous_closing = (
+                checkpoints[position - 1][1] if position else Decimal("0.00")
+            )
+            missing.append(
+                BalanceCheckpoints(
+                    account_id=account_id,
+                    month=month,
+                    closing_balance=previous_closing,
+                )
+            )
+    BalanceCheckpoints.objects.bulk_create(missing)
+
+    # a checkpoint is shifted by the deltas of its own month and of all the
+    # months before it, so the latest month matching it wins
+    shifts = []
+    for account_id, months in sorted(deltas.items()):
+        total = sum(months.values())
+        for month in sorted(months, reverse=True):
+            shifts.append(
+                When(
+                    account_id=account_id,
+                    month__gte=month,
+                    then=Value(from_cents(total)),
+                )
+            )
+            total -= months[month]
+    BalanceCheckpoints.objects.filter(
+        Q(
+            *[
+                Q(account_id=account_id, month__gte=min(months))
+                for account_id, months in deltas.items()
+            ],
+            _connector=Q.OR,
+        )
+    ).update(
+        closing_balance=F("closing_balance")
+        + Case(
+            *shifts,
+            default=Value(Decimal("0.00")),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+    )
+
+
+def rollup_deltas(
+    removed: Iterable[LedgerEntry], added: Iterable[LedgerEntry]
+) -> dict[RollupKey, tuple[int, int]]:
+    totals: dict[RollupKey, int] = defaultdict(int)
+    counts: dict[RollupKey, int] = defaultdict(int)
+    for sign, entries in ((-1, removed), (1, added)):
+        for entry in entries:
+            amount = (
+                entry.value
+                if entry.type == RecordType.INCOME.value
+                else -entry.value
+            )
+            month = month_start(entry.date)
+            for tag_id in (None, *entry.tag_ids):
+                key = (
+                    entry.user_id,
+                    entry.account_id,
+                    tag_id,
+                    month,
+                    entry.type,
+                )
+                totals[key] += sign * amount
+                counts[key] += sign
+    return {
+        key: (totals[key], counts[key])
+        for key in totals
+        if totals[key] or counts[key]
+    }
+
+
+def apply_rollup_deltas(deltas: dict[RollupKey, tuple[int, int]]) -> None:
+    """
+    It creates the rollups written to for the first time and shifts the
+    others with a single UPDATE, then drops the ones left without records.
+    """
+    if not deltas:
+        return
+
+    existing: dict[RollupKey, int] = {
+        (user_id, account_id, tag_id, month, type): id
+        for id, user_id, account_id, tag_id, month, type in (
+            SpendingRollups.objects.filter(
+                account_id__in={key[1] for key in deltas},
+                month__in={key[3] for key in deltas},
+                type__in={key[4] for key in deltas},
+            ).values_list(
+                "id", "user_id", "account_id", "tag_id", "month", "type"
+            )
+        )
+    }
+    SpendingRollups.objects.bulk_create(
+        [
+            SpendingRollups(
+                user_id=user_id,
+                account_id=account_id,
+                tag_id=tag_id,
+                month=month,
+                type=type,
+                total=from_cents(total),
+                count=count,
+            )
+            for (user_id, account_id, tag_id, month, type), (
+                total,
+                count,
+            ) in deltas.items()
+            if (user_id, account_id, tag_id, month, type) not in existing
+        ]
+    )
+
+    shifted = {
+        existing[key]: delta for key, delta in deltas.items() if key in existing
+    }
+    if not shifted:
+        return
+    SpendingRollups.objects.filter(id__in=shifted).update(
+        total=F("total")
+        + Case(
+            *[
+                When(id=id, then=Value(from_cents(total)))
+                for id, (total, _) in shifted.items()
+            ],
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+        count=F("count")
+        + Case(
+            *[
+                When(id=id, then=Value(count))
+                for id, (_, count) in shifted.items()
+            ],
+            output_field=IntegerField(),
+        ),
+    )
+    if any(count < 0 for _, count in shifted.values()):
+        SpendingRollups.objects.filter(id__in=shifted, count=0).delete()
+
+
+def apply_ledger_changes(
+    removed: Iterable[LedgerEntry], added: Iterable[LedgerEntry]
+) -> dict[int, Decimal]:
+    """
+    It applies everything a write changes on the ledger and returns the
+    balance delta of each account touched by it.
+    """
+    removed, added = list(removed), list(added)
+    deltas = balance_deltas(removed, added)
+    apply_balance_deltas(deltas)
+    apply_checkpoint_deltas(checkpoint_deltas(removed, added))
+    apply_rollup_deltas(rollup_deltas(removed, added))
+    return {id: from_cents(delta) for id, delta in deltas.items()}
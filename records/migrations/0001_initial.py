@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("tags", "0002_rename_tag_tags"),
+        ("accounts", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Records",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("description", models.CharField(max_length=255)),
+                ("value", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("date", models.DateTimeField()),
+                (
+                    "type",
+                    models.PositiveSmallIntegerField(
+                        choices=[(0, "EXPENSE"), (1, "INCOME")]
+                    ),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="records",
+                        to="accounts.accounts",
+                    ),
+                ),
+                (
+                    "tags",
+                    models.ManyToManyField(
+                        blank=True, related_name="records", to="tags.tags"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="records",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "account", "date"],
+                        name="records_user_account_date",
+                    ),
+                    models.Index(
+                        fields=["user", "type", "date"],
+                        name="records_user_type_date",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("records", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="records",
+            index=models.Index(
+                fields=["user", "date", "id"], name="records_user_date_id"
+            ),
+        ),
+    ]
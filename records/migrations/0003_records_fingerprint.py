@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+from entities.entities import RecordType
+from use_cases.records.records import fingerprint
+
+
+def set_fingerprints(apps, schema_editor):
+    Records = apps.get_model("records", "Records")
+    records = []
+    for record in Records.objects.order_by("id").iterator(chunk_size=500):
+        record.fingerprint = fingerprint(
+            str(record.account_id),
+            record.date,
+            RecordType(record.type),
+            record.value,
+            record.description,
+        )
+        records.append(record)
+        if len(records) == 500:
+            Records.objects.bulk_update(records, ["fingerprint"])
+            records = []
+    Records.objects.bulk_update(records, ["fingerprint"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("records", "0002_records_user_date_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="records",
+            name="fingerprint",
+            field=models.CharField(default="", editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(set_fingerprints, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="records",
+            index=models.Index(
+                fields=["fingerprint"], name="records_fingerprint"
+            ),
+        ),
+    ]
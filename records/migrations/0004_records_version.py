@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("records", "0003_records_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="records",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:02
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+import django.db.models.deletion
+import records.models
+
+SQLITE_SEARCH = [
+    """
+    CREATE VIRTUAL TABLE records_search USING fts5(
+        description,
+        content='records_records',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER records_search_insert AFTER INSERT ON records_records
+    BEGIN
+        INSERT INTO records_search(rowid, description)
+        VALUES (new.id, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER records_search_delete AFTER DELETE ON records_records
+    BEGIN
+        INSERT INTO records_search(records_search, rowid, description)
+        VALUES ('delete', old.id, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER records_search_update
+    AFTER UPDATE OF description ON records_records
+    BEGIN
+        INSERT INTO records_search(records_search, rowid, description)
+        VALUES ('delete', old.id, old.description);
+        INSERT INTO records_search(rowid, description)
+        VALUES (new.id, new.description);
+    END
+    """,
+    "INSERT INTO records_search(records_search) VALUES ('rebuild')",
+]
+
+SQLITE_DROP_SEARCH = [
+    "DROP TRIGGER records_search_update",
+    "DROP TRIGGER records_search_delete",
+    "DROP TRIGGER records_search_insert",
+    "DROP TABLE records_search",
+]
+
+
+def description_search_index():
+    # declared from the very expression RecordsRepository.search filters by,
+    # so that the planner can match the index with it
+    return GinIndex(
+        SearchVector("description", config="simple"),
+        name="records_description_search",
+    )
+
+
+def create_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for statement in SQLITE_SEARCH:
+            schema_editor.execute(statement)
+    elif vendor == "postgresql":
+        schema_editor.add_index(
+            apps.get_model("records", "Records"), description_search_index()
+        )
+
+
+def drop_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for statement in SQLITE_DROP_SEARCH:
+            schema_editor.execute(statement)
+    elif vendor == "postgresql":
+        schema_editor.remove_index(
+            apps.get_model("records", "Records"), description_search_index()
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("records", "0004_records_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecordsSearch",
+            fields=[
+                (
+                    "record",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search",
+                        serialize=False,
+                        to="records.records",
+                    ),
+                ),
+                ("description", records.models.FullTextField()),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "records_search",
+                "managed": False,
+            },
+        ),
+        # the full-text index depends on the database, see RecordsSearch
+        migrations.RunPython(create_search, drop_search),
+    ]
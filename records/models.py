@@ -0,0 +1,770 @@
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime
+from typing import cast
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, models, transaction
+from django.db.models import Case, F, Q, Value, When
+
+from accounts.models import Accounts, to_account_entity
+from records.cursors import with_tags
+from records.ledger import LedgerEntry, apply_ledger_changes
+from entities.entities import (
+    Account,
+    Expense,
+    Income,
+    Record,
+    RecordBatch,
+    RecordType,
+    Tag,
+)
+from entities.money import CENT, to_cents
+from tags.models import Tags
+from use_cases.accounts.exceptions import MissingAccountException
+from use_cases.records.exceptions import (
+    RecordMissingIdException,
+    RecordNotFoundException,
+    RecordVersionConflictException,
+)
+from use_cases.records.records import (
+    RecordSelection,
+    RecordsUpdate,
+    Retagging,
+    batched,
+    record_fingerprint,
+    signed_value,
+)
+from use_cases.tags.exceptions import MissingTagException
+from use_cases.tags.tags import TagRegistries
+from users.models import CustomUser
+
+
+class Records(models.Model):
+    description = models.CharField(max_length=255)
+    value = models.DecimalField(max_digits=12, decimal_places=2)
+    date = models.DateTimeField()
+    type = models.PositiveSmallIntegerField(
+        choices=[(t.value, t.name) for t in RecordType]
+    )
+    account = models.ForeignKey(
+        Accounts, related_name="records", on_delete=models.CASCADE
+    )
+    # denormalized from account so that every per-user scan is served by
+    # the composite indexes below without joining accounts
+    user = models.ForeignKey(
+        CustomUser, related_name="records", on_delete=models.CASCADE
+    )
+    tags = models.ManyToManyField(Tags, related_name="records", blank=True)
+    # see use_cases.records.records.fingerprint
+    fingerprint = models.CharField(max_length=64, editable=False)
+    # bumped by every update, see RecordsRepository.update_many
+    version = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return self.description
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "account", "date"],
+                name="records_user_account_date",
+            ),
+            models.Index(
+                fields=["user", "type", "date"],
+                name="records_user_type_date",
+            ),
+            models.Index(
+                fields=["user", "date", "id"],
+                name="records_user_date_id",
+            ),
+            models.Index(fields=["fingerprint"], name="records_fingerprint"),
+        ]
+
+
+class FullTextField(models.TextField):
+    """A column of an FTS5 table, which queries can `match`"""
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    """The FTS5 `MATCH` operator, see RecordsSearch"""
+
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+class RecordsSearch(models.Model):
+    """
+    The full-text index of the descriptions of the records, on SQLite: an
+    FTS5 table of their descriptions by record id, its rowid, kept in sync
+    by triggers on the records table, see migration 0005. `rank` is only
+    known in queries matching it. On PostgreSQL the descriptions are
+    searched through a GIN index on their tsvector instead.
+    """
+
+    record = models.OneToOneField(
+        Records,
+        primary_key=True,
+        db_column="rowid",
+        related_name="search",
+        on_delete=models.DO_NOTHING,
+    )
+    description = FullTextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "records_search"
+
+
+def search_terms(text: str) -> list[str]:
+    # only words are searched for, so nothing typed can be taken as the
+    # syntax of the full-text queries
+    return re.findall(r"\w+", text)
+
+
+def to_record_entity(
+    record: Records, tags: Iterable[Tags | Tag] | None = None
+) -> Record:
+    """
+    It maps a row into its entity. Unless `tags` is given, the row must come
+    from a queryset built with `select_related("account")` and
+    `prefetch_related("tags")`, otherwise every call hits the database twice.
+    Tag entities given are kept as they are, so they stay shared.
+    """
+    record_class = Income if record.type == RecordType.INCOME.value else Expense
+    entity_tags = [
+        tag if isinstance(tag, Tag) else Tag(tag.name, tag.color)
+        for tag in (record.tags.all() if tags is None else tags)
+    ]
+    return record_class(
+        str(record.id),
+        record.description,
+        record.value,
+        record.date,
+        account=to_account_entity(record.account),
+        tags=entity_tags or None,
+        version=record.version,
+    )
+
+
+def to_ledger_entry(record: Records, tag_ids: Iterable[int] = ()) -> LedgerEntry:
+    return LedgerEntry(
+        record.account_id,
+        record.user_id,
+        record.date,
+        record.type,
+        to_cents(signed_value(RecordType(record.type), record.value)),
+        tuple(tag_ids),
+    )
+
+
+def get_tag_ids(ids: Iterable[int | str]) -> dict[int, list[int]]:
+    tag_ids: dict[int, list[int]] = defaultdict(list)
+    for record_id, tag_id in Records.tags.through.objects.filter(
+        records_id__in=ids
+    ).values_list("records_id", "tags_id"):
+        tag_ids[record_id].append(tag_id)
+    return tag_ids
+
+
+class RecordsRepository:
+    batch_size = 500
+
+    def __init__(self, tag_registries: TagRegistries | None = None):
+        """
+        :param tag_registries: the tags of the records are resolved from
+            them, by their ids, instead of being read along with the records
+        """
+        self.tag_registries = tag_registries
+
+    def _records(self):
+        records = Records.objects.select_related("account")
+        if self.tag_registries is None:
+            records = records.prefetch_related("tags")
+        return records
+
+    def _to_entities(
+        self, rows: list[Records], tags: list[list[Tags]] | None = None
+    ) -> list[Record]:
+        """
+        It maps the rows into entities, with the tag rows of each one when
+        they are known. Otherwise they come from the prefetch of _records,
+        or their ids are read with one query and resolved by the registries.
+        """
+        if self.tag_registries is None:
+            if tags is None:
+                return [to_record_entity(row) for row in rows]
+            return [
+                to_record_entity(row, row_tags)
+                for row, row_tags in zip(rows, tags, strict=True)
+            ]
+        if tags is None:
+            tag_ids = get_tag_ids([row.id for row in rows])
+            ids = [tag_ids[row.id] for row in rows]
+        else:
+            ids = [[tag.id for tag in row_tags] for row_tags in tags]
+        return [
+            to_record_entity(
+                row,
+                self.tag_registries.resolve(
+                    str(row.user_id), [str(id) for id in row_ids]
+                ),
+            )
+            for row, row_ids in zip(rows, ids, strict=True)
+        ]
+
+    def _get_accounts(
+        self, records: list[Record], also_lock: Iterable[int] = ()
+    ) -> dict[str, Accounts]:
+        """
+        It locks the accounts of the records, plus `also_lock`, as their
+        balances are about to change. They are always locked in the same
+        order, so concurrent writes can't deadlock.
+        """
+        ids = {record.account.id for record in records}
+        if None in ids:
+            raise MissingAccountException()
+        accounts = {
+            str(account.id): account
+            for account in Accounts.objects.select_for_update()
+            .filter(id__in={*ids, *also_lock})
+            .order_by("id")
+        }
+        if any(id not in accounts for id in ids):
+            raise MissingAccountException()
+        return accounts
+
+    def _get_tags(
+        self, records: list[Record], accounts: dict[str, Accounts]
+    ) -> list[list[Tags]]:
+        """
+        It resolves the tags of a whole batch with a single query, returning
+        the tag rows of each record in the same order as `records`.
+        """
+        wanted = [
+            (accounts[str(record.account.id)].user_id, tag.name)
+            for record in records
+            for tag in record.tags or []
+        ]
+        tags_found: dict[tuple[int, str], Tags] = {}
+        if wanted:
+            tags_found = {
+                (tag.user_id, tag.name): tag
+                for tag in Tags.objects.filter(
+                    user_id__in={user_id for user_id, _ in wanted},
+                    name__in={name for _, name in wanted},
+                )
+            }
+        if any(key not in tags_found for key in wanted):
+            raise MissingTagException()
+
+        return [
+            [
+                tags_found[(accounts[str(record.account.id)].user_id, name)]
+                for name in sorted({tag.name for tag in record.tags or []})
+            ]
+            for record in records
+        ]
+
+    def _fill(self, row: Records, record: Record, account: Accounts) -> None:
+        row.description = record.description
+        # as the column keeps it, so the ledger sees the value stored
+        row.value = record.value.quantize(CENT)
+        row.date = record.date
+        row.type = record.type.value
+        row.account = account
+        row.user_id = account.user_id
+        row.fingerprint = record_fingerprint(record)
+
+    def _apply_ledger_changes(
+        self,
+        removed: list[LedgerEntry],
+        rows: list[Records],
+        tags: list[list[Tags]],
+        accounts: dict[str, Accounts],
+    ) -> list[Accounts]:
+        """
+        :param accounts: the ones locked for the write, which every account
+            it moves the balance of is among
+        :return: list[Accounts] whose balances moved, as they were left
+        """
+        deltas = apply_ledger_changes(
+            removed,
+            [
+                to_ledger_entry(row, [tag.id for tag in row_tags])
+                for row, row_tags in zip(rows, tags, strict=True)
+            ],
+        )
+        # the accounts are locked, so their new balances are known without
+        # reading them back
+        moved = []
+        for id, delta in deltas.items():
+            account = accounts[str(id)]
+            account.balance += delta
+            moved.append(account)
+        return moved
+
+    def _add_tags(self, rows: list[Records], tags: list[list[Tags]]) -> None:
+        Records.tags.through.objects.bulk_create(
+            [
+                Records.tags.through(records_id=row.id, tags_id=tag.id)
+                for row, row_tags in zip(rows, tags, strict=True)
+                for tag in row_tags
+            ]
+        )
+
+    def _create_batch(
+        self, records: list[Record], accounts: dict[str, Accounts]
+    ) -> list[Record]:
+        tags = self._get_tags(records, accounts)
+        rows = []
+        for record in records:
+            row = Records()
+            self._fill(row, record, accounts[str(record.account.id)])
+            rows.append(row)
+        Records.objects.bulk_create(rows)
+        self._add_tags(rows, tags)
+        self._apply_ledger_changes([], rows, tags, accounts)
+        return self._to_entities(rows, tags)
+
+    def _update_rows(
+        self, rows: list[Records], versions: dict[int, int]
+    ) -> None:
+        """
+        It writes the rows with a single UPDATE matching each of them only at
+        the version it was read at, so it doesn't need to lock them. If any
+        row has changed in between, the whole batch is a conflict.
+        """
+        fields = [
+            cast(models.Field, Records._meta.get_field(name))
+            for name in [
+                "description",
+                "value",
+                "date",
+                "type",
+                "account",
+                "user",
+                "fingerprint",
+            ]
+        ]
+        updated = Records.objects.filter(
+            Q(
+                *[Q(id=row.id, version=versions[row.id]) for row in rows],
+                _connector=Q.OR,
+            )
+        ).update(
+            version=F("version") + 1,
+            **{
+                field.attname: Case(
+                    *[
+                        When(
+                            id=row.id,
+                            then=Value(
+                                getattr(row, field.attname), output_field=field
+                            ),
+                        )
+                        for row in rows
+                    ],
+                    output_field=field,
+                )
+                for field in fields
+            },
+        )
+        if updated != len(rows):
+            raise RecordVersionConflictException()
+        for row in rows:
+            row.version = versions[row.id] + 1
+
+    def _update_batch(
+        self, records: list[Record], accounts: dict[str, Accounts]
+    ) -> tuple[list[Record], list[Accounts]]:
+        ids = {str(record.id) for record in records}
+        rows_found = {
+            str(row.id): row for row in Records.objects.filter(id__in=ids)
+        }
+        if len(rows_found) != len(ids):
+            raise RecordNotFoundException()
+        # the version each row is expected at: the one of the record, if it
+        # has one, or else the one just read, which the ledger entries below
+        # were taken from
+        versions = {}
+        for record in records:
+            row = rows_found[str(record.id)]
+            if record.version is not None and record.version != row.version:
+                raise RecordVersionConflictException()
+            versions[row.id] = row.version
+
+        old_tag_ids = get_tag_ids(ids)
+        removed = [
+            to_ledger_entry(row, old_tag_ids[row.id])
+            for row in rows_found.values()
+        ]
+        # a record moved out of the accounts locked since they were locked
+        # has changed after update_many read it
+        if any(str(entry.account_id) not in accounts for entry in removed):
+            raise RecordVersionConflictException()
+        tags = self._get_tags(records, accounts)
+        rows = []
+        for record in records:
+            row = rows_found[str(record.id)]
+            self._fill(row, record, accounts[str(record.account.id)])
+            rows.append(row)
+        self._update_rows(rows, versions)
+        Records.tags.through.objects.filter(records_id__in=ids).delete()
+        self._add_tags(rows, tags)
+        moved = self._apply_ledger_changes(removed, rows, tags, accounts)
+        return self._to_entities(rows, tags), moved
+
+    def create(self, record: Record) -> Record:
+        return self.create_many([record])[0]
+
+    @transaction.atomic
+    def create_many(self, records: Iterable[Record]) -> list[Record]:
+        """
+        Every account of the records is locked at once, in id order, before
+        the first batch, so concurrent writes over overlapping accounts
+        can't deadlock whatever the number of batches
+        """
+        records = list(records)
+        accounts = self._get_accounts(records)
+        created_records = []
+        for batch in batched(records, self.batch_size):
+            created_records.extend(self._create_batch(batch, accounts))
+        return created_records
+
+    def update(self, record: Record) -> Record:
+        return self.update_many([record]).records[0]
+
+    @transaction.atomic
+    def update_many(self, records: Iterable[Record]) -> RecordsUpdate:
+        """
+        As create_many, it locks every account the records are in or move
+        to at once, before the first batch, which keeps their balances as
+        the batches move them
+        """
+        records = list(records)
+        if any(record.id is None for record in records):
+            raise RecordMissingIdException()
+        accounts = self._get_accounts(
+            records,
+            Records.objects.filter(
+                id__in={str(record.id) for record in records}
+            ).values_list("account_id", flat=True),
+        )
+        updated_records = []
+        moved: dict[int, Accounts] = {}
+        for batch in batched(records, self.batch_size):
+            updated_batch, moved_by_batch = self._update_batch(batch, accounts)
+            updated_records.extend(updated_batch)
+            moved.update((account.id, account) for account in moved_by_batch)
+        return RecordsUpdate(
+            updated_records, [to_account_entity(a) for a in moved.values()]
+        )
+
+    @transaction.atomic
+    def delete(self, id: str) -> list[Account]:
+        try:
+            record = (
+                Records.objects.select_for_update()
+                .only("account_id", "user_id", "date", "type", "value")
+                .get(id=id)
+            )
+        except ObjectDoesNotExist as e:
+            raise RecordNotFoundException() from e
+
+        tag_ids = get_tag_ids([record.id])[record.id]
+        Records.objects.filter(id=id).delete()
+        deltas = apply_ledger_changes([to_ledger_entry(record, tag_ids)], [])
+        # the UPDATE of their balances keeps them locked until the commit
+        return [
+            to_account_entity(account)
+            for account in Accounts.objects.filter(id__in=deltas).order_by("id")
+        ]
+
+    def get(self, id: str) -> Record:
+        try:
+            return self._to_entities([self._records().get(id=id)])[0]
+        except ObjectDoesNotExist as e:
+            raise RecordNotFoundException() from e
+
+    def get_page(
+        self,
+        user_id: str,
+        account_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        after: tuple[datetime, str] | None = None,
+        limit: int = 100,
+    ) -> list[Record]:
+        records = self._records().filter(user_id=user_id)
+        if account_id is not None:
+            records = records.filter(account_id=account_id)
+        if since is not None:
+            records = records.filter(date__gte=since)
+        if until is not None:
+            records = records.filter(date__lte=until)
+        if after is not None:
+            after_date, after_id = after
+            records = records.filter(
+                Q(date__gt=after_date) | Q(date=after_date, id__gt=after_id)
+            )
+        return self._to_entities(list(records.order_by("date", "id")[:limit]))
+
+    def get_batch(
+        self,
+        user_id: str,
+        account_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> RecordBatch:
+        """
+        The records are read as plain rows ordered by (date, id), and their
+        tags by a second cursor in the same order, merged into them as both
+        advance, see records.cursors. No model nor Record is built per row.
+        """
+        records = Records.objects.filter(user_id=int(user_id))
+        if account_id is not None:
+            records = records.filter(account_id=account_id)
+        if since is not None:
+            records = records.filter(date__gte=since)
+        if until is not None:
+            records = records.filter(date__lte=until)
+        accounts = {
+            account.id: to_account_entity(account)
+            for account in Accounts.objects.filter(user_id=int(user_id))
+        }
+        tags = {}
+        if self.tag_registries is None:
+            tags = {
+                str(tag.id): Tag(tag.name, tag.color)
+                for tag in Tags.objects.filter(user_id=int(user_id))
+            }
+
+        def resolve(ids: list[str]) -> list[Tag]:
+            if self.tag_registries is None:
+                return [tags[id] for id in ids]
+            return self.tag_registries.resolve(user_id, ids)
+
+        record_tags = (
+            Records.tags.through.objects.filter(records__in=records)
+            .order_by("records__date", "records_id", "tags__name")
+            .values_list("records__date", "records_id", "tags_id")
+            .iterator(chunk_size=self.batch_size)
+        )
+        rows = (
+            records.order_by("date", "id")
+            .values_list(
+                "date",
+                "id",
+                "description",
+                "value",
+                "type",
+                "account_id",
+                "version",
+            )
+            .iterator(chunk_size=self.batch_size)
+        )
+        batch = RecordBatch()
+        for row, record_tags_ids in with_tags(rows, record_tags, key_size=2):
+            date, id, description, value, type, row_account_id, version = row
+            batch.append(
+                id,
+                description,
+                value,
+                date,
+                accounts[row_account_id],
+                RecordType(type),
+                resolve([str(id) for id in record_tags_ids])
+                if record_tags_ids
+                else [],
+                version,
+            )
+        return batch
+
+    def search(
+        self,
+        user_id: str,
+        text: str,
+        account_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        tag: str | None = None,
+        limit: int = 50,
+    ) -> list[Record]:
+        """
+        The records are found through the full-text index of their
+        descriptions, see RecordsSearch, and filtered along the way, so no
+        description is scanned
+        """
+        terms = search_terms(text)
+        if not terms:
+            return []
+        records = self._records().filter(user_id=int(user_id))
+        if account_id is not None:
+            records = records.filter(account_id=account_id)
+        if since is not None:
+            records = records.filter(date__gte=since)
+        if until is not None:
+            records = records.filter(date__lte=until)
+        if tag is not None:
+            records = records.filter(
+                id__in=Records.tags.through.objects.filter(
+                    tags__user_id=int(user_id), tags__name=tag
+                ).values("records_id")
+            )
+
+        if connection.vendor == "postgresql":
+            query = SearchQuery(
+                " & ".join(f"{term}:*" for term in terms),
+                config="simple",
+                search_type="raw",
+            )
+            vector = SearchVector("description", config="simple")
+            records = (
+                records.annotate(vector=vector)
+                .filter(vector=query)
+                .annotate(rank=SearchRank(vector, query))
+                .order_by("-rank", "-date", "-id")
+            )
+        else:
+            # every term as a phrase, matching the words starting with it
+            match = " ".join(f'"{term}"*' for term in terms)
+            records = records.filter(search__description__match=match).order_by(
+                "search__rank", "-date", "-id"
+            )
+        return self._to_entities(list(records[:limit]))
+
+    def get_existing_fingerprints(self, fingerprints: Iterable[str]) -> set[str]:
+        existing: set[str] = set()
+        for batch in batched(set(fingerprints), self.batch_size):
+            existing.update(
+                Records.objects.filter(fingerprint__in=batch)
+                .values_list("fingerprint", flat=True)
+                .distinct()
+            )
+        return existing
+
+    def get_ids(
+        self,
+        selection: RecordSelection,
+        after: str | None = None,
+        limit: int = 500,
+    ) -> list[str]:
+        records = Records.objects.filter(user_id=int(selection.user_id))
+        if selection.ids is not None:
+            records = records.filter(id__in=selection.ids)
+        if selection.account_id is not None:
+            records = records.filter(account_id=selection.account_id)
+        if selection.since is not None:
+            records = records.filter(date__gte=selection.since)
+        if selection.until is not None:
+            records = records.filter(date__lte=selection.until)
+        if selection.description is not None:
+            records = records.filter(
+                description__istartswith=selection.description
+            )
+        if after is not None:
+            records = records.filter(id__gt=int(after))
+        return [
+            str(id)
+            for id in records.order_by("id").values_list("id", flat=True)[:limit]
+        ]
+
+    @transaction.atomic
+    def retag(
+        self,
+        user_id: str,
+        ids: list[str],
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+    ) -> Retagging:
+        """
+        The links to the tags are inserted and deleted with one statement
+        each for the whole batch, and only the rollups of the tags follow,
+        as the records keep their values. The records retagged get a new
+        version, so updates of them read before are conflicts.
+        """
+        add, remove = set(add), set(remove)
+        tags = {
+            tag.name: tag
+            for tag in Tags.objects.filter(
+                user_id=int(user_id), name__in=add | remove
+            )
+        }
+        if len(tags) != len(add | remove):
+            raise MissingTagException()
+        add_ids = {tags[name].id for name in add}
+        remove_ids = {tags[name].id for name in remove}
+
+        # the balances don't change, but the rollups do
+        accounts = {
+            account.id: account
+            for account in Accounts.objects.select_for_update()
+            .filter(user_id=int(user_id))
+            .order_by("id")
+        }
+        rows = list(
+            Records.objects.filter(user_id=int(user_id), id__in=ids).order_by(
+                "id"
+            )
+        )
+        tag_ids = get_tag_ids([row.id for row in rows])
+        removed, added, changed_rows, new_tag_ids = [], [], [], []
+        for row in rows:
+            row.account = accounts[row.account_id]
+            current = set(tag_ids[row.id])
+            new = (current - remove_ids) | add_ids
+            if new == current:
+                continue
+            removed.append(to_ledger_entry(row, current - new))
+            added.append(to_ledger_entry(row, new - current))
+            changed_rows.append(row)
+            new_tag_ids.append(new)
+        if not changed_rows:
+            return Retagging()
+
+        changed_ids = [row.id for row in changed_rows]
+        Records.tags.through.objects.filter(
+            records_id__in=changed_ids, tags_id__in=remove_ids
+        ).delete()
+        Records.tags.through.objects.bulk_create(
+            [
+                Records.tags.through(records_id=row.id, tags_id=tag_id)
+                for row, entry in zip(changed_rows, added, strict=True)
+                for tag_id in entry.tag_ids
+            ]
+        )
+        Records.objects.filter(id__in=changed_ids).update(
+            version=F("version") + 1
+        )
+        for row in changed_rows:
+            row.version += 1
+        # each record is removed with the tags it lost and added back with
+        # the ones it got, which cancel out everywhere but in their rollups
+        apply_ledger_changes(removed, added)
+
+        tag_rows = {
+            tag.id: tag
+            for tag in Tags.objects.filter(
+                id__in=set().union(*new_tag_ids)
+            ).order_by("name")
+        }
+        return Retagging(
+            self._to_entities(
+                changed_rows,
+                [
+                    [tag for id, tag in tag_rows.items() if id in row_tag_ids]
+                    for row_tag_ids in new_tag_ids
+                ],
+            ),
+            added=sum(len(entry.tag_ids) for entry in added),
+            removed=sum(len(entry.tag_ids) for entry in removed),
+        )
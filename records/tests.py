@@ -0,0 +1,884 @@
+import random
+from collections import defaultdict
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import (
+    AccountRepository,
+    Accounts,
+    BalanceCheckpoints,
+    to_account_entity,
+)
+from entities.entities import Expense, Income, RecordType, Tag, Transference
+from entities.money import from_cents, to_cents
+from records.cursors import with_tags
+from records.ledger import LedgerEntry, balance_deltas
+from records.models import Records, RecordsRepository
+from reports.models import ReportsRepository, SpendingRollups
+from tags.models import Tags, load_tags
+from use_cases.accounts.exceptions import MissingAccountException
+from use_cases.records.exceptions import (
+    RecordMissingIdException,
+    RecordNotFoundException,
+    RecordVersionConflictException,
+)
+from use_cases.records.records import (
+    RecordSelection,
+    RecordUseCases,
+    record_fingerprint,
+)
+from use_cases.tags.exceptions import MissingTagException
+from use_cases.tags.tags import TagRegistries
+from use_cases.transferences.transferences import TransferenceUseCases
+from users.models import CustomUser
+
+
+@pytest.fixture
+def custom_user():
+    return CustomUser.objects.create_user(
+        email="johndoe@me.com", password="password"
+    )
+
+
+@pytest.fixture
+def account(custom_user):
+    return to_account_entity(
+        Accounts.objects.create(name="Main", user=custom_user)
+    )
+
+
+@pytest.fixture
+def tags(custom_user):
+    Tags.objects.create(name="Bills", color="#FF0000", user=custom_user)
+    Tags.objects.create(name="House", color="#00FF00", user=custom_user)
+    return [Tag("Bills", "#FF0000"), Tag("House", "#00FF00")]
+
+
+@pytest.fixture
+def repo():
+    return RecordsRepository()
+
+
+@pytest.fixture
+def expense(account, tags):
+    return Expense(
+        None,
+        "Water",
+        Decimal("10.34"),
+        datetime(2023, 4, 8, tzinfo=UTC),
+        account=account,
+        tags=tags,
+    )
+
+
+@pytest.mark.django_db
+def test_records_repository_create(repo, expense):
+    created_record = repo.create(expense)
+    assert created_record.id is not None
+    assert created_record.description == expense.description
+    assert created_record.value == expense.value
+    assert created_record.date == expense.date
+    assert created_record.type == RecordType.EXPENSE
+    assert created_record.account.id == expense.account.id
+    assert created_record.tags == expense.tags
+
+
+@pytest.mark.django_db
+def test_records_repository_create_without_tags(repo, account):
+    created_record = repo.create(
+        Income(
+            None,
+            "Salary",
+            Decimal("1000"),
+            datetime(2023, 4, 1, tzinfo=UTC),
+            account=account,
+        )
+    )
+    assert isinstance(created_record, Income)
+    assert created_record.tags is None
+
+
+@pytest.mark.django_db
+def test_records_repository_create_with_missing_tag(repo, expense):
+    with pytest.raises(MissingTagException):
+        repo.create(
+            Expense(
+                None,
+                expense.description,
+                expense.value,
+                expense.date,
+                account=expense.account,
+                tags=[Tag("Car")],
+            )
+        )
+    assert not Records.objects.exists()
+
+
+@pytest.mark.django_db
+def test_records_repository_create_with_missing_account(repo, expense):
+    Accounts.objects.all().delete()
+    with pytest.raises(MissingAccountException):
+        repo.create(expense)
+
+
+@pytest.mark.django_db
+def test_records_repository_update(repo, expense):
+    created_record = repo.create(expense)
+    updated_record = repo.update(
+        Income(
+            created_record.id,
+            "Refund",
+            Decimal("5.00"),
+            expense.date,
+            account=expense.account,
+            tags=[Tag("House")],
+        )
+    )
+    assert updated_record.id == created_record.id
+    assert updated_record.type == RecordType.INCOME
+    assert repo.get(created_record.id) == updated_record
+
+
+@pytest.mark.django_db
+def test_records_repository_update_without_id(repo, expense):
+    with pytest.raises(RecordMissingIdException):
+        repo.update(expense)
+
+
+@pytest.mark.django_db
+def test_records_repository_update_missing_record(repo, expense):
+    with pytest.raises(RecordNotFoundException):
+        repo.update(
+            Expense(
+                "1",
+                expense.description,
+                expense.value,
+                expense.date,
+                account=expense.account,
+            )
+        )
+
+
+@pytest.mark.django_db
+def test_records_repository_delete(repo, expense):
+    created_record = repo.create(expense)
+    repo.delete(created_record.id)
+    with pytest.raises(RecordNotFoundException):
+        repo.get(created_record.id)
+    with pytest.raises(RecordNotFoundException):
+        repo.delete(created_record.id)
+
+
+@pytest.mark.django_db
+def test_records_repository_get_does_not_query_per_relation(
+    repo, expense, django_assert_num_queries
+):
+    created_record = repo.create(expense)
+    # one query for the record joined with its account, one for its tags
+    with django_assert_num_queries(2):
+        record = repo.get(created_record.id)
+    assert record == created_record
+
+
+def test_records_composite_indexes():
+    index_fields = {tuple(index.fields) for index in Records._meta.indexes}
+    assert ("user", "account", "date") in index_fields
+    assert ("user", "type", "date") in index_fields
+
+
+@pytest.mark.django_db
+def test_records_repository_get_existing_fingerprints(
+    repo, account, tags, django_assert_num_queries
+):
+    created_record, _ = repo.create_many(_expenses(account, tags, 2))
+    updated_record = repo.update(
+        Expense(
+            created_record.id,
+            "Power",
+            Decimal("10.34"),
+            datetime(2023, 4, 8, tzinfo=UTC),
+            account=account,
+        )
+    )
+    fingerprints = [
+        record_fingerprint(record)
+        for record in [*_expenses(account, tags, 3), updated_record]
+    ]
+    with django_assert_num_queries(1):
+        existing = repo.get_existing_fingerprints(fingerprints)
+    assert existing == {fingerprints[1], fingerprints[3]}
+
+
+def _expenses(account, tags, count):
+    return [
+        Expense(
+            None,
+            f"Water {i}",
+            Decimal("10.34"),
+            datetime(2023, 4, 8, tzinfo=UTC),
+            account=account,
+            tags=tags,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.django_db
+def test_records_repository_create_many(repo, account, tags):
+    repo.batch_size = 2
+    created_records = repo.create_many(_expenses(account, tags, 5))
+    assert len(created_records) == 5
+    assert len({record.id for record in created_records}) == 5
+    assert all(record.tags == tags for record in created_records)
+    assert Records.objects.count() == 5
+    assert Records.tags.through.objects.count() == 10
+
+
+@pytest.mark.django_db
+def test_records_repository_create_many_queries_per_batch(
+    repo, account, tags, django_assert_num_queries
+):
+    records = _expenses(account, tags, 50)
+    # account lookup, tag lookup, records insert, tags insert, balance
+    # update, checkpoints lookup, insert and update, rollups lookup and
+    # insert, plus the savepoint of the transaction
+    with django_assert_num_queries(12):
+        repo.create_many(records)
+
+
+@pytest.mark.django_db
+def test_records_repository_create_many_is_atomic(repo, account, tags):
+    repo.batch_size = 2
+    records = _expenses(account, tags, 4)
+    records.append(
+        Expense(
+            None,
+            "Car wash",
+            Decimal("20.00"),
+            datetime(2023, 4, 8, tzinfo=UTC),
+            account=account,
+            tags=[Tag("Car")],
+        )
+    )
+    with pytest.raises(MissingTagException):
+        repo.create_many(records)
+    assert not Records.objects.exists()
+
+
+@pytest.mark.django_db
+def test_records_repository_update_many(repo, account, tags):
+    created_records = repo.create_many(_expenses(account, tags, 3))
+    updated_records = repo.update_many(
+        [
+            Income(
+                record.id,
+                "Refund",
+                Decimal("1.00"),
+                record.date,
+                account=account,
+                tags=[Tag("House")],
+            )
+            for record in created_records
+        ]
+    ).records
+    assert all(record.type == RecordType.INCOME for record in updated_records)
+    assert [repo.get(record.id) for record in created_records] == (
+        updated_records
+    )
+    assert Records.tags.through.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_records_repository_update_many_missing_record(repo, account, tags):
+    created_records = repo.create_many(_expenses(account, tags, 1))
+    missing_record = Expense(
+        "0",
+        "Water",
+        Decimal("10.34"),
+        datetime(2023, 4, 8, tzinfo=UTC),
+        account=account,
+    )
+    with pytest.raises(RecordNotFoundException):
+        repo.update_many([*created_records, missing_record])
+
+
+@pytest.mark.django_db
+def test_records_repository_get_page(repo, account, tags):
+    created_records = repo.create_many(_expenses(account, tags, 5))
+    first_page = repo.get_page(account.user_id, limit=3)
+    assert first_page == created_records[:3]
+    last_record = first_page[-1]
+    second_page = repo.get_page(
+        account.user_id,
+        account_id=account.id,
+        after=(last_record.date, str(last_record.id)),
+        limit=3,
+    )
+    assert second_page == created_records[3:]
+
+
+@pytest.mark.django_db
+def test_records_repository_get_page_date_range(repo, account):
+    for day in (1, 2, 3):
+        repo.create(
+            Expense(
+                None,
+                "Water",
+                Decimal("10.34"),
+                datetime(2023, 4, day, tzinfo=UTC),
+                account=account,
+            )
+        )
+    page = repo.get_page(
+        account.user_id,
+        since=datetime(2023, 4, 2, tzinfo=UTC),
+        until=datetime(2023, 4, 3, tzinfo=UTC),
+    )
+    assert [record.date.day for record in page] == [2, 3]
+
+
+@pytest.mark.django_db
+def test_records_repository_get_page_queries(
+    repo, account, tags, django_assert_num_queries
+):
+    repo.create_many(_expenses(account, tags, 20))
+    # the page joined with the accounts and one query for all of its tags
+    with django_assert_num_queries(2):
+        repo.get_page(account.user_id, limit=20)
+
+
+def _balance(account):
+    return Accounts.objects.get(id=account.id).balance
+
+
+def _assert_consistent(account):
+    reconciliation = AccountRepository(account.user_id).reconcile(account.id)
+    assert reconciliation.is_consistent
+
+
+@pytest.mark.django_db
+def test_records_repository_keeps_balance_on_create(repo, account):
+    created_record = repo.create(
+        Income(
+            None,
+            "Salary",
+            Decimal("1000.00"),
+            datetime(2023, 4, 1, tzinfo=UTC),
+            account=account,
+        )
+    )
+    repo.create_many(_expenses(account, None, 3))
+    assert created_record.account.balance == Decimal("1000.00")
+    assert _balance(account) == Decimal("968.98")
+    _assert_consistent(account)
+
+
+@pytest.mark.django_db
+def test_records_repository_keeps_balance_on_update(repo, account):
+    other_account = to_account_entity(
+        Accounts.objects.create(name="Savings", user_id=account.user_id)
+    )
+    created_record = repo.create(_expenses(account, None, 1)[0])
+    updated_record = repo.update(
+        Income(
+            created_record.id,
+            "Refund",
+            Decimal("5.00"),
+            created_record.date,
+            account=other_account,
+        )
+    )
+    assert _balance(account) == Decimal("0.00")
+    assert _balance(other_account) == Decimal("5.00")
+    assert updated_record.account.balance == Decimal("5.00")
+    _assert_consistent(account)
+    _assert_consistent(other_account)
+
+
+@pytest.mark.django_db
+def test_records_repository_keeps_balance_on_delete(repo, account):
+    created_records = repo.create_many(_expenses(account, None, 2))
+    repo.delete(created_records[0].id)
+    assert _balance(account) == Decimal("-10.34")
+    _assert_consistent(account)
+
+
+@pytest.mark.django_db
+def test_records_repository_balance_update_is_a_single_statement(repo, account):
+    other_account = to_account_entity(
+        Accounts.objects.create(name="Savings", user_id=account.user_id)
+    )
+    records = _expenses(account, None, 2) + _expenses(other_account, None, 2)
+    with CaptureQueriesContext(connection) as context:
+        repo.create_many(records)
+    balance_updates = [
+        query
+        for query in context.captured_queries
+        if query["sql"].startswith('UPDATE "accounts_accounts"')
+    ]
+    assert len(balance_updates) == 1
+
+
+def _record(account, record_class, value, *date):
+    return record_class(
+        None,
+        "Coffee",
+        Decimal(value),
+        datetime(*date, tzinfo=UTC),
+        account=account,
+    )
+
+
+def _checkpoints(account):
+    return {
+        (checkpoint.month.year, checkpoint.month.month): (
+            checkpoint.closing_balance
+        )
+        for checkpoint in BalanceCheckpoints.objects.filter(
+            account_id=account.id
+        )
+    }
+
+
+@pytest.mark.django_db
+def test_records_repository_keeps_checkpoints(repo, account):
+    repo.create_many(
+        [
+            _record(account, Income, "100.00", 2023, 1, 15),
+            _record(account, Expense, "30.00", 2023, 3, 1),
+        ]
+    )
+    assert _checkpoints(account) == {
+        (2023, 1): Decimal("100.00"),
+        (2023, 3): Decimal("70.00"),
+    }
+
+    # a record in a month without checkpoint starts from the month before it
+    february_record = repo.create(_record(account, Expense, "10.00", 2023, 2, 5))
+    assert _checkpoints(account) == {
+        (2023, 1): Decimal("100.00"),
+        (2023, 2): Decimal("90.00"),
+        (2023, 3): Decimal("60.00"),
+    }
+
+    # moving a record to another month shifts only the months in between
+    repo.update(
+        Expense(
+            february_record.id,
+            "Coffee",
+            Decimal("10.00"),
+            datetime(2022, 12, 31, tzinfo=UTC),
+            account=account,
+        )
+    )
+    assert _checkpoints(account) == {
+        (2022, 12): Decimal("-10.00"),
+        (2023, 1): Decimal("90.00"),
+        (2023, 2): Decimal("90.00"),
+        (2023, 3): Decimal("60.00"),
+    }
+
+    repo.delete(february_record.id)
+    assert _checkpoints(account)[(2023, 3)] == Decimal("70.00")
+
+
+@pytest.mark.django_db
+def test_transfer_many_moves_balances_in_fixed_statements(
+    repo, account, django_assert_num_queries
+):
+    savings = to_account_entity(
+        Accounts.objects.create(name="Savings", user_id=account.user_id)
+    )
+    transferences = [
+        Transference(
+            origin,
+            destination,
+            "Savings",
+            Decimal("10.00"),
+            datetime(2023, 4, day, tzinfo=UTC),
+        )
+        for day in range(1, 21)
+        for origin, destination in [(account, savings), (savings, account)]
+    ]
+    transferences.append(
+        Transference(
+            account,
+            savings,
+            "Savings",
+            Decimal("5.00"),
+            datetime(2023, 4, 25, tzinfo=UTC),
+        )
+    )
+    use_cases = TransferenceUseCases(repo)
+    # the statements of any create_many without tags, with a single lock
+    # for both accounts
+    with django_assert_num_queries(10):
+        legs = use_cases.transfer_many(transferences)
+    assert len(legs) == 41
+    assert _balance(account) == Decimal("-5.00")
+    assert _balance(savings) == Decimal("5.00")
+    _assert_consistent(account)
+    _assert_consistent(savings)
+
+
+@pytest.mark.django_db
+def test_transfer_many_locks_every_account_before_the_first_batch(repo, account):
+    accounts = [account] + [
+        to_account_entity(
+            Accounts.objects.create(name=name, user_id=account.user_id)
+        )
+        for name in ["Savings", "Wallet", "Travel"]
+    ]
+    transferences = [
+        Transference(
+            accounts[index % 4],
+            accounts[(index + 1) % 4],
+            "Savings",
+            Decimal("10.00"),
+            datetime(2023, 4, 1 + index, tzinfo=UTC),
+        )
+        for index in range(8)
+    ]
+    repo.batch_size = 2
+    with CaptureQueriesContext(connection) as context:
+        TransferenceUseCases(repo).transfer_many(transferences)
+    account_reads = [
+        index
+        for index, query in enumerate(context.captured_queries)
+        if query["sql"].startswith('SELECT "accounts_accounts"')
+    ]
+    # a single read of every account, before any record is written
+    assert len(account_reads) == 1
+    assert not any(
+        query["sql"].startswith('INSERT INTO "records_records"')
+        for query in context.captured_queries[: account_reads[0]]
+    )
+    for each in accounts:
+        assert _balance(each) == Decimal("0.00")
+        _assert_consistent(each)
+
+
+@pytest.mark.django_db
+def test_records_repository_update_checks_version(repo, account, expense):
+    created_record = repo.create(expense)
+    assert created_record.version == 1
+    updated_record = repo.update(replace(created_record, value=Decimal("5")))
+    assert updated_record.version == 2
+    with pytest.raises(RecordVersionConflictException):
+        repo.update(replace(created_record, value=Decimal("7.00")))
+    assert repo.get(created_record.id) == updated_record
+    assert _balance(account) == Decimal("-5.00")
+    _assert_consistent(account)
+
+
+@pytest.mark.django_db
+def test_records_repository_update_many_is_a_single_update(repo, account, tags):
+    created_records = repo.create_many(_expenses(account, tags, 3))
+    with CaptureQueriesContext(connection) as context:
+        updated_records = repo.update_many(
+            [replace(record, description="Power") for record in created_records]
+        ).records
+    assert [record.version for record in updated_records] == [2, 2, 2]
+    record_updates = [
+        query
+        for query in context.captured_queries
+        if query["sql"].startswith('UPDATE "records_records"')
+    ]
+    assert len(record_updates) == 1
+
+
+@pytest.mark.django_db
+def test_records_repository_update_conflicts_with_concurrent_update(
+    repo, account, expense, monkeypatch
+):
+    created_record = repo.create(expense)
+    get_tags = repo._get_tags
+
+    def get_tags_after_another_update(*args):
+        # another writer updates the record after it was read
+        Records.objects.filter(id=created_record.id).update(version=5)
+        return get_tags(*args)
+
+    monkeypatch.setattr(repo, "_get_tags", get_tags_after_another_update)
+    with pytest.raises(RecordVersionConflictException):
+        repo.update(replace(created_record, value=Decimal("1.00"), version=None))
+    assert _balance(account) == -expense.value
+
+
+def test_ledger_deltas_in_cents_are_identical_to_decimal_sums():
+    first_day = datetime(2023, 1, 1, tzinfo=UTC)
+    values = [
+        Decimal(random.randint(-(10**8), 10**8)).scaleb(-2)
+        for _ in range(500)
+    ]
+    entries = [
+        LedgerEntry(
+            i % 3,
+            1,
+            first_day + timedelta(days=i % 90),
+            RecordType.INCOME.value if value > 0 else RecordType.EXPENSE.value,
+            to_cents(value),
+        )
+        for i, value in enumerate(values)
+    ]
+    expected = defaultdict(Decimal)
+    for entry, value in zip(entries[:100], values[:100], strict=True):
+        expected[entry.account_id] -= value
+    for entry, value in zip(entries, values, strict=True):
+        expected[entry.account_id] += value
+    assert {
+        id: str(from_cents(delta))
+        for id, delta in balance_deltas(entries[:100], entries).items()
+    } == {id: str(delta) for id, delta in expected.items() if delta}
+
+
+@pytest.mark.django_db
+def test_records_repository_get_batch(
+    repo, account, tags, django_assert_num_queries
+):
+    other_account = to_account_entity(
+        Accounts.objects.create(name="Savings", user_id=account.user_id)
+    )
+    repo.create_many(
+        _expenses(account, tags, 3)
+        + _expenses(other_account, None, 2)
+        + _expenses(account, tags[1:], 2)
+    )
+    # the accounts, the tags, the records and their tags
+    with django_assert_num_queries(4):
+        batch = repo.get_batch(account.user_id)
+    assert list(batch) == repo.get_page(account.user_id)
+    assert list(repo.get_batch(account.user_id, account_id=account.id)) == (
+        repo.get_page(account.user_id, account_id=account.id)
+    )
+    assert len(batch.filter(tag="Bills")) == 3
+
+
+@pytest.mark.django_db
+def test_records_repository_resolves_tags_from_registries(
+    account, tags, django_assert_num_queries
+):
+    repo = RecordsRepository(TagRegistries(load_tags))
+    created_records = repo.create_many(_expenses(account, tags, 3))
+    assert created_records[0].tags == tags
+    # the registry is loaded already, so only the records and their tag ids
+    with django_assert_num_queries(2):
+        page = repo.get_page(account.user_id)
+    assert page == RecordsRepository().get_page(account.user_id)
+    assert page[0].tags is not None and page[1].tags is not None
+    assert page[0].tags[0] is page[1].tags[0]
+    # the accounts, the records and their tag ids
+    with django_assert_num_queries(3):
+        batch = repo.get_batch(account.user_id)
+    assert batch[2].tags is not None and batch[2].tags[1] is page[0].tags[1]
+
+
+def _rollups():
+    return sorted(
+        SpendingRollups.objects.values_list(
+            "account_id", "tag_id", "month", "type", "total", "count"
+        ),
+        key=str,
+    )
+
+
+@pytest.mark.django_db
+def test_tag_records(repo, account, tags):
+    other_account = to_account_entity(
+        Accounts.objects.create(name="Other", user_id=account.user_id)
+    )
+    created_records = repo.create_many(
+        _expenses(account, tags[:1], 3)
+        + _expenses(account, None, 2)
+        + _expenses(other_account, tags, 1)
+    )
+    for record in created_records[3:5]:
+        repo.update(replace(record, description=f"Uber {record.description}"))
+    balances = {
+        id: balance
+        for id, balance in Accounts.objects.values_list("id", "balance")
+    }
+    use_cases = RecordUseCases(repo)
+    use_cases.tagging_batch_size = 2
+
+    result = use_cases.tag_records(
+        RecordSelection(account.user_id, account_id=account.id),
+        add=["House"],
+        remove=["Bills"],
+    )
+    assert (result.records_matched, result.records_changed) == (5, 5)
+    assert (result.tags_added, result.tags_removed) == (5, 3)
+    assert all(
+        record.tags == tags[1:]
+        for record in repo.get_page(account.user_id, account_id=account.id)
+    )
+    assert repo.get(str(created_records[0].id)).version == 2
+    # the other account was left out, along with its balance
+    assert repo.get(str(created_records[5].id)).tags == tags
+    assert balances == {
+        id: balance
+        for id, balance in Accounts.objects.values_list("id", "balance")
+    }
+    rollups = _rollups()
+    ReportsRepository().rebuild(account.user_id)
+    assert rollups == _rollups()
+
+    result = use_cases.tag_records(
+        RecordSelection(account.user_id, description="uber"), add=["Bills"]
+    )
+    assert (result.records_matched, result.records_changed) == (2, 2)
+    # tagged already, so left as they were
+    result = use_cases.tag_records(
+        RecordSelection(account.user_id, ids=[str(created_records[5].id)]),
+        add=["Bills"],
+    )
+    assert (result.records_matched, result.records_changed) == (1, 0)
+    with pytest.raises(MissingTagException):
+        use_cases.tag_records(RecordSelection(account.user_id), add=["Car"])
+
+
+@pytest.mark.django_db
+def test_records_repository_retag_statements_do_not_grow_with_records(
+    repo, account, tags
+):
+    # records keeping both tags, so the rollups written to exist before
+    # and after each retagging
+    repo.create_many(_expenses(account, tags, 1))
+    few = [
+        str(record.id)
+        for record in repo.create_many(_expenses(account, tags[:1], 2))
+    ]
+    many = [
+        str(record.id)
+        for record in repo.create_many(_expenses(account, tags[:1], 50))
+    ]
+    with CaptureQueriesContext(connection) as few_queries:
+        assert repo.retag(account.user_id, few, ["House"], ["Bills"]).added == 2
+    with CaptureQueriesContext(connection) as many_queries:
+        retagging = repo.retag(account.user_id, many, ["House"], ["Bills"])
+    assert (retagging.added, retagging.removed) == (50, 50)
+    assert len(many_queries) == len(few_queries)
+
+
+@pytest.mark.django_db
+def test_records_repository_search(repo, account, tags):
+    other_account = to_account_entity(
+        Accounts.objects.create(name="Other", user_id=account.user_id)
+    )
+    other_user_account = to_account_entity(
+        Accounts.objects.create(
+            name="Main",
+            user=CustomUser.objects.create_user(
+                email="janedoe@me.com", password="password"
+            ),
+        )
+    )
+    first_day = datetime(2023, 4, 1, tzinfo=UTC)
+    created_records = {
+        record.description: record
+        for record in repo.create_many(
+            [
+                Expense(
+                    None,
+                    description,
+                    Decimal("10.00"),
+                    first_day + timedelta(days=day),
+                    account=record_account,
+                    tags=record_tags,
+                )
+                for description, day, record_account, record_tags in [
+                    ("Pharmacy", 0, account, None),
+                    ("PHARMACY pharmacy refill", 1, account, tags[:1]),
+                    ("Farmácia Central", 2, other_account, tags[:1]),
+                    ("Pharmacy online", 3, other_user_account, None),
+                    ("Coffee", 4, account, None),
+                ]
+            ]
+        )
+    }
+
+    def search(text, **filters):
+        return [
+            record.description
+            for record in repo.search(account.user_id, text, **filters)
+        ]
+
+    # ranked by relevance, which favors the shorter descriptions
+    assert search("pharm") == ["Pharmacy", "PHARMACY pharmacy refill"]
+    assert search("pharmacy refill") == ["PHARMACY pharmacy refill"]
+    assert search("FARMACIA") == ["Farmácia Central"]
+    assert search("pharmacy", since=first_day + timedelta(days=1)) == [
+        "PHARMACY pharmacy refill"
+    ]
+    assert search("pharmacy", until=first_day) == ["Pharmacy"]
+    assert search("farm", account_id=account.id) == []
+    assert search("pharmacy", tag="Bills") == ["PHARMACY pharmacy refill"]
+    assert search("pharmacy", limit=1) == ["Pharmacy"]
+    # anything but words is left out of the query
+    assert search('"phar*) (') == ["Pharmacy", "PHARMACY pharmacy refill"]
+    assert search(" *) ") == []
+
+    # the index follows the writes to the records
+    repo.update(replace(created_records["Coffee"], description="Pharmacy tea"))
+    repo.delete(str(created_records["Pharmacy"].id))
+    assert sorted(search("pharmacy")) == [
+        "PHARMACY pharmacy refill",
+        "Pharmacy tea",
+    ]
+    assert search("coffee") == []
+
+
+@pytest.mark.django_db
+def test_records_are_searched_by_full_text_index(account):
+    if connection.vendor != "sqlite":
+        pytest.skip("the plan is read from SQLite's EXPLAIN QUERY PLAN")
+    plan = (
+        Records.objects.filter(
+            user_id=account.user_id, search__description__match='"pharmacy"*'
+        )
+        .order_by("search__rank")
+        .explain()
+    )
+    assert "VIRTUAL TABLE INDEX" in plan
+    assert "SCAN records_records" not in plan
+
+
+@pytest.mark.django_db
+def test_records_are_searched_by_gin_index(account):
+    if connection.vendor != "postgresql":
+        pytest.skip("the plan is read from PostgreSQL's EXPLAIN")
+    with connection.cursor() as cursor:
+        # the table is far too small for the planner to pick an index
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    plan = (
+        Records.objects.annotate(
+            vector=SearchVector("description", config="simple")
+        )
+        .filter(
+            vector=SearchQuery("pharmacy:*", config="simple", search_type="raw")
+        )
+        .explain()
+    )
+    assert "records_description_search" in plan
+    assert "Seq Scan on records_records" not in plan
+
+
+def test_with_tags_merges_both_cursors():
+    records = [(1, "Water"), (3, "Power"), (4, "Rent")]
+    # the links of records left out of `records` are skipped
+    record_tags = [(1, "Bills"), (1, "House"), (2, "Car"), (4, "House")]
+    assert list(with_tags(records, record_tags)) == [
+        ((1, "Water"), ["Bills", "House"]),
+        ((3, "Power"), []),
+        ((4, "Rent"), ["House"]),
+    ]
+    assert list(with_tags(records, [])) == [(record, []) for record in records]
+    assert list(
+        with_tags([("b", 1, "x"), ("b", 2, "y")], [("b", 2, "z")], key_size=2)
+    ) == [(("b", 1, "x"), []), (("b", 2, "y"), ["z"])]
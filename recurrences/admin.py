@@ -0,0 +1,5 @@
+from django.contrib import admin
+
+from recurrences.models import RecurrenceRules
+
+admin.site.register(RecurrenceRules)
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from changes.models import ChangeLogRepository
+from records.analytics import CUBES
+from recurrences.models import RecurrencesRepository
+from use_cases.recurrences.recurrences import RecurrenceUseCases
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the records of the recurrence rules due until the given "
+        "date, meant to be run periodically"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--until",
+            type=datetime.fromisoformat,
+            help="ISO date up to which occurrences are due, defaults to now",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=RecurrenceUseCases.batch_size,
+            help="How many rules are read at a time",
+        )
+
+    def handle(self, *args, **options):
+        until = options["until"] or timezone.now()
+        if timezone.is_naive(until):
+            until = timezone.make_aware(until)
+        use_cases = RecurrenceUseCases(
+            RecurrencesRepository(), ChangeLogRepository(), CUBES
+        )
+        use_cases.batch_size = options["batch_size"]
+        created = use_cases.materialize(until)
+        self.stdout.write(self.style.SUCCESS(f"{created} records created"))
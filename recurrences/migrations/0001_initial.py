@@ -0,0 +1,85 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("tags", "0002_rename_tag_tags"),
+        ("accounts", "0003_balance_checkpoints"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecurrenceRules",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("description", models.CharField(max_length=255)),
+                ("value", models.DecimalField(decimal_places=2, max_digits=12)),
+                (
+                    "type",
+                    models.PositiveSmallIntegerField(
+                        choices=[(0, "EXPENSE"), (1, "INCOME")]
+                    ),
+                ),
+                (
+                    "frequency",
+                    models.PositiveSmallIntegerField(
+                        choices=[(0, "DAILY"), (1, "WEEKLY"), (2, "MONTHLY")]
+                    ),
+                ),
+                ("interval", models.PositiveIntegerField(default=1)),
+                ("starts", models.DateTimeField()),
+                ("ends", models.DateTimeField(blank=True, null=True)),
+                (
+                    "materialized_until",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recurrence_rules",
+                        to="accounts.accounts",
+                    ),
+                ),
+                (
+                    "tags",
+                    models.ManyToManyField(
+                        blank=True,
+                        related_name="recurrence_rules",
+                        to="tags.tags",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recurrence_rules",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["materialized_until"],
+                        name="recurrences_materialized",
+                    )
+                ],
+            },
+        ),
+    ]
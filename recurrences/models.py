@@ -0,0 +1,170 @@
+from datetime import datetime
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models, transaction
+from django.db.models import F, Q
+
+from accounts.models import Accounts, to_account_entity
+from entities.entities import (
+    Frequency,
+    Record,
+    RecordType,
+    RecurrenceRule,
+    Tag,
+)
+from records.models import RecordsRepository
+from tags.models import Tags
+from use_cases.accounts.exceptions import MissingAccountException
+from use_cases.recurrences.exceptions import RecurrenceRuleNotFoundException
+from use_cases.tags.exceptions import MissingTagException
+from users.models import CustomUser
+
+
+class RecurrenceRules(models.Model):
+    description = models.CharField(max_length=255)
+    value = models.DecimalField(max_digits=12, decimal_places=2)
+    type = models.PositiveSmallIntegerField(
+        choices=[(t.value, t.name) for t in RecordType]
+    )
+    frequency = models.PositiveSmallIntegerField(
+        choices=[(f.value, f.name) for f in Frequency]
+    )
+    interval = models.PositiveIntegerField(default=1)
+    starts = models.DateTimeField()
+    ends = models.DateTimeField(null=True, blank=True)
+    # occurrences up to it already exist as records
+    materialized_until = models.DateTimeField(null=True, blank=True)
+    account = models.ForeignKey(
+        Accounts, related_name="recurrence_rules", on_delete=models.CASCADE
+    )
+    user = models.ForeignKey(
+        CustomUser, related_name="recurrence_rules", on_delete=models.CASCADE
+    )
+    tags = models.ManyToManyField(
+        Tags, related_name="recurrence_rules", blank=True
+    )
+
+    def __str__(self):
+        return self.description
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["materialized_until"],
+                name="recurrences_materialized",
+            ),
+        ]
+
+
+def to_recurrence_rule_entity(rule: RecurrenceRules) -> RecurrenceRule:
+    tags = [Tag(tag.name, tag.color) for tag in rule.tags.all()]
+    return RecurrenceRule(
+        str(rule.id),
+        rule.description,
+        rule.value,
+        to_account_entity(rule.account),
+        RecordType(rule.type),
+        Frequency(rule.frequency),
+        rule.starts,
+        interval=rule.interval,
+        ends=rule.ends,
+        tags=tags or None,
+        materialized_until=rule.materialized_until,
+    )
+
+
+class RecurrencesRepository:
+    def _rules(self):
+        return RecurrenceRules.objects.select_related(
+            "account"
+        ).prefetch_related("tags")
+
+    def create(self, rule: RecurrenceRule) -> RecurrenceRule:
+        if rule.account.id is None:
+            raise MissingAccountException()
+        try:
+            account = Accounts.objects.get(id=rule.account.id)
+        except (ObjectDoesNotExist, ValueError, TypeError) as e:
+            raise MissingAccountException() from e
+        names = {tag.name for tag in rule.tags or []}
+        tags = list(Tags.objects.filter(user_id=account.user_id, name__in=names))
+        if len(tags) != len(names):
+            raise MissingTagException()
+
+        with transaction.atomic():
+            row = RecurrenceRules.objects.create(
+                description=rule.description,
+                value=rule.value,
+                type=rule.type.value,
+                frequency=rule.frequency.value,
+                interval=rule.interval,
+                starts=rule.starts,
+                ends=rule.ends,
+                account=account,
+                user_id=account.user_id,
+            )
+            row.tags.set(tags)
+        return self.get(str(row.id))
+
+    def get(self, id: str) -> RecurrenceRule:
+        try:
+            return to_recurrence_rule_entity(self._rules().get(id=id))
+        except ObjectDoesNotExist as e:
+            raise RecurrenceRuleNotFoundException() from e
+
+    def delete(self, id: str) -> None:
+        deleted, _ = RecurrenceRules.objects.filter(id=id).delete()
+        if not deleted:
+            raise RecurrenceRuleNotFoundException()
+
+    def get_active(
+        self, user_id: str, since: datetime, until: datetime
+    ) -> list[RecurrenceRule]:
+        rules = (
+            self._rules()
+            .filter(user_id=user_id, starts__lte=until)
+            .filter(Q(ends__isnull=True) | Q(ends__gte=since))
+            .filter(
+                Q(materialized_until__isnull=True)
+                | Q(materialized_until__lt=until)
+            )
+        )
+        return [to_recurrence_rule_entity(rule) for rule in rules]
+
+    def get_due(
+        self, until: datetime, after_id: str | None = None, limit: int = 100
+    ) -> list[RecurrenceRule]:
+        rules = self._rules().filter(starts__lte=until)
+        rules = rules.filter(
+            Q(materialized_until__isnull=True)
+            | Q(materialized_until__lt=until)
+            & (Q(ends__isnull=True) | Q(ends__gt=F("materialized_until")))
+        )
+        if after_id is not None:
+            rules = rules.filter(id__gt=after_id)
+        return [
+            to_recurrence_rule_entity(rule)
+            for rule in rules.order_by("id")[:limit]
+        ]
+
+    @transaction.atomic
+    def save_occurrences(
+        self,
+        rule: RecurrenceRule,
+        records: list[Record],
+        materialized_until: datetime,
+    ) -> list[Record]:
+        """
+        It creates the records and moves the rule's `materialized_until`
+        forward in the same transaction. If another run moved it since the
+        rule was read, nothing is created, so no occurrence is ever created
+        twice.
+        """
+        if rule.id is None:
+            raise RecurrenceRuleNotFoundException()
+        moved = RecurrenceRules.objects.filter(
+            id=rule.id, materialized_until=rule.materialized_until
+        ).update(materialized_until=materialized_until)
+        if not moved:
+            return []
+        return RecordsRepository().create_many(records)
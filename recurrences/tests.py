@@ -0,0 +1,153 @@
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from accounts.models import Accounts, to_account_entity
+from changes.models import ChangeLogRepository
+from entities.entities import Frequency, RecordType, RecurrenceRule, Tag
+from records.models import Records
+from recurrences.models import RecurrenceRules, RecurrencesRepository
+from tags.models import Tags
+from use_cases.recurrences.exceptions import RecurrenceRuleNotFoundException
+from use_cases.recurrences.recurrences import RecurrenceUseCases
+from use_cases.tags.exceptions import MissingTagException
+from users.models import CustomUser
+
+
+@pytest.fixture
+def custom_user():
+    return CustomUser.objects.create_user(
+        email="johndoe@me.com", password="password"
+    )
+
+
+@pytest.fixture
+def account(custom_user):
+    return to_account_entity(
+        Accounts.objects.create(name="Main", user=custom_user)
+    )
+
+
+@pytest.fixture
+def repo():
+    return RecurrencesRepository()
+
+
+@pytest.fixture
+def rent(account, custom_user):
+    Tags.objects.create(name="House", user=custom_user)
+    return RecurrenceRule(
+        None,
+        "Rent",
+        Decimal("500.00"),
+        account,
+        RecordType.EXPENSE,
+        Frequency.MONTHLY,
+        datetime(2023, 1, 5, tzinfo=UTC),
+        tags=[Tag("House")],
+    )
+
+
+@pytest.mark.django_db
+def test_recurrences_repository_create(repo, rent):
+    created_rule = repo.create(rent)
+    assert created_rule.id is not None
+    assert [tag.name for tag in created_rule.tags] == ["House"]
+    assert created_rule.frequency is Frequency.MONTHLY
+    assert repo.get(created_rule.id) == created_rule
+
+
+@pytest.mark.django_db
+def test_recurrences_repository_create_with_missing_tag(repo, rent, account):
+    with pytest.raises(MissingTagException):
+        repo.create(
+            RecurrenceRule(
+                None,
+                "Gym",
+                Decimal("50.00"),
+                account,
+                RecordType.EXPENSE,
+                Frequency.MONTHLY,
+                datetime(2023, 1, 5, tzinfo=UTC),
+                tags=[Tag("Health")],
+            )
+        )
+
+
+@pytest.mark.django_db
+def test_recurrences_repository_delete(repo, rent):
+    created_rule = repo.create(rent)
+    repo.delete(created_rule.id)
+    with pytest.raises(RecurrenceRuleNotFoundException):
+        repo.get(created_rule.id)
+    with pytest.raises(RecurrenceRuleNotFoundException):
+        repo.delete(created_rule.id)
+
+
+@pytest.mark.django_db
+def test_materialize_creates_due_records_once(repo, rent, account):
+    created_rule = repo.create(rent)
+    use_cases = RecurrenceUseCases(repo)
+    assert use_cases.materialize(datetime(2023, 3, 10, tzinfo=UTC)) == 3
+    assert use_cases.materialize(datetime(2023, 3, 10, tzinfo=UTC)) == 0
+    assert use_cases.materialize(datetime(2023, 4, 10, tzinfo=UTC)) == 1
+    assert list(Records.objects.values_list("date__month", flat=True)) == [
+        1,
+        2,
+        3,
+        4,
+    ]
+    assert all(
+        [tag.name for tag in record.tags.all()] == ["House"]
+        for record in Records.objects.all()
+    )
+    assert Accounts.objects.get(id=account.id).balance == Decimal("-2000.00")
+    assert repo.get(created_rule.id).materialized_until == datetime(
+        2023, 4, 10, tzinfo=UTC
+    )
+
+
+@pytest.mark.django_db
+def test_save_occurrences_skips_rules_materialized_meanwhile(repo, rent):
+    created_rule = repo.create(rent)
+    records = list(
+        RecurrenceUseCases(repo).get_occurrences(
+            rent.account.user_id,
+            datetime(2023, 1, 1, tzinfo=UTC),
+            datetime(2023, 2, 1, tzinfo=UTC),
+        )
+    )
+    until = datetime(2023, 2, 1, tzinfo=UTC)
+    assert len(repo.save_occurrences(created_rule, records, until)) == 1
+    assert repo.save_occurrences(created_rule, records, until) == []
+    assert Records.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_get_occurrences_leaves_out_materialized_ones(repo, rent):
+    repo.create(rent)
+    RecurrenceUseCases(repo).materialize(datetime(2023, 2, 10, tzinfo=UTC))
+    occurrences = RecurrenceUseCases(repo).get_occurrences(
+        rent.account.user_id,
+        datetime(2023, 1, 1, tzinfo=UTC),
+        datetime(2023, 4, 30, tzinfo=UTC),
+    )
+    assert [record.date.month for record in occurrences] == [3, 4]
+
+
+@pytest.mark.django_db
+def test_materialize_recurrences_command(repo, rent):
+    repo.create(rent)
+    call_command("materialize_recurrences", "--until", "2023-06-01T00:00Z")
+    assert Records.objects.count() == 5
+    assert RecurrenceRules.objects.get().materialized_until == datetime(
+        2023, 6, 1, tzinfo=UTC
+    )
+    # the records created are in the feed of their owner
+    changes = ChangeLogRepository().get_after(rent.account.user_id, 0)
+    assert [change.kind.name for change in changes] == [
+        *["RECORD"] * 5,
+        "ACCOUNT",
+    ]
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from reports.models import ReportsRepository
+from use_cases.reports.reports import ReportUseCases
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the spending rollups of reports from the records"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", help="Only rebuild the rollups of this user id"
+        )
+
+    def handle(self, *args, **options):
+        ReportUseCases(ReportsRepository()).rebuild_rollups(options["user"])
+        self.stdout.write(self.style.SUCCESS("Rollups rebuilt"))
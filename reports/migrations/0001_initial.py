@@ -0,0 +1,90 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("accounts", "0003_balance_checkpoints"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tags", "0002_rename_tag_tags"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SpendingRollups",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField()),
+                (
+                    "type",
+                    models.PositiveSmallIntegerField(
+                        choices=[(0, "EXPENSE"), (1, "INCOME")]
+                    ),
+                ),
+                ("total", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("count", models.IntegerField()),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to="accounts.accounts",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to="tags.tags",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "type", "month"],
+                        name="rollups_user_type_month",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="spendingrollups",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tag__isnull", False)),
+                fields=("user", "account", "tag", "month", "type"),
+                name="unique_tag_rollup",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="spendingrollups",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tag__isnull", True)),
+                fields=("user", "account", "month", "type"),
+                name="unique_total_rollup",
+            ),
+        ),
+    ]
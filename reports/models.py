@@ -0,0 +1,135 @@
+from datetime import UTC, date
+
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from accounts.models import Accounts, cents
+from entities.entities import RecordType, Tag
+from entities.money import from_cents
+from tags.models import Tags, tag_totals
+from use_cases.reports.reports import MonthlyTotal
+from users.models import CustomUser
+
+
+class SpendingRollups(models.Model):
+    """
+    The total and the number of records of one type, of an account, in a
+    month. Rows without a tag total every record, tagged or not, while the
+    others total the records carrying their tag. They are kept up to date by
+    every record write, see records.ledger.
+    """
+
+    user = models.ForeignKey(
+        CustomUser, related_name="rollups", on_delete=models.CASCADE
+    )
+    account = models.ForeignKey(
+        Accounts, related_name="rollups", on_delete=models.CASCADE
+    )
+    tag = models.ForeignKey(
+        Tags, related_name="rollups", null=True, on_delete=models.CASCADE
+    )
+    month = models.DateField()
+    type = models.PositiveSmallIntegerField(
+        choices=[(t.value, t.name) for t in RecordType]
+    )
+    total = models.DecimalField(max_digits=14, decimal_places=2)
+    count = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "account", "tag", "month", "type"],
+                condition=Q(tag__isnull=False),
+                name="unique_tag_rollup",
+            ),
+            models.UniqueConstraint(
+                fields=["user", "account", "month", "type"],
+                condition=Q(tag__isnull=True),
+                name="unique_total_rollup",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "type", "month"],
+                name="rollups_user_type_month",
+            ),
+        ]
+
+
+class ReportsRepository:
+    def get_monthly_totals(
+        self,
+        user_id: str,
+        since: date,
+        until: date,
+        type: RecordType,
+        account_id: str | None = None,
+    ) -> list[MonthlyTotal]:
+        rollups = SpendingRollups.objects.filter(
+            user_id=int(user_id),
+            type=type.value,
+            month__gte=since,
+            month__lte=until,
+        )
+        if account_id is not None:
+            rollups = rollups.filter(account_id=account_id)
+        totals = (
+            rollups.values("month", "tag_id", "tag__name", "tag__color")
+            .annotate(month_total=Sum(cents("total")), month_count=Sum("count"))
+            .order_by("month", F("tag__name").asc(nulls_first=True))
+        )
+        return [
+            MonthlyTotal(
+                month=total["month"],
+                type=type,
+                tag=(
+                    Tag(total["tag__name"], total["tag__color"])
+                    if total["tag_id"] is not None
+                    else None
+                ),
+                total=from_cents(total["month_total"]),
+                count=total["month_count"],
+            )
+            for total in totals
+        ]
+
+    @transaction.atomic
+    def rebuild(self, user_id: str | None = None) -> None:
+        rollups = SpendingRollups.objects.all()
+        accounts = Accounts.objects.all()
+        tags = Tags.objects.all()
+        if user_id is not None:
+            rollups = rollups.filter(user_id=user_id)
+            accounts = accounts.filter(user_id=user_id)
+            tags = tags.filter(user_id=user_id)
+        rollups.delete()
+
+        month = TruncMonth("records__date", tzinfo=UTC)
+        totals = (
+            accounts.filter(records__isnull=False)
+            .values(
+                "user_id",
+                account_id=F("id"),
+                month=month,
+                type=F("records__type"),
+            )
+            .annotate(total=Sum(cents("records__value")), count=Count("records"))
+            .order_by()
+        )
+        SpendingRollups.objects.bulk_create(
+            [
+                SpendingRollups(
+                    user_id=total["user_id"],
+                    account_id=total["account_id"],
+                    tag_id=total.get("tag_id"),
+                    month=total["month"].date(),
+                    type=total["type"],
+                    total=from_cents(total["total"]),
+                    count=total["count"],
+                )
+                for totals_query in (totals, tag_totals(tags))
+                for total in totals_query.iterator()
+            ],
+            batch_size=500,
+        )
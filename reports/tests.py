@@ -0,0 +1,182 @@
+from datetime import UTC, date, datetime
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from accounts.models import Accounts, to_account_entity
+from entities.entities import Expense, Income, RecordType, Tag
+from records.models import RecordsRepository
+from reports.models import ReportsRepository, SpendingRollups
+from tags.models import Tags
+from users.models import CustomUser
+
+
+@pytest.fixture
+def custom_user():
+    return CustomUser.objects.create_user(
+        email="johndoe@me.com", password="password"
+    )
+
+
+@pytest.fixture
+def account(custom_user):
+    return to_account_entity(
+        Accounts.objects.create(name="Main", user=custom_user)
+    )
+
+
+@pytest.fixture
+def repo():
+    return ReportsRepository()
+
+
+@pytest.fixture
+def records(custom_user, account):
+    Tags.objects.create(name="Bills", user=custom_user)
+    Tags.objects.create(name="House", user=custom_user)
+    records_repo = RecordsRepository()
+    created_records = records_repo.create_many(
+        [
+            Expense(
+                None,
+                description,
+                Decimal(value),
+                datetime(2023, month, 10, tzinfo=UTC),
+                account=account,
+                tags=[Tag(name) for name in tags],
+            )
+            for description, value, month, tags in [
+                ("Water", "10.00", 3, ["Bills", "House"]),
+                ("Power", "20.00", 3, ["Bills"]),
+                ("Coffee", "2.50", 3, []),
+                ("Rent", "500.00", 4, ["House"]),
+            ]
+        ]
+    )
+    records_repo.create(
+        Income(
+            None,
+            "Salary",
+            Decimal("1000.00"),
+            datetime(2023, 3, 1, tzinfo=UTC),
+            account=account,
+        )
+    )
+    return created_records
+
+
+def _totals(repo, account):
+    return [
+        (
+            total.month.month,
+            total.tag and total.tag.name,
+            total.total,
+            total.count,
+        )
+        for total in repo.get_monthly_totals(
+            account.user_id,
+            since=date(2023, 1, 1),
+            until=date(2023, 12, 1),
+            type=RecordType.EXPENSE,
+        )
+    ]
+
+
+def _rollups():
+    return set(
+        SpendingRollups.objects.values_list(
+            "user_id", "account_id", "tag_id", "month", "type", "total", "count"
+        )
+    )
+
+
+@pytest.mark.django_db
+def test_reports_repository_get_monthly_totals(repo, account, records):
+    assert _totals(repo, account) == [
+        (3, None, Decimal("32.50"), 3),
+        (3, "Bills", Decimal("30.00"), 2),
+        (3, "House", Decimal("10.00"), 1),
+        (4, None, Decimal("500.00"), 1),
+        (4, "House", Decimal("500.00"), 1),
+    ]
+
+
+@pytest.mark.django_db
+def test_rollups_follow_record_writes(repo, account, records):
+    records_repo = RecordsRepository()
+    records_repo.update(
+        Expense(
+            records[0].id,
+            "Water",
+            Decimal("15.00"),
+            datetime(2023, 4, 1, tzinfo=UTC),
+            account=account,
+            tags=[Tag("House")],
+        )
+    )
+    records_repo.delete(records[1].id)
+    assert _totals(repo, account) == [
+        (3, None, Decimal("2.50"), 1),
+        (4, None, Decimal("515.00"), 2),
+        (4, "House", Decimal("515.00"), 2),
+    ]
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_incremental_rollups(repo, account, records):
+    incremental_rollups = _rollups()
+    repo.rebuild(account.user_id)
+    assert _rollups() == incremental_rollups
+    SpendingRollups.objects.all().delete()
+    call_command("rebuild_rollups")
+    assert _rollups() == incremental_rollups
+
+
+@pytest.mark.django_db
+def test_reports_repository_get_monthly_totals_by_account(
+    repo, custom_user, account, records
+):
+    other_account = Accounts.objects.create(name="Savings", user=custom_user)
+    totals = repo.get_monthly_totals(
+        account.user_id,
+        since=date(2023, 1, 1),
+        until=date(2023, 12, 1),
+        type=RecordType.INCOME,
+        account_id=str(other_account.id),
+    )
+    assert totals == []
+
+
+@pytest.mark.django_db
+def test_reports_repository_get_monthly_totals_is_exact(
+    repo, custom_user, account
+):
+    accounts = [
+        account,
+        to_account_entity(
+            Accounts.objects.create(name="Savings", user=custom_user)
+        ),
+    ]
+    # none of these is exact in binary floating point, and the rollups of
+    # both accounts are summed together
+    RecordsRepository().create_many(
+        [
+            Expense(
+                None,
+                "Coffee",
+                Decimal(value),
+                datetime(2023, 3, 1 + index, tzinfo=UTC),
+                account=accounts[index % 2],
+            )
+            for index, value in enumerate(
+                ["0.10", "0.20", "19.99", "0.07", "299.81", "1.03"] * 3
+            )
+        ]
+    )
+    (total,) = _totals(repo, account)
+    assert total == (3, None, Decimal("963.60"), 18)
+    assert str(total[2]) == "963.60"
+    incremental_rollups = _rollups()
+    repo.rebuild(account.user_id)
+    assert _rollups() == incremental_rollups
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
-from tags.models import Tags
+from tags.models import TaggingRules, Tags
 
 admin.site.register(Tags)
+admin.site.register(TaggingRules)
@@ -0,0 +1,80 @@
+from datetime import UTC, datetime
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import Accounts
+from records.models import Records
+from tags.models import TAG_INDEXES, Tags
+from users.models import CustomUser
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def tag_indexes():
+    # ids are reused by rolled back tests, so no index may outlive its test
+    TAG_INDEXES.entries.clear()
+    yield TAG_INDEXES
+    TAG_INDEXES.entries.clear()
+
+
+@pytest.fixture
+def custom_user():
+    return CustomUser.objects.create_user(
+        email="johndoe@me.com", password="password"
+    )
+
+
+@pytest.fixture
+def tags(custom_user):
+    account = Accounts.objects.create(name="Main", user=custom_user)
+    uber, uber_eats, _, _ = Tags.objects.bulk_create(
+        [
+            Tags(name=name, user=custom_user)
+            for name in ["Uber", "Uber Eats", "Ubuntu", "Bills"]
+        ]
+    )
+    records = Records.objects.bulk_create(
+        [
+            Records(
+                description=f"Uber {i}",
+                value=10,
+                date=datetime(2023, 4, 1, tzinfo=UTC),
+                type=0,
+                account=account,
+                user=custom_user,
+            )
+            for i in range(3)
+        ]
+    )
+    for record in records:
+        record.tags.add(uber_eats)
+    records[0].tags.add(uber)
+
+
+@pytest.mark.django_db
+def test_tags_search(api_client, custom_user, tags, django_assert_num_queries):
+    url = f"/api/users/{custom_user.id}/tags/search/"
+    response = api_client.get(url, {"prefix": "ub", "limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == [
+        {"name": "Uber Eats", "color": "#D9DDDC"},
+        {"name": "Uber", "color": "#D9DDDC"},
+    ]
+    # answered from the index
+    with django_assert_num_queries(0):
+        response = api_client.get(url, {"prefix": "UBU"})
+    assert [tag["name"] for tag in response.data] == ["Ubuntu"]
+
+
+@pytest.mark.django_db
+def test_tags_search_invalid_limit(api_client, custom_user):
+    response = api_client.get(
+        f"/api/users/{custom_user.id}/tags/search/", {"limit": 0}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
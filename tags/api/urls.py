@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import TagsSearch
+
+urlpatterns = [
+    path("users/<int:user_id>/tags/search/", TagsSearch.as_view()),
+]
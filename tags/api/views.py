@@ -0,0 +1,66 @@
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from changes.models import ChangeLogRepository
+from records.analytics import CUBES
+from tags.models import (
+    RULE_MATCHERS,
+    TAG_INDEXES,
+    TAG_REGISTRIES,
+    TagsRepository,
+)
+from use_cases.tags.tags import TagsUseCases
+
+
+class TagOutputSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    color = serializers.CharField(allow_null=True)
+
+
+class TagsSearch(APIView):
+    """
+    The autocomplete of tag names. Searches are answered from the index of
+    the user's tags kept in the process, so they don't hit the database.
+    """
+
+    class FilterSerializer(serializers.Serializer):
+        prefix = serializers.CharField(
+            required=False, default="", allow_blank=True, max_length=150
+        )
+        limit = serializers.IntegerField(
+            required=False, default=10, min_value=1, max_value=50
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="user_id",
+                required=True,
+                location=OpenApiParameter.PATH,
+                description="The ID of the user",
+            ),
+            FilterSerializer,
+        ],
+        responses={"200": TagOutputSerializer(many=True)},
+        methods=["GET"],
+    )
+    def get(self, request, user_id):
+        filters = self.FilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        use_cases = TagsUseCases(
+            TagsRepository(str(user_id)),
+            ChangeLogRepository(),
+            user_id=str(user_id),
+            tag_registries=TAG_REGISTRIES,
+            rule_matchers=RULE_MATCHERS,
+            tag_indexes=TAG_INDEXES,
+            cubes=CUBES,
+        )
+        tags = use_cases.search_tags(
+            filters.validated_data["prefix"], filters.validated_data["limit"]
+        )
+        return Response(
+            TagOutputSerializer(tags, many=True).data, status=status.HTTP_200_OK
+        )
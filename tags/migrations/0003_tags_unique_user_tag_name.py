@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:45
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def rename_duplicates(apps, schema_editor):
+    """
+    Tags sharing their name with an older tag of the same user are renamed
+    "<name> (2)", "<name> (3)" and so on, keeping their records
+    """
+    Tags = apps.get_model("tags", "Tags")
+    duplicated = (
+        Tags.objects.values("user_id", "name")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    for duplicate in duplicated:
+        user_id, name = duplicate["user_id"], duplicate["name"]
+        names = set(
+            Tags.objects.filter(user_id=user_id).values_list("name", flat=True)
+        )
+        tags = Tags.objects.filter(user_id=user_id, name=name).order_by("id")
+        suffix = 1
+        for tag in tags[1:]:
+            suffix += 1
+            while f"{name} ({suffix})" in names:
+                suffix += 1
+            tag.name = f"{name} ({suffix})"
+            names.add(tag.name)
+            tag.save(update_fields=["name"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tags", "0002_rename_tag_tags"),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="tags",
+            constraint=models.UniqueConstraint(
+                fields=("user", "name"), name="unique_user_tag_name"
+            ),
+        ),
+    ]
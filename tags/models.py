@@ -1,5 +1,20 @@
-from django.db import models
+from datetime import UTC
 
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from accounts.models import Accounts, cents
+from entities.entities import Tag, TaggingRule
+from entities.money import from_cents
+from use_cases.autotagging.autotagging import RuleMatchers
+from use_cases.autotagging.exceptions import (
+    ExistingTaggingRuleException,
+    TaggingRuleNotFoundException,
+)
+from use_cases.tags.exceptions import ExistingTagException, MissingTagException
+from use_cases.tags.tags import TagIndexes, TagRegistries
 from users.models import CustomUser
 
 
@@ -15,3 +30,275 @@ class Tags(models.Model):
 
     class Meta:
         ordering = ["name"]
+        constraints = [
+            # also the index tags are looked up by name through
+            models.UniqueConstraint(
+                fields=["user", "name"], name="unique_user_tag_name"
+            ),
+        ]
+
+
+class TaggingRules(models.Model):
+    pattern = models.CharField(max_length=255)
+    tag = models.ForeignKey(Tags, related_name="rules", on_delete=models.CASCADE)
+    user = models.ForeignKey(
+        CustomUser, related_name="tagging_rules", on_delete=models.CASCADE
+    )
+
+    def __str__(self):
+        return self.pattern
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tag", "pattern"], name="unique_tag_rule_pattern"
+            ),
+        ]
+
+
+def to_tag_entity(tag: Tags) -> Tag:
+    return Tag(tag.name, tag.color)
+
+
+def links(relation: str):
+    """
+    The rows linking tags to the ones of the many-to-many `relation`, such
+    as "records". The models declaring those relations import this module,
+    so their tables are reached from the side of the tags.
+    """
+    return getattr(Tags, relation).through.objects
+
+
+def tag_totals(tags):
+    """
+    The total, in cents, and the number of the records carrying each of the
+    tags, by account, month and type, as the tagged rows of the spending
+    rollups of reports are made of
+    """
+    return (
+        tags.filter(records__isnull=False)
+        .values(
+            "user_id",
+            tag_id=F("id"),
+            account_id=F("records__account_id"),
+            month=TruncMonth("records__date", tzinfo=UTC),
+            type=F("records__type"),
+        )
+        .annotate(total=Sum(cents("records__value")), count=Count("records"))
+        .order_by()
+    )
+
+
+class TagsRepository:
+    """
+    Tags are looked up by (user, name) through the index of its unique
+    constraint, which also rejects duplicated names, so no write has to
+    check for them first
+    """
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+
+    def _tags(self):
+        return Tags.objects.filter(user_id=int(self.user_id))
+
+    def create(self, name: str, color: str | None = None) -> Tag:
+        fields = {"name": name, "user_id": int(self.user_id)}
+        if color is not None:
+            fields["color"] = color
+        try:
+            with transaction.atomic():
+                tag = Tags.objects.create(**fields)
+        except IntegrityError as e:
+            raise ExistingTagException() from e
+        return to_tag_entity(tag)
+
+    def update(self, name: str, tag: Tag) -> Tag:
+        try:
+            with transaction.atomic():
+                updated = (
+                    self._tags()
+                    .filter(name=name)
+                    .update(name=tag.name, color=tag.color)
+                )
+        except IntegrityError as e:
+            raise ExistingTagException() from e
+        if not updated:
+            raise MissingTagException()
+        return Tag(tag.name, tag.color)
+
+    def rename(self, name: str, new_name: str) -> int:
+        """
+        The records keep carrying the tag, as they link to it by its id
+
+        :return: int, the number of records carrying the tag
+        :raises: ExistingTagException, MissingTagException
+        """
+        try:
+            with transaction.atomic():
+                updated = self._tags().filter(name=name).update(name=new_name)
+                if not updated:
+                    raise MissingTagException()
+                return (
+                    links("records")
+                    .filter(tags__user_id=int(self.user_id), tags__name=new_name)
+                    .count()
+                )
+        except IntegrityError as e:
+            raise ExistingTagException() from e
+
+    def delete(self, name: str) -> int:
+        """
+        The tag is removed from its records by the same statements deleting
+        it, whatever their number
+
+        :return: int, the number of records that carried the tag
+        """
+        deleted, rows = self._tags().filter(name=name).delete()
+        if not deleted:
+            raise MissingTagException()
+        return rows.get(links("records").model._meta.label, 0)
+
+    def merge(self, source: str, target: str) -> int:
+        """
+        It moves the records and recurrence rules carrying `source` over to
+        `target` and deletes `source`, in one transaction. The records are
+        retagged with a single `UPDATE` and the rollups of `target` rebuilt
+        from a single aggregate, so the number of statements is the same
+        however many records carry the tags.
+
+        :return: int, the number of records that carried `source`
+        :raises: MissingTagException
+        """
+        with transaction.atomic():
+            # record writes lock the accounts they write to, so locking all
+            # of the user's keeps them from changing the rollups meanwhile
+            list(
+                Accounts.objects.select_for_update()
+                .filter(user_id=int(self.user_id))
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+            tags = {
+                tag.name: tag
+                for tag in self._tags().filter(name__in=[source, target])
+            }
+            if source not in tags or target not in tags:
+                raise MissingTagException()
+            if source == target:
+                return 0
+            source_id, target_id = tags[source].id, tags[target].id
+
+            merged = links("records").filter(tags_id=source_id).count()
+            for through, owner in (
+                (links("records"), "records_id"),
+                (links("recurrence_rules"), "recurrencerules_id"),
+            ):
+                # the ones carrying both tags keep the link to `target` and
+                # lose the other one when `source` is deleted
+                through.filter(tags_id=source_id).exclude(
+                    **{
+                        f"{owner}__in": through.filter(tags_id=target_id).values(
+                            owner
+                        )
+                    }
+                ).update(tags_id=target_id)
+            Tags.objects.filter(id=source_id).delete()
+
+            rollups = tags[target].rollups
+            rollups.all().delete()
+            rollups.model.objects.bulk_create(
+                [
+                    rollups.model(
+                        user_id=total["user_id"],
+                        account_id=total["account_id"],
+                        tag_id=total["tag_id"],
+                        month=total["month"].date(),
+                        type=total["type"],
+                        total=from_cents(total["total"]),
+                        count=total["count"],
+                    )
+                    for total in tag_totals(
+                        Tags.objects.filter(id=target_id)
+                    ).iterator()
+                ],
+                batch_size=500,
+            )
+        return merged
+
+    def get_all(self) -> list[Tag]:
+        return [to_tag_entity(tag) for tag in self._tags()]
+
+    def get_tag(self, name: str) -> Tag:
+        try:
+            return to_tag_entity(self._tags().get(name=name))
+        except ObjectDoesNotExist as e:
+            raise MissingTagException() from e
+
+    def get_usage(self) -> list[tuple[Tag, int]]:
+        """
+        :return: list[tuple[Tag, int]], every tag with the number of records
+            carrying it, counted by a single aggregate
+        """
+        return [
+            (Tag(name, color), usage)
+            for name, color, usage in self._tags()
+            .annotate(usage=Count("records"))
+            .values_list("name", "color", "usage")
+        ]
+
+
+def to_tagging_rule_entity(rule: TaggingRules) -> TaggingRule:
+    return TaggingRule(str(rule.id), rule.pattern, to_tag_entity(rule.tag))
+
+
+class TaggingRulesRepository:
+    def create(self, user_id: str, pattern: str, tag_name: str) -> TaggingRule:
+        try:
+            tag = Tags.objects.get(user_id=int(user_id), name=tag_name)
+        except ObjectDoesNotExist as e:
+            raise MissingTagException() from e
+        try:
+            with transaction.atomic():
+                rule = TaggingRules.objects.create(
+                    pattern=pattern, tag=tag, user_id=tag.user_id
+                )
+        except IntegrityError as e:
+            raise ExistingTaggingRuleException() from e
+        return to_tagging_rule_entity(rule)
+
+    def delete(self, user_id: str, id: str) -> None:
+        deleted, _ = TaggingRules.objects.filter(
+            user_id=int(user_id), id=id
+        ).delete()
+        if not deleted:
+            raise TaggingRuleNotFoundException()
+
+    def get_all(self, user_id: str) -> list[TaggingRule]:
+        return [
+            to_tagging_rule_entity(rule)
+            for rule in TaggingRules.objects.filter(user_id=int(user_id))
+            .select_related("tag")
+            .order_by("id")
+        ]
+
+
+def load_tags(user_id: str) -> list[tuple[str, Tag]]:
+    return [
+        (str(id), Tag(name, color))
+        for id, name, color in Tags.objects.filter(
+            user_id=int(user_id)
+        ).values_list("id", "name", "color")
+    ]
+
+
+# the tag registries of the process, shared by the use cases writing tags
+# and the repositories mapping records, so that tag writes invalidate them
+TAG_REGISTRIES = TagRegistries(load_tags)
+
+# the tag indexes of the process, searched by the tag autocomplete
+TAG_INDEXES = TagIndexes()
+
+# the rule matchers of the process, invalidated by the writes to the rules
+# and to the tags they give, see TagsUseCases
+RULE_MATCHERS = RuleMatchers()
@@ -1 +1,259 @@
-# Create your tests here.
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Accounts, to_account_entity
+from entities.entities import Expense, Tag, TaggingRule
+from records.models import Records, RecordsRepository
+from reports.models import ReportsRepository, SpendingRollups
+from tags.models import Tags, TaggingRulesRepository, TagsRepository
+from use_cases.autotagging.exceptions import (
+    ExistingTaggingRuleException,
+    TaggingRuleNotFoundException,
+)
+from use_cases.tags.exceptions import ExistingTagException, MissingTagException
+from users.models import CustomUser
+
+
+@pytest.fixture
+def custom_user():
+    return CustomUser.objects.create_user(
+        email="johndoe@me.com", password="password"
+    )
+
+
+@pytest.fixture
+def repo(custom_user):
+    return TagsRepository(str(custom_user.id))
+
+
+@pytest.fixture
+def other_repo():
+    return TagsRepository(
+        str(
+            CustomUser.objects.create_user(
+                email="janedoe@me.com", password="password"
+            ).id
+        )
+    )
+
+
+@pytest.mark.django_db
+def test_tags_repository_create(repo, other_repo):
+    assert repo.create("Bills", "#FF0000") == Tag("Bills", "#FF0000")
+    assert repo.create("House") == Tag("House", "#D9DDDC")
+    # names are unique per user only
+    assert other_repo.create("Bills") == Tag("Bills", "#D9DDDC")
+
+
+@pytest.mark.django_db
+def test_tags_repository_create_existing(repo):
+    repo.create("Bills")
+    with pytest.raises(ExistingTagException):
+        repo.create("Bills", "#FF0000")
+    assert repo.get_all() == [Tag("Bills", "#D9DDDC")]
+
+
+@pytest.mark.django_db
+def test_tags_repository_update(repo, other_repo):
+    repo.create("Bills", "#FF0000")
+    repo.create("House")
+    other_repo.create("Bills")
+    assert repo.update("Bills", Tag("Rent", "#00FF00")) == Tag("Rent", "#00FF00")
+    assert repo.get_tag("Rent") == Tag("Rent", "#00FF00")
+    assert other_repo.get_tag("Bills") == Tag("Bills", "#D9DDDC")
+    with pytest.raises(ExistingTagException):
+        repo.update("Rent", Tag("House"))
+    with pytest.raises(MissingTagException):
+        repo.update("Bills", Tag("Car"))
+
+
+@pytest.mark.django_db
+def test_tags_repository_delete(repo, other_repo):
+    repo.create("Bills")
+    other_repo.create("Bills")
+    repo.delete("Bills")
+    with pytest.raises(MissingTagException):
+        repo.delete("Bills")
+    assert repo.get_all() == []
+    assert other_repo.get_all() == [Tag("Bills", "#D9DDDC")]
+
+
+@pytest.mark.django_db
+def test_tags_repository_get(repo, other_repo):
+    other_repo.create("Car")
+    repo.create("House")
+    repo.create("Bills")
+    assert repo.get_all() == [Tag("Bills", "#D9DDDC"), Tag("House", "#D9DDDC")]
+    with pytest.raises(MissingTagException):
+        repo.get_tag("Car")
+
+
+@pytest.mark.django_db
+def test_tags_repository_get_usage(
+    repo, tagged_records, django_assert_num_queries
+):
+    tagged_records(count=2)
+    with django_assert_num_queries(1):
+        usage = repo.get_usage()
+    assert sorted((tag.name, count) for tag, count in usage) == [
+        ("Bills", 4),
+        ("Car", 2),
+        ("House", 4),
+    ]
+
+
+@pytest.mark.django_db
+def test_tags_are_looked_up_by_index(repo, custom_user):
+    if connection.vendor != "sqlite":
+        pytest.skip("the plan is read from SQLite's EXPLAIN QUERY PLAN")
+    plan = Tags.objects.filter(user=custom_user, name="Bills").explain()
+    # the index of the unique constraint, on both columns
+    assert "(user_id=? AND name=?)" in plan
+
+
+@pytest.fixture
+def tagged_records(repo, custom_user):
+    repo.create("Bills")
+    repo.create("House")
+    repo.create("Car")
+    account = to_account_entity(
+        Accounts.objects.create(name="Main", user=custom_user)
+    )
+
+    def create(count=1):
+        return RecordsRepository().create_many(
+            [
+                Expense(
+                    None,
+                    description,
+                    Decimal(value),
+                    datetime(2023, month, 10, tzinfo=UTC),
+                    account=account,
+                    tags=[Tag(name) for name in tags],
+                )
+                for description, value, month, tags in [
+                    ("Water", "10.00", 3, ["Bills", "House"]),
+                    ("Power", "20.00", 3, ["Bills"]),
+                    ("Rent", "500.00", 4, ["House"]),
+                    ("Fuel", "50.00", 4, ["Car"]),
+                ]
+                for _ in range(count)
+            ]
+        )
+
+    return create
+
+
+def _record_tags():
+    return {
+        record.description: sorted(tag.name for tag in record.tags.all())
+        for record in Records.objects.prefetch_related("tags")
+    }
+
+
+def _rollups():
+    return sorted(
+        SpendingRollups.objects.values_list(
+            "account_id", "tag__name", "month", "type", "total", "count"
+        ),
+        key=str,
+    )
+
+
+@pytest.mark.django_db
+def test_tags_repository_delete_counts_records(repo, tagged_records):
+    tagged_records()
+    assert repo.delete("Bills") == 2
+    assert repo.delete("Car") == 1
+    assert _record_tags() == {
+        "Water": ["House"],
+        "Power": [],
+        "Rent": ["House"],
+        "Fuel": [],
+    }
+
+
+@pytest.mark.django_db
+def test_tags_repository_rename_counts_records(repo, tagged_records):
+    tagged_records()
+    assert repo.rename("Bills", "Utilities") == 2
+    assert _record_tags()["Water"] == ["House", "Utilities"]
+    with pytest.raises(ExistingTagException):
+        repo.rename("Utilities", "House")
+    with pytest.raises(MissingTagException):
+        repo.rename("Bills", "Car")
+
+
+@pytest.mark.django_db
+def test_tags_repository_merge(repo, custom_user, tagged_records):
+    tagged_records()
+    assert repo.merge("Bills", "House") == 2
+    assert repo.get_all() == [Tag("Car", "#D9DDDC"), Tag("House", "#D9DDDC")]
+    # Water carried both and is counted in House once
+    assert _record_tags() == {
+        "Water": ["House"],
+        "Power": ["House"],
+        "Rent": ["House"],
+        "Fuel": ["Car"],
+    }
+    merged = _rollups()
+    ReportsRepository().rebuild(str(custom_user.id))
+    assert merged == _rollups()
+    assert SpendingRollups.objects.get(
+        tag__name="House", month__month=3
+    ).total == Decimal("30.00")
+
+
+@pytest.mark.django_db
+def test_tags_repository_merge_missing(repo, tagged_records):
+    tagged_records()
+    with pytest.raises(MissingTagException):
+        repo.merge("Bills", "Food")
+    with pytest.raises(MissingTagException):
+        repo.merge("Food", "Bills")
+    assert repo.merge("Bills", "Bills") == 0
+    assert len(repo.get_all()) == 3
+
+
+@pytest.mark.django_db
+def test_tags_repository_merge_statements_do_not_grow_with_records(
+    repo, tagged_records
+):
+    tagged_records()
+    with CaptureQueriesContext(connection) as few:
+        repo.merge("Bills", "House")
+
+    repo.create("Bills")
+    tagged_records(count=50)
+    with CaptureQueriesContext(connection) as many:
+        assert repo.merge("Bills", "House") == 100
+    assert len(many) == len(few)
+
+
+@pytest.mark.django_db
+def test_tagging_rules_repository(repo, other_repo):
+    rules = TaggingRulesRepository()
+    repo.create("Transport", "#FF0000")
+    repo.create("Food")
+    other_repo.create("Food")
+    uber = rules.create(repo.user_id, "uber", "Transport")
+    eats = rules.create(repo.user_id, "eats", "Food")
+    assert uber == TaggingRule(uber.id, "uber", Tag("Transport", "#FF0000"))
+    with pytest.raises(ExistingTaggingRuleException):
+        rules.create(repo.user_id, "uber", "Transport")
+    with pytest.raises(MissingTagException):
+        rules.create(repo.user_id, "train", "Car")
+    rules.create(other_repo.user_id, "bakery", "Food")
+    assert rules.get_all(repo.user_id) == [uber, eats]
+
+    with pytest.raises(TaggingRuleNotFoundException):
+        rules.delete(other_repo.user_id, str(uber.id))
+    rules.delete(repo.user_id, str(uber.id))
+    # the rules of a tag go with it
+    repo.delete("Food")
+    assert rules.get_all(repo.user_id) == []
+    assert len(rules.get_all(other_repo.user_id)) == 1
@@ -1,6 +1,35 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
 from typing import Protocol
 
 from entities.entities import Account
+from use_cases.analytics.analytics import CubeCache
+from use_cases.changes.changes import (
+    ChangeLog,
+    Operation,
+    account_change,
+    account_record_deletion,
+    atomic,
+    logged,
+)
+from use_cases.retry import retry_on_conflict
+
+
+@dataclass(frozen=True)
+class BalanceReconciliation:
+    account_id: str
+    stored_balance: Decimal
+    ledger_balance: Decimal
+
+    @property
+    def difference(self) -> Decimal:
+        return self.stored_balance - self.ledger_balance
+
+    @property
+    def is_consistent(self) -> bool:
+        return self.difference == 0
 
 
 class AccountRepository(Protocol):
@@ -10,7 +39,10 @@ class AccountRepository(Protocol):
     def update(self, id: str, account: Account) -> Account:
         ...
 
-    def delete(self, id: str) -> None:
+    def adjust_balance(self, id: str, balance: Decimal) -> Account:
+        ...
+
+    def delete(self, id: str) -> list[str]:
         ...
 
     def get_all(self) -> list[Account]:
@@ -19,22 +51,141 @@ class AccountRepository(Protocol):
     def get(self, id: str) -> Account:
         ...
 
+    def reconcile(self, id: str) -> BalanceReconciliation:
+        ...
+
+    def get_balance_at(self, id: str, moment: datetime) -> Decimal:
+        ...
+
 
 class AccountUseCases:
-    def __init__(self, account_repository: AccountRepository):
+    def __init__(
+        self,
+        account_repository: AccountRepository,
+        change_log: ChangeLog | None = None,
+        cubes: CubeCache | None = None,
+    ):
+        """
+        :param cubes: the cube of the user is invalidated when an account
+            is deleted along with its records
+        """
         self.account_repository = account_repository
+        self.change_log = change_log
+        self.cubes = cubes
 
     def create_account(self, account: Account) -> Account:
-        return self.account_repository.create(account)
+        return logged(
+            self.change_log,
+            lambda: self.account_repository.create(account),
+            lambda created_account: [account_change(created_account)],
+        )
 
     def update_account(self, id: str, account: Account) -> Account:
-        return self.account_repository.update(id, account)
+        """
+        When the account carries a version, it is only updated if it is
+        still at that version, so updates made since it was read aren't
+        lost. Record writes change the balance by deltas and don't bump it,
+        so the balance of `account` is ignored, see adjust_balance.
+
+        :param id:
+        :param account:
+        :return: Account with its new version
+        :raises: MissingAccountException, AccountVersionConflictException
+        """
+        return logged(
+            self.change_log,
+            lambda: self.account_repository.update(id, account),
+            lambda updated_account: [account_change(updated_account)],
+        )
+
+    def adjust_balance(self, id: str, balance: Decimal) -> Account:
+        """
+        It sets the balance of the account, as when it is matched against a
+        bank statement, keeping whatever records were written before
+
+        :param id:
+        :param balance:
+        :return: Account with its new balance and version
+        :raises: MissingAccountException
+        """
+        return logged(
+            self.change_log,
+            lambda: self.account_repository.adjust_balance(id, balance),
+            lambda adjusted_account: [account_change(adjusted_account)],
+        )
+
+    def change_account(
+        self, id: str, change: Callable[[Account], Account], attempts: int = 3
+    ) -> Account:
+        """
+        It reads the account, applies `change` to it and updates it at the
+        version read, reading and changing it again on conflicts
+
+        :param id:
+        :param change: it returns the changed account, keeping its version
+        :param attempts:
+        :return: Account
+        :raises: MissingAccountException, AccountVersionConflictException
+        """
+        return retry_on_conflict(
+            lambda: self.update_account(id, change(self.get(id))), attempts
+        )
 
     def delete_account(self, id: str) -> None:
-        self.account_repository.delete(id)
+        """
+        The records of the account are deleted along with it, and their
+        deletions are logged before the one of the account, in the same
+        transaction
+
+        :raises: MissingAccountException
+        """
+        if self.change_log is None and self.cubes is None:
+            self.account_repository.delete(id)
+            return
+        with atomic(self.change_log):
+            account = self.account_repository.get(id)
+            record_ids = self.account_repository.delete(id)
+            if self.change_log is not None:
+                self.change_log.append(
+                    [
+                        *[
+                            account_record_deletion(account, record_id)
+                            for record_id in record_ids
+                        ],
+                        account_change(account, Operation.DELETE),
+                    ]
+                )
+        if self.cubes is not None and record_ids:
+            self.cubes.invalidate(account.user_id)
 
     def get_all(self) -> list[Account]:
         return self.account_repository.get_all()
 
     def get(self, id: str) -> Account:
         return self.account_repository.get(id)
+
+    def reconcile_balance(self, id: str) -> BalanceReconciliation:
+        """
+        It compares the stored balance of the account, which is updated
+        incrementally by every record write, against the one computed from
+        its whole ledger
+
+        :param id:
+        :return: BalanceReconciliation
+        :raises: MissingAccountException
+        """
+        return self.account_repository.reconcile(id)
+
+    def balance_at(self, account_id: str, date: datetime) -> Decimal:
+        """
+        It returns the balance of the account right after `date`, including
+        the records made exactly at it. It reads the closing balance of the
+        previous month and sums only the records of the month of `date`, so
+        it costs the same whatever the age of the account.
+
+        :param account_id:
+        :param date:
+        :return: Decimal
+        :raises: MissingAccountException
+        """
+        return self.account_repository.get_balance_at(account_id, date)
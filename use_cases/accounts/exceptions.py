@@ -1,2 +1,6 @@
 class MissingAccountException(Exception):
     msg = "Account does not exist"
+
+
+class AccountVersionConflictException(Exception):
+    msg = "Account was changed by someone else since it was read"
@@ -1,12 +1,20 @@
 import uuid
+from dataclasses import replace
+from datetime import datetime
 from decimal import Decimal
 from unittest.mock import MagicMock
 
 import pytest
 
 from entities.entities import Account
-from use_cases.accounts.accounts import AccountUseCases
-from use_cases.accounts.exceptions import MissingAccountException
+from use_cases.accounts.accounts import (
+    AccountUseCases,
+    BalanceReconciliation,
+)
+from use_cases.accounts.exceptions import (
+    AccountVersionConflictException,
+    MissingAccountException,
+)
 
 
 class AccountRepositoryMock:
@@ -16,7 +24,12 @@ class AccountRepositoryMock:
     def update(self, id: str, account: Account) -> Account:  # type: ignore
         ...
 
-    def delete(self, id: str) -> None:
+    def adjust_balance(  # type: ignore
+        self, id: str, balance: Decimal
+    ) -> Account:
+        ...
+
+    def delete(self, id: str) -> list[str]:  # type: ignore
         ...
 
     def get_all(self) -> list[Account]:  # type: ignore
@@ -25,6 +38,14 @@ class AccountRepositoryMock:
     def get(self, id: str) -> Account:  # type: ignore
         ...
 
+    def reconcile(self, id: str) -> BalanceReconciliation:  # type: ignore
+        ...
+
+    def get_balance_at(  # type: ignore
+        self, id: str, moment: datetime
+    ) -> Decimal:
+        ...
+
 
 mock = AccountRepositoryMock()
 
@@ -101,6 +122,21 @@ def test_update_account_use_case_when_user_does_not_exist(
     ...
 
 
+def test_adjust_balance_use_case(account_to_be_updated):
+    expected_account = replace(
+        account_to_be_updated, balance=Decimal("42.00"), version=2
+    )
+    mock.adjust_balance = MagicMock(return_value=expected_account)
+    use_cases = AccountUseCases(mock)
+    assert (
+        use_cases.adjust_balance(account_to_be_updated.id, Decimal("42.00"))
+        == expected_account
+    )
+    mock.adjust_balance.assert_called_once_with(
+        account_to_be_updated.id, Decimal("42.00")
+    )
+
+
 def test_delete_account_when_account_does_not_exist():
     mock.delete = MagicMock(side_effect=MissingAccountException)
     use_cases = AccountUseCases(mock)
@@ -108,6 +144,14 @@ def test_delete_account_when_account_does_not_exist():
         use_cases.delete_account(str(uuid.uuid4()))
 
 
+def test_delete_account_use_case_invalidates_cube(account_to_be_updated):
+    mock.get = MagicMock(return_value=account_to_be_updated)
+    mock.delete = MagicMock(return_value=["7"])
+    cubes = MagicMock()
+    AccountUseCases(mock, cubes=cubes).delete_account(account_to_be_updated.id)
+    cubes.invalidate.assert_called_once_with(account_to_be_updated.user_id)
+
+
 def test_get_all_accounts_use_case(account_to_be_updated):
     expected_accounts = [account_to_be_updated]
     mock.get_all = MagicMock(return_value=expected_accounts)
@@ -129,3 +173,66 @@ def test_get_missing_account_use_case(account_to_be_updated):
     use_cases = AccountUseCases(mock)
     with pytest.raises(MissingAccountException):
         use_cases.get(account_to_be_updated.id)
+
+
+def test_reconcile_balance_use_case(account_to_be_updated):
+    expected_reconciliation = BalanceReconciliation(
+        account_id=account_to_be_updated.id,
+        stored_balance=Decimal("10.00"),
+        ledger_balance=Decimal("7.50"),
+    )
+    mock.reconcile = MagicMock(return_value=expected_reconciliation)
+    use_cases = AccountUseCases(mock)
+    reconciliation = use_cases.reconcile_balance(account_to_be_updated.id)
+    assert reconciliation == expected_reconciliation
+    assert reconciliation.difference == Decimal("2.50")
+    assert not reconciliation.is_consistent
+
+
+def test_reconcile_missing_account_use_case(account_to_be_updated):
+    mock.reconcile = MagicMock(side_effect=MissingAccountException)
+    use_cases = AccountUseCases(mock)
+    with pytest.raises(MissingAccountException):
+        use_cases.reconcile_balance(account_to_be_updated.id)
+
+
+def test_balance_at_use_case(account_to_be_updated):
+    mock.get_balance_at = MagicMock(return_value=Decimal("42.00"))
+    use_cases = AccountUseCases(mock)
+    date = datetime(2023, 4, 8)
+    assert use_cases.balance_at(account_to_be_updated.id, date) == Decimal(
+        "42.00"
+    )
+    mock.get_balance_at.assert_called_once_with(account_to_be_updated.id, date)
+
+
+def test_change_account_use_case_retries_conflicts(account_to_be_updated):
+    mock.get = MagicMock(return_value=replace(account_to_be_updated, version=1))
+    mock.update = MagicMock(
+        side_effect=[
+            AccountVersionConflictException,
+            replace(account_to_be_updated, name="My CC", version=2),
+        ]
+    )
+    use_cases = AccountUseCases(mock)
+    account = use_cases.change_account(
+        account_to_be_updated.id,
+        lambda account: replace(account, name="My CC"),
+    )
+    assert account.version == 2
+    assert mock.get.call_count == 2
+    mock.update.assert_called_with(
+        account_to_be_updated.id,
+        replace(account_to_be_updated, name="My CC", version=1),
+    )
+
+
+def test_change_account_use_case_gives_up(account_to_be_updated):
+    mock.get = MagicMock(return_value=account_to_be_updated)
+    mock.update = MagicMock(side_effect=AccountVersionConflictException)
+    use_cases = AccountUseCases(mock)
+    with pytest.raises(AccountVersionConflictException):
+        use_cases.change_account(
+            account_to_be_updated.id, lambda account: account, attempts=2
+        )
+    assert mock.update.call_count == 2
@@ -0,0 +1,279 @@
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Protocol
+
+import numpy as np
+
+from entities.entities import RecordType
+from entities.money import from_cents, to_cents
+from use_cases.cache import UserCache
+
+EPOCH = date(1970, 1, 1)
+# 1970-01-01 was a Thursday, weekday 3 counting from Monday as 0
+EPOCH_WEEKDAY = 3
+
+
+class Dimension(Enum):
+    WEEKDAY = 0
+    MONTH = 1
+    ACCOUNT = 2
+    TAG = 3
+    TYPE = 4
+
+
+@dataclass(frozen=True, slots=True)
+class CubeRow:
+    date: datetime
+    type: RecordType
+    value: Decimal
+    account_id: str
+    tags: list[str] = field(default_factory=list)
+
+
+def to_day(moment: datetime) -> int:
+    """The number of days from the epoch to the UTC date of `moment`"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(UTC)
+    return (moment.date() - EPOCH).days
+
+
+class Cube:
+    """
+    The records of a user as columns: the UTC date as days from the epoch,
+    the value in cents, the type, the index of the account and a bitmap of
+    the tags, one bit per tag. Queries filter and group every record at
+    once with vectorized operations instead of looping over them.
+    """
+
+    def __init__(
+        self,
+        days: np.ndarray,
+        cents: np.ndarray,
+        types: np.ndarray,
+        accounts: np.ndarray,
+        tags: np.ndarray,
+        account_ids: list[str],
+        tag_names: list[str],
+    ):
+        self.days = days
+        self.cents = cents
+        self.types = types
+        self.accounts = accounts
+        self.tags = tags
+        self.account_ids = account_ids
+        self.tag_names = tag_names
+        self.signed_cents = np.where(
+            types == RecordType.EXPENSE.value, -cents, cents
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[CubeRow]) -> "Cube":
+        days, cents, types, accounts = [], [], [], []
+        account_indexes: dict[str, int] = {}
+        tag_indexes: dict[str, int] = {}
+        tag_cells: tuple[list[int], list[int]] = ([], [])
+        for position, row in enumerate(rows):
+            days.append(to_day(row.date))
+            cents.append(to_cents(row.value))
+            types.append(row.type.value)
+            accounts.append(
+                account_indexes.setdefault(row.account_id, len(account_indexes))
+            )
+            for name in row.tags:
+                tag_cells[0].append(position)
+                tag_cells[1].append(
+                    tag_indexes.setdefault(name, len(tag_indexes))
+                )
+        tag_matrix = np.zeros((len(days), len(tag_indexes)), dtype=np.bool_)
+        tag_matrix[
+            np.array(tag_cells[0], dtype=np.intp),
+            np.array(tag_cells[1], dtype=np.intp),
+        ] = True
+        return cls(
+            np.array(days, dtype=np.int32),
+            np.array(cents, dtype=np.int64),
+            np.array(types, dtype=np.int8),
+            np.array(accounts, dtype=np.int32),
+            np.packbits(tag_matrix, axis=1, bitorder="little"),
+            list(account_indexes),
+            list(tag_indexes),
+        )
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def has_tag(self, index: int) -> np.ndarray:
+        return (self.tags[:, index >> 3] >> (index & 7)) & 1 == 1
+
+    def select(
+        self,
+        since: date | None = None,
+        until: date | None = None,
+        type: RecordType | None = None,
+        account_id: str | None = None,
+        tag: str | None = None,
+    ) -> np.ndarray:
+        """
+        It returns the mask of the records matching every filter given.
+        Both `since` and `until` are inclusive.
+        """
+        mask = np.ones(len(self), dtype=np.bool_)
+        if since is not None:
+            mask &= self.days >= (since - EPOCH).days
+        if until is not None:
+            mask &= self.days <= (until - EPOCH).days
+        if type is not None:
+            mask &= self.types == type.value
+        if account_id is not None:
+            if account_id not in self.account_ids:
+                return np.zeros(len(self), dtype=np.bool_)
+            mask &= self.accounts == self.account_ids.index(account_id)
+        if tag is not None:
+            if tag not in self.tag_names:
+                return np.zeros(len(self), dtype=np.bool_)
+            mask &= self.has_tag(self.tag_names.index(tag))
+        return mask
+
+    def values(self, type: RecordType | None) -> np.ndarray:
+        # totals of a single type add up its values as they are, while
+        # totals mixing types add up their signed values, the net
+        return self.cents if type is not None else self.signed_cents
+
+    def total(self, type: RecordType | None = None, **filters) -> Decimal:
+        mask = self.select(type=type, **filters)
+        return from_cents(self.values(type)[mask].sum())
+
+    def group_by(
+        self, dimension: Dimension, type: RecordType | None = None, **filters
+    ) -> dict[Any, Decimal]:
+        """
+        It returns the total of the records matching the filters by each
+        value of the dimension that has any: the weekday, 0 being Monday,
+        the first day of the month, the account id, the tag name or the
+        record type. A record carrying several tags counts for each of them.
+        """
+        mask = self.select(type=type, **filters)
+        values = self.values(type)[mask]
+        if dimension is Dimension.TAG:
+            tag_matrix = np.unpackbits(
+                self.tags[mask],
+                axis=1,
+                count=len(self.tag_names),
+                bitorder="little",
+            )
+            totals = values @ tag_matrix.astype(np.int64)
+            counts = tag_matrix.sum(axis=0)
+            return {
+                name: from_cents(totals[index])
+                for index, name in enumerate(self.tag_names)
+                if counts[index]
+            }
+
+        keys, labels = self.keys(dimension, mask)
+        present, inverse = np.unique(keys, return_inverse=True)
+        totals = np.zeros(len(present), dtype=np.int64)
+        np.add.at(totals, inverse, values)
+        return {
+            labels(key): from_cents(total)
+            for key, total in zip(present.tolist(), totals, strict=True)
+        }
+
+    def keys(
+        self, dimension: Dimension, mask: np.ndarray
+    ) -> tuple[np.ndarray, Callable[[int], Any]]:
+        if dimension is Dimension.WEEKDAY:
+            return (self.days[mask] + EPOCH_WEEKDAY) % 7, int
+        if dimension is Dimension.MONTH:
+            months = (
+                self.days[mask]
+                .astype("datetime64[D]")
+                .astype("datetime64[M]")
+                .astype(np.int64)
+            )
+            return months, lambda month: date(
+                1970 + month // 12, month % 12 + 1, 1
+            )
+        if dimension is Dimension.ACCOUNT:
+            return self.accounts[mask], self.account_ids.__getitem__
+        return self.types[mask], RecordType
+
+
+class AnalyticsRepository(Protocol):
+    def get_rows(self, user_id: str) -> Iterable[CubeRow]:
+        ...
+
+
+class CubeCache(UserCache[Cube]):
+    """
+    The cubes of the users queried the latest. Writes to the records of a
+    user must invalidate their cube.
+    """
+
+
+class AnalyticsUseCases:
+    """
+    Ad-hoc totals over a user's records, answered from their cube. The cube
+    is loaded with a single pass over the records and kept in the cache
+    until a write invalidates it.
+    """
+
+    def __init__(self, repository: AnalyticsRepository, cubes: CubeCache):
+        self.repository = repository
+        self.cubes = cubes
+
+    def get_cube(self, user_id: str) -> Cube:
+        return self.cubes.get(
+            user_id,
+            lambda: Cube.from_rows(self.repository.get_rows(user_id)),
+        )
+
+    def total(
+        self,
+        user_id: str,
+        since: date | None = None,
+        until: date | None = None,
+        type: RecordType | None = None,
+        account_id: str | None = None,
+        tag: str | None = None,
+    ) -> Decimal:
+        """
+        It returns the total of the user's records matching every filter
+        given. Without a type, expenses count as negative values.
+
+        :return: Decimal
+        """
+        return self.get_cube(user_id).total(
+            since=since,
+            until=until,
+            type=type,
+            account_id=account_id,
+            tag=tag,
+        )
+
+    def group_by(
+        self,
+        user_id: str,
+        dimension: Dimension,
+        since: date | None = None,
+        until: date | None = None,
+        type: RecordType | None = None,
+        account_id: str | None = None,
+        tag: str | None = None,
+    ) -> dict[Any, Decimal]:
+        """
+        It returns the total of the user's records matching every filter
+        given, by each value of the dimension, see Cube.group_by
+
+        :return: dict[Any, Decimal] or {}
+        """
+        return self.get_cube(user_id).group_by(
+            dimension,
+            since=since,
+            until=until,
+            type=type,
+            account_id=account_id,
+            tag=tag,
+        )
@@ -0,0 +1,198 @@
+import uuid
+from collections.abc import Iterable
+from datetime import UTC, date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+
+from entities.entities import Account, Expense, RecordType
+from use_cases.analytics.analytics import (
+    AnalyticsUseCases,
+    Cube,
+    CubeCache,
+    CubeRow,
+    Dimension,
+)
+from use_cases.records.records import RecordUseCases
+
+
+class AnalyticsRepositoryMock:
+    def get_rows(self, user_id: str) -> Iterable[CubeRow]:  # type: ignore
+        ...
+
+
+@pytest.fixture(scope="function")
+def rows():
+    return [
+        # Monday
+        CubeRow(
+            datetime(2023, 4, 3, 10, tzinfo=UTC),
+            RecordType.EXPENSE,
+            Decimal("10.50"),
+            "1",
+            ["Bills", "House"],
+        ),
+        # still Monday in UTC
+        CubeRow(
+            datetime(2023, 4, 4, 1, tzinfo=timezone(timedelta(hours=3))),
+            RecordType.EXPENSE,
+            Decimal("0.25"),
+            "2",
+            ["Bills"],
+        ),
+        CubeRow(
+            datetime(2023, 5, 6, tzinfo=UTC),
+            RecordType.EXPENSE,
+            Decimal("100.00"),
+            "1",
+        ),
+        CubeRow(
+            datetime(2023, 5, 1, tzinfo=UTC),
+            RecordType.INCOME,
+            Decimal("1000.00"),
+            "1",
+            ["Salary"],
+        ),
+    ]
+
+
+@pytest.fixture(scope="function")
+def cube(rows):
+    return Cube.from_rows(rows)
+
+
+def test_cube_columns(cube):
+    assert len(cube) == 4
+    assert cube.cents.tolist() == [1050, 25, 10000, 100000]
+    assert cube.account_ids == ["1", "2"]
+    assert cube.tag_names == ["Bills", "House", "Salary"]
+    assert cube.has_tag(0).tolist() == [True, True, False, False]
+
+
+def test_cube_totals(cube):
+    assert cube.total() == Decimal("889.25")
+    assert cube.total(type=RecordType.EXPENSE) == Decimal("110.75")
+    assert cube.total(
+        type=RecordType.EXPENSE, since=date(2023, 4, 4)
+    ) == Decimal("100.00")
+    assert cube.total(until=date(2023, 4, 3)) == Decimal("-10.75")
+    assert cube.total(account_id="2") == Decimal("-0.25")
+    assert cube.total(tag="House") == Decimal("-10.50")
+    assert cube.total(tag="Car") == Decimal("0")
+    assert cube.total(account_id="3") == Decimal("0")
+
+
+def test_cube_group_by(cube):
+    expenses = {"type": RecordType.EXPENSE}
+    assert cube.group_by(Dimension.WEEKDAY, **expenses) == {
+        0: Decimal("10.75"),
+        5: Decimal("100.00"),
+    }
+    assert cube.group_by(Dimension.MONTH) == {
+        date(2023, 4, 1): Decimal("-10.75"),
+        date(2023, 5, 1): Decimal("900.00"),
+    }
+    assert cube.group_by(Dimension.ACCOUNT, **expenses) == {
+        "1": Decimal("110.50"),
+        "2": Decimal("0.25"),
+    }
+    assert cube.group_by(Dimension.TAG, **expenses) == {
+        "Bills": Decimal("10.75"),
+        "House": Decimal("10.50"),
+    }
+    assert cube.group_by(Dimension.TYPE, since=date(2023, 5, 1)) == {
+        RecordType.EXPENSE: Decimal("-100.00"),
+        RecordType.INCOME: Decimal("1000.00"),
+    }
+
+
+def test_cube_of_many_tags():
+    names = [f"Tag {i}" for i in range(20)]
+    cube = Cube.from_rows(
+        CubeRow(
+            datetime(2023, 4, 3, tzinfo=UTC),
+            RecordType.EXPENSE,
+            Decimal("1.00"),
+            "1",
+            names[i:],
+        )
+        for i in range(20)
+    )
+    assert cube.total(tag="Tag 19") == Decimal("-20.00")
+    assert cube.group_by(Dimension.TAG)["Tag 9"] == Decimal("-10.00")
+
+
+def test_empty_cube():
+    cube = Cube.from_rows([])
+    assert cube.total() == Decimal("0")
+    assert cube.group_by(Dimension.MONTH) == {}
+    assert cube.group_by(Dimension.TAG) == {}
+
+
+def test_cube_cache_evicts_the_least_recently_used():
+    cubes = CubeCache(max_size=2)
+    first_cube, second_cube = Cube.from_rows([]), Cube.from_rows([])
+    assert cubes.get("1", lambda: first_cube) is first_cube
+    cubes.get("2", lambda: second_cube)
+    assert cubes.get("1", MagicMock()) is first_cube
+    cubes.get("3", lambda: second_cube)
+    assert list(cubes.entries) == ["1", "3"]
+
+
+def test_cube_cache_invalidation():
+    cubes = CubeCache()
+    load = MagicMock(return_value=Cube.from_rows([]))
+    cubes.get("1", load)
+    cubes.invalidate("1")
+    cubes.get("1", load)
+    assert load.call_count == 2
+
+    # a cube loaded while records are written is not kept
+    load.side_effect = lambda: cubes.invalidate("2") or Cube.from_rows([])
+    cubes.invalidate("1")
+    cubes.get("1", load)
+    assert "1" not in cubes.entries
+
+
+def test_cube_cache_expires_cubes():
+    cubes = CubeCache(max_age=0)
+    load = MagicMock(return_value=Cube.from_rows([]))
+    cubes.get("1", load)
+    cubes.get("1", load)
+    assert load.call_count == 2
+
+
+def test_analytics_use_cases_load_cubes_once(rows):
+    repository = AnalyticsRepositoryMock()
+    repository.get_rows = MagicMock(return_value=rows)  # type: ignore
+    use_cases = AnalyticsUseCases(repository, CubeCache())
+    assert use_cases.total("1", type=RecordType.INCOME) == Decimal("1000.00")
+    assert use_cases.group_by("1", Dimension.ACCOUNT, tag="Bills") == {
+        "1": Decimal("-10.50"),
+        "2": Decimal("-0.25"),
+    }
+    repository.get_rows.assert_called_once_with("1")
+
+
+def test_record_writes_invalidate_cubes():
+    account = Account(
+        str(uuid.uuid4()), Decimal("0.00"), user_id="1", name="Main"
+    )
+    record = Expense(
+        str(uuid.uuid4()),
+        "Water",
+        Decimal("10.00"),
+        datetime(2023, 4, 3, tzinfo=UTC),
+        account=account,
+    )
+    cubes = CubeCache()
+    cubes.invalidate = MagicMock()  # type: ignore
+    service = MagicMock()
+    service.create = MagicMock(return_value=record)
+    service.get = MagicMock(return_value=record)
+    use_cases = RecordUseCases(service, cubes=cubes)
+    use_cases.create_record(record)
+    use_cases.delete_record(record.id)
+    assert cubes.invalidate.call_count == 2
+    cubes.invalidate.assert_called_with("1")
@@ -0,0 +1,160 @@
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import replace
+from typing import Protocol
+
+from entities.entities import Record, Tag, TaggingRule
+from use_cases.autotagging.exceptions import InvalidTaggingRuleException
+from use_cases.cache import UserCache
+
+
+class RuleMatcher:
+    """
+    The tagging rules of a user compiled into an Aho-Corasick automaton: a
+    trie of their patterns where every state also links to the longest
+    suffix of it that is a state too. A description is matched against all
+    the rules at once, in a single pass over its characters, however many
+    rules there are.
+    """
+
+    def __init__(self, rules: Iterable[TaggingRule]):
+        self.transitions: list[dict[str, int]] = [{}]
+        self.fallbacks = [0]
+        # the names of the tags of the patterns ending at each state
+        self.outputs: list[frozenset[str]] = [frozenset()]
+        for rule in rules:
+            if pattern := rule.pattern.casefold():
+                state = self._insert(pattern)
+                self.outputs[state] |= {rule.tag.name}
+        self._link()
+
+    def _insert(self, pattern: str) -> int:
+        state = 0
+        for char in pattern:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions[state][char] = next_state
+                self.transitions.append({})
+                self.fallbacks.append(0)
+                self.outputs.append(frozenset())
+            state = next_state
+        return state
+
+    def _link(self) -> None:
+        # breadth first, so the fallbacks of shorter states are known
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                fallback = self.fallbacks[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fallbacks[fallback]
+                self.fallbacks[next_state] = self.transitions[fallback].get(
+                    char, 0
+                )
+                self.outputs[next_state] |= self.outputs[
+                    self.fallbacks[next_state]
+                ]
+                queue.append(next_state)
+
+    def match(self, description: str) -> set[str]:
+        """
+        :return: set[str] with the names of the tags of every rule whose
+            pattern is in the description, ignoring case
+        """
+        found: set[str] = set()
+        state = 0
+        for char in description.casefold():
+            while state and char not in self.transitions[state]:
+                state = self.fallbacks[state]
+            state = self.transitions[state].get(char, 0)
+            if self.outputs[state]:
+                found |= self.outputs[state]
+        return found
+
+
+class RuleMatchers(UserCache[RuleMatcher]):
+    """
+    The rule matchers of the users tagging records the latest. Writes to
+    the rules of a user, or to the tags they give, must invalidate theirs.
+    """
+
+
+class TaggingRulesRepository(Protocol):
+    def create(self, user_id: str, pattern: str, tag_name: str) -> TaggingRule:
+        ...
+
+    def delete(self, user_id: str, id: str) -> None:
+        ...
+
+    def get_all(self, user_id: str) -> list[TaggingRule]:
+        ...
+
+
+class AutoTaggingUseCases:
+    """
+    Records are tagged by the rules of the owner of their account. The
+    rules of a user are compiled once into a RuleMatcher, kept in the cache
+    until they change, so tagging a batch costs one pass over each
+    description instead of one check per rule.
+    """
+
+    def __init__(
+        self, repository: TaggingRulesRepository, matchers: RuleMatchers
+    ):
+        self.repository = repository
+        self.matchers = matchers
+
+    def create_rule(
+        self, user_id: str, pattern: str, tag_name: str
+    ) -> TaggingRule:
+        """
+        :return: TaggingRule
+        :raises: InvalidTaggingRuleException, ExistingTaggingRuleException,
+            MissingTagException
+        """
+        if not pattern.strip():
+            raise InvalidTaggingRuleException()
+        rule = self.repository.create(user_id, pattern, tag_name)
+        self.matchers.invalidate(user_id)
+        return rule
+
+    def delete_rule(self, user_id: str, id: str) -> None:
+        """
+        :raises: TaggingRuleNotFoundException
+        """
+        self.repository.delete(user_id, id)
+        self.matchers.invalidate(user_id)
+
+    def get_rules(self, user_id: str) -> list[TaggingRule]:
+        return self.repository.get_all(user_id)
+
+    def get_matcher(self, user_id: str) -> RuleMatcher:
+        return self.matchers.get(
+            user_id, lambda: RuleMatcher(self.repository.get_all(user_id))
+        )
+
+    def tag_records(self, records: Iterable[Record]) -> list[Record]:
+        """
+        It gives each record the tags of the rules matching its description,
+        besides the ones it has. The records are not written.
+
+        :return: list[Record] in the same order as `records`
+        """
+        tagged_records = []
+        for record in records:
+            names = self.get_matcher(str(record.account.user_id)).match(
+                record.description
+            )
+            tags = record.tags or []
+            names -= {tag.name for tag in tags}
+            if names:
+                record = replace(
+                    record,
+                    tags=sorted(
+                        [*tags, *map(Tag, names)], key=lambda tag: tag.name
+                    ),
+                )
+            tagged_records.append(record)
+        return tagged_records
@@ -0,0 +1,10 @@
+class TaggingRuleNotFoundException(Exception):
+    msg = "tagging rule not found"
+
+
+class ExistingTaggingRuleException(Exception):
+    msg = "tagging rule already exists"
+
+
+class InvalidTaggingRuleException(Exception):
+    msg = "tagging rule is invalid"
@@ -0,0 +1,152 @@
+import random
+import uuid
+from datetime import UTC, datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+
+from entities.entities import Account, Expense, Tag, TaggingRule
+from use_cases.autotagging.autotagging import (
+    AutoTaggingUseCases,
+    RuleMatcher,
+    RuleMatchers,
+)
+from use_cases.autotagging.exceptions import InvalidTaggingRuleException
+from use_cases.tags.tags import TagsUseCases
+
+
+class TaggingRulesRepositoryMock:
+    def create(  # type: ignore
+        self, user_id: str, pattern: str, tag_name: str
+    ) -> TaggingRule:
+        ...
+
+    def delete(self, user_id: str, id: str) -> None:
+        ...
+
+    def get_all(self, user_id: str) -> list[TaggingRule]:  # type: ignore
+        ...
+
+
+def _rules(*rules):
+    return [
+        TaggingRule(str(id), pattern, Tag(name))
+        for id, (pattern, name) in enumerate(rules)
+    ]
+
+
+@pytest.fixture(scope="function")
+def account():
+    return Account(
+        str(uuid.uuid4()),
+        Decimal("0.00"),
+        user_id=str(uuid.uuid4()),
+        name="Main",
+    )
+
+
+def _expense(account, description, tags=None):
+    return Expense(
+        None,
+        description,
+        Decimal("10.00"),
+        datetime(2023, 3, 10, tzinfo=UTC),
+        account=account,
+        tags=tags,
+    )
+
+
+def test_rule_matcher():
+    matcher = RuleMatcher(
+        _rules(
+            ("uber", "Transport"),
+            ("UBER EATS", "Food"),
+            ("eats", "Food"),
+            ("he", "He"),
+            ("she", "She"),
+            ("hers", "Hers"),
+            ("", "Nothing"),
+        )
+    )
+    assert matcher.match("Uber *Trip") == {"Transport"}
+    assert matcher.match("uber eats 123") == {"Transport", "Food"}
+    # patterns ending inside others, or overlapping them
+    assert matcher.match("ushers") == {"He", "She", "Hers"}
+    assert matcher.match("Bakery") == set()
+    assert RuleMatcher([]).match("Uber") == set()
+
+
+def test_rule_matcher_matches_as_substring_checks():
+    rng = random.Random(7)
+    patterns = {
+        "".join(rng.choice("abc") for _ in range(rng.randint(1, 4)))
+        for _ in range(40)
+    }
+    matcher = RuleMatcher(_rules(*[(pattern, pattern) for pattern in patterns]))
+    for _ in range(200):
+        text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 12)))
+        assert matcher.match(text) == {
+            pattern for pattern in patterns if pattern in text
+        }
+
+
+def test_auto_tagging_tags_records(account):
+    repository = TaggingRulesRepositoryMock()
+    repository.get_all = MagicMock(
+        return_value=_rules(("uber", "Transport"), ("eats", "Food"))
+    )
+    use_cases = AutoTaggingUseCases(repository, RuleMatchers())
+    records = [
+        _expense(account, "UBER EATS", [Tag("Work", "#FF0000")]),
+        _expense(account, "Uber trip", [Tag("Transport", "#00FF00")]),
+        _expense(account, "Bakery"),
+    ]
+    tagged_records = use_cases.tag_records(records)
+    assert [record.tags for record in tagged_records] == [
+        [Tag("Food"), Tag("Transport"), Tag("Work", "#FF0000")],
+        [Tag("Transport", "#00FF00")],
+        None,
+    ]
+    assert tagged_records[1] is records[1]
+    # compiled once for the user
+    repository.get_all.assert_called_once_with(account.user_id)
+
+
+def test_auto_tagging_rule_writes_invalidate_matcher(account):
+    repository = TaggingRulesRepositoryMock()
+    repository.get_all = MagicMock(return_value=_rules(("uber", "Transport")))
+    repository.create = MagicMock(
+        return_value=TaggingRule("2", "eats", Tag("Food"))
+    )
+    repository.delete = MagicMock()
+    use_cases = AutoTaggingUseCases(repository, RuleMatchers())
+    user_id = account.user_id
+    assert use_cases.get_matcher(user_id).match("uber eats") == {"Transport"}
+
+    use_cases.create_rule(user_id, "eats", "Food")
+    repository.get_all.return_value = _rules(
+        ("uber", "Transport"), ("eats", "Food")
+    )
+    assert use_cases.get_matcher(user_id).match("uber eats") == {
+        "Transport",
+        "Food",
+    }
+    use_cases.delete_rule(user_id, "2")
+    repository.get_all.return_value = _rules(("uber", "Transport"))
+    assert use_cases.get_matcher(user_id).match("uber eats") == {"Transport"}
+    assert repository.get_all.call_count == 3
+
+    with pytest.raises(InvalidTaggingRuleException):
+        use_cases.create_rule(user_id, "  ", "Food")
+
+
+def test_tag_writes_invalidate_matcher(account):
+    matchers = RuleMatchers()
+    load = MagicMock(return_value=RuleMatcher([]))
+    matchers.get(account.user_id, load)
+    TagsUseCases(
+        MagicMock(), user_id=account.user_id, rule_matchers=matchers
+    ).delete_tag("Transport")
+    matchers.get(account.user_id, load)
+    assert load.call_count == 2
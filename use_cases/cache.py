@@ -0,0 +1,50 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class UserCache(Generic[T]):
+    """
+    Values of the users used the latest, up to `max_size` of them. Writes to
+    what a value is loaded from must invalidate it. As the cache lives in the
+    process, writes made by other processes are only seen once the value is
+    older than `max_age` seconds and is loaded again.
+    """
+
+    def __init__(self, max_size: int = 128, max_age: float = 300):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.entries: OrderedDict[str, tuple[float, T]] = OrderedDict()
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def get(self, user_id: str, load: Callable[[], T]) -> T:
+        with self.lock:
+            cached = self.entries.get(user_id)
+            if cached is not None and time.monotonic() - cached[0] < (
+                self.max_age
+            ):
+                self.entries.move_to_end(user_id)
+                return cached[1]
+            invalidations = self.invalidations
+        loaded_at = time.monotonic()
+        value = load()
+        with self.lock:
+            # a value loaded during a write may miss it, so it is used but
+            # not kept
+            if invalidations == self.invalidations:
+                self.entries[user_id] = (loaded_at, value)
+                self.entries.move_to_end(user_id)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *user_ids: str) -> None:
+        with self.lock:
+            self.invalidations += 1
+            for user_id in user_ids:
+                self.entries.pop(user_id, None)
@@ -0,0 +1,176 @@
+from collections.abc import Callable, Iterable
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Protocol, TypeVar
+
+from entities.entities import Account, Record, Tag
+
+T = TypeVar("T")
+
+
+class ChangeKind(Enum):
+    ACCOUNT = 0
+    RECORD = 1
+    TAG = 2
+
+
+class Operation(Enum):
+    UPSERT = 0
+    DELETE = 1
+
+
+@dataclass(frozen=True)
+class Change:
+    """
+    A write to one object of a user. `data` holds the object as it was left
+    by the write, as JSON, and the `sequence` of the changes of a user tells
+    the order they happened in.
+    """
+
+    user_id: str
+    kind: ChangeKind
+    operation: Operation
+    object_id: str
+    data: dict[str, Any] | None = None
+    sequence: int | None = None
+
+
+class ChangeLog(Protocol):
+    def atomic(self) -> AbstractContextManager:
+        ...
+
+    def append(self, changes: Iterable[Change]) -> None:
+        ...
+
+    def get_after(
+        self, user_id: str, sequence: int, limit: int = 500
+    ) -> list[Change]:
+        ...
+
+
+def atomic(change_log: ChangeLog | None) -> AbstractContextManager:
+    """
+    The context use cases write in, so that a write and its changes are
+    either both kept or both lost
+    """
+    return change_log.atomic() if change_log is not None else nullcontext()
+
+
+def logged(
+    change_log: ChangeLog | None,
+    write: Callable[[], T],
+    changes: Callable[[T], list[Change]],
+) -> T:
+    """
+    It runs `write` and appends the changes it made to the log, if there is
+    one, in the same transaction
+    """
+    with atomic(change_log):
+        result = write()
+        if change_log is not None:
+            change_log.append(changes(result))
+    return result
+
+
+def account_change(
+    account: Account, operation: Operation = Operation.UPSERT
+) -> Change:
+    return Change(
+        account.user_id,
+        ChangeKind.ACCOUNT,
+        operation,
+        str(account.id),
+        {
+            "id": account.id,
+            "name": account.name,
+            "balance": str(account.balance),
+            "version": account.version,
+        },
+    )
+
+
+def record_change(
+    record: Record, operation: Operation = Operation.UPSERT
+) -> Change:
+    return Change(
+        record.account.user_id,
+        ChangeKind.RECORD,
+        operation,
+        str(record.id),
+        {
+            "id": record.id,
+            "description": record.description,
+            "value": str(record.value),
+            "date": record.date.isoformat(),
+            "type": record.type.name,
+            "account": record.account.id,
+            "tags": [
+                {"name": tag.name, "color": tag.color}
+                for tag in record.tags or []
+            ],
+            "version": record.version,
+        },
+    )
+
+
+def account_record_deletion(account: Account, record_id: str) -> Change:
+    """
+    The deletion of a record removed along with its account, which is only
+    known by its id
+    """
+    return Change(
+        account.user_id,
+        ChangeKind.RECORD,
+        Operation.DELETE,
+        str(record_id),
+        {"id": record_id, "account": account.id},
+    )
+
+
+def record_changes(
+    records: list[Record],
+    operation: Operation = Operation.UPSERT,
+    accounts: Iterable[Account] | None = None,
+) -> list[Change]:
+    """
+    The changes of the records plus the ones of the accounts whose balances
+    they moved: `accounts`, as the write returned them, or else the accounts
+    of the records, which are all a creation moves
+    """
+    if accounts is None:
+        accounts = [record.account for record in records]
+    by_id = {account.id: account for account in accounts}
+    return [
+        *[record_change(record, operation) for record in records],
+        *[account_change(account) for account in by_id.values()],
+    ]
+
+
+def tag_change(
+    user_id: str, tag: Tag, operation: Operation = Operation.UPSERT
+) -> Change:
+    return Change(
+        user_id,
+        ChangeKind.TAG,
+        operation,
+        tag.name,
+        {"name": tag.name, "color": tag.color},
+    )
+
+
+class ChangeUseCases:
+    def __init__(self, change_log: ChangeLog):
+        self.change_log = change_log
+
+    def get_changes(
+        self, user_id: str, after: int = 0, limit: int = 500
+    ) -> list[Change]:
+        """
+        It returns up to `limit` changes of the user, in the order they were
+        made, starting right after the `after` sequence number. A client in
+        sync up to a sequence only needs what came after it.
+
+        :return: list[Change] or []
+        """
+        return self.change_log.get_after(user_id, after, limit)
@@ -0,0 +1,181 @@
+import uuid
+from collections.abc import Iterable
+from contextlib import nullcontext
+from dataclasses import replace
+from datetime import UTC, datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+
+from entities.entities import Account, Expense, Tag
+from use_cases.accounts.accounts import AccountUseCases
+from use_cases.changes.changes import (
+    Change,
+    ChangeKind,
+    ChangeUseCases,
+    Operation,
+    record_changes,
+)
+from use_cases.records.records import RecordsUpdate, RecordUseCases
+from use_cases.tags.tags import TagsUseCases
+
+
+class ChangeLogMock:
+    def atomic(self):
+        return nullcontext()
+
+    def append(self, changes: Iterable[Change]) -> None:
+        ...
+
+    def get_after(  # type: ignore
+        self, user_id: str, sequence: int, limit: int = 500
+    ) -> list[Change]:
+        ...
+
+
+@pytest.fixture(scope="function")
+def change_log():
+    change_log = ChangeLogMock()
+    change_log.append = MagicMock()  # type: ignore
+    return change_log
+
+
+@pytest.fixture(scope="function")
+def account():
+    return Account(
+        str(uuid.uuid4()),
+        Decimal("-10.34"),
+        user_id=str(uuid.uuid4()),
+        name="Main",
+        version=1,
+    )
+
+
+@pytest.fixture(scope="function")
+def record(account):
+    return Expense(
+        str(uuid.uuid4()),
+        "Water",
+        Decimal("10.34"),
+        datetime(2023, 4, 8, tzinfo=UTC),
+        account=account,
+        tags=[Tag("Bills", "#FF0000")],
+        version=1,
+    )
+
+
+def _appended(change_log):
+    return [
+        (change.kind, change.operation, change.object_id)
+        for call in change_log.append.mock_calls
+        for change in call.args[0]
+    ]
+
+
+def test_record_changes_include_their_accounts(record, account):
+    changes = record_changes([record, record])
+    assert [(change.kind, change.object_id) for change in changes] == [
+        (ChangeKind.RECORD, record.id),
+        (ChangeKind.RECORD, record.id),
+        (ChangeKind.ACCOUNT, account.id),
+    ]
+    assert changes[0].user_id == account.user_id
+    assert changes[0].data == {
+        "id": record.id,
+        "description": "Water",
+        "value": "10.34",
+        "date": "2023-04-08T00:00:00+00:00",
+        "type": "EXPENSE",
+        "account": account.id,
+        "tags": [{"name": "Bills", "color": "#FF0000"}],
+        "version": 1,
+    }
+    assert changes[2].data == {
+        "id": account.id,
+        "name": "Main",
+        "balance": "-10.34",
+        "version": 1,
+    }
+
+
+def test_record_use_cases_log_their_writes(change_log, record, account):
+    records_repository = MagicMock()
+    records_repository.create = MagicMock(return_value=record)
+    records_repository.get = MagicMock(return_value=record)
+    records_repository.delete = MagicMock(return_value=[account])
+    use_cases = RecordUseCases(records_repository, change_log)
+    use_cases.create_record(record)
+    use_cases.delete_record(record.id)
+    assert _appended(change_log) == [
+        (ChangeKind.RECORD, Operation.UPSERT, record.id),
+        (ChangeKind.ACCOUNT, Operation.UPSERT, account.id),
+        (ChangeKind.RECORD, Operation.DELETE, record.id),
+        (ChangeKind.ACCOUNT, Operation.UPSERT, account.id),
+    ]
+    records_repository.delete.assert_called_once_with(record.id)
+
+
+def test_record_updates_log_every_account_moved(change_log, record, account):
+    savings = replace(account, id=str(uuid.uuid4()), name="Savings")
+    moved_record = replace(record, account=savings)
+    records_repository = MagicMock()
+    records_repository.update_many = MagicMock(
+        return_value=RecordsUpdate([moved_record], [account, savings])
+    )
+    use_cases = RecordUseCases(records_repository, change_log)
+    assert use_cases.update_record(moved_record) == moved_record
+    assert _appended(change_log) == [
+        (ChangeKind.RECORD, Operation.UPSERT, record.id),
+        (ChangeKind.ACCOUNT, Operation.UPSERT, account.id),
+        (ChangeKind.ACCOUNT, Operation.UPSERT, savings.id),
+    ]
+
+
+def test_failed_writes_are_not_logged(change_log, record):
+    records_repository = MagicMock()
+    records_repository.update_many = MagicMock(side_effect=ValueError)
+    use_cases = RecordUseCases(records_repository, change_log)
+    with pytest.raises(ValueError):
+        use_cases.update_record(record)
+    change_log.append.assert_not_called()
+
+
+def test_account_use_cases_log_their_writes(change_log, account):
+    account_repository = MagicMock()
+    account_repository.update = MagicMock(return_value=account)
+    account_repository.adjust_balance = MagicMock(return_value=account)
+    account_repository.get = MagicMock(return_value=account)
+    account_repository.delete = MagicMock(return_value=["7"])
+    use_cases = AccountUseCases(account_repository, change_log)
+    use_cases.update_account(account.id, account)
+    use_cases.adjust_balance(account.id, Decimal("42.00"))
+    use_cases.delete_account(account.id)
+    assert _appended(change_log) == [
+        (ChangeKind.ACCOUNT, Operation.UPSERT, account.id),
+        (ChangeKind.ACCOUNT, Operation.UPSERT, account.id),
+        (ChangeKind.RECORD, Operation.DELETE, "7"),
+        (ChangeKind.ACCOUNT, Operation.DELETE, account.id),
+    ]
+
+
+def test_tags_use_cases_log_renames_as_replacing_tags(change_log):
+    tag_service = MagicMock()
+    tag_service.get_tag = MagicMock(return_value=Tag("Bills", "#FF0000"))
+    tag_service.rename = MagicMock(return_value=2)
+    use_cases = TagsUseCases(tag_service, change_log, user_id="1")
+    use_cases.update_tag_name("Bills", "House")
+    assert _appended(change_log) == [
+        (ChangeKind.TAG, Operation.DELETE, "Bills"),
+        (ChangeKind.TAG, Operation.UPSERT, "House"),
+    ]
+    deleted = change_log.append.call_args.args[0][0]
+    assert deleted.user_id == "1"
+    assert deleted.data == {"name": "Bills", "replaced_by": "House"}
+
+
+def test_get_changes_use_case(change_log):
+    change_log.get_after = MagicMock(return_value=[])
+    use_cases = ChangeUseCases(change_log)
+    assert use_cases.get_changes("1", after=10, limit=5) == []
+    change_log.get_after.assert_called_once_with("1", 10, 5)
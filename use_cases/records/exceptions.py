@@ -4,3 +4,11 @@ class RecordMissingIdException(Exception):
 
 class RecordNotFoundException(Exception):
     msg = "record's not found"
+
+
+class RecordVersionConflictException(Exception):
+    msg = "record was changed by someone else since it was read"
+
+
+class InvalidStatementException(Exception):
+    msg = "statement could not be parsed"
@@ -0,0 +1,344 @@
+import csv
+import os
+import re
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from multiprocessing import Manager
+from typing import TextIO
+
+from entities.entities import Account, Expense, Income, Record
+from use_cases.autotagging.autotagging import AutoTaggingUseCases
+from use_cases.records.exceptions import InvalidStatementException
+from use_cases.records.records import RecordUseCases, batched
+
+
+@dataclass(frozen=True)
+class CsvFormat:
+    date_column: str = "date"
+    description_column: str = "description"
+    value_column: str = "value"
+    date_format: str = "%Y-%m-%d"
+    delimiter: str = ","
+    decimal_separator: str = "."
+    thousands_separator: str = ""
+
+
+DEFAULT_CSV_FORMAT = CsvFormat()
+
+
+@dataclass(frozen=True)
+class ImportProgress:
+    path: str
+    batch: int
+    records_read: int
+    records_created: int
+
+
+@dataclass(frozen=True)
+class ImportResult:
+    records_read: int = 0
+    records_created: int = 0
+
+
+def to_record(
+    account: Account, description: str, value: Decimal, date: datetime
+) -> Record:
+    """
+    Statements sign their values, so negative ones are expenses
+    """
+    record_class = Expense if value < 0 else Income
+    return record_class(
+        None, description.strip(), abs(value), date, account=account
+    )
+
+
+def parse_csv(
+    stream: TextIO, account: Account, csv_format: CsvFormat = DEFAULT_CSV_FORMAT
+) -> Iterator[Record]:
+    """
+    It yields the records of a CSV statement one row at a time
+
+    :raises: InvalidStatementException
+    """
+    reader = csv.DictReader(stream, delimiter=csv_format.delimiter)
+    for row in reader:
+        try:
+            value = row[csv_format.value_column].strip()
+            if csv_format.thousands_separator:
+                value = value.replace(csv_format.thousands_separator, "")
+            value = value.replace(csv_format.decimal_separator, ".")
+            date = datetime.strptime(
+                row[csv_format.date_column].strip(), csv_format.date_format
+            )
+            yield to_record(
+                account,
+                row[csv_format.description_column],
+                Decimal(value),
+                date if date.tzinfo else date.replace(tzinfo=UTC),
+            )
+        except (KeyError, AttributeError, ValueError, InvalidOperation) as e:
+            raise InvalidStatementException(
+                f"line {reader.line_num}: {e!r}"
+            ) from e
+
+
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)[^>]*>([^<]*)")
+OFX_DATE = re.compile(
+    r"(\d{8})(\d{6})?(?:\.\d+)?(?:\[([+-]?\d+(?:\.\d+)?)(?::\w+)?\])?"
+)
+
+
+def ofx_elements(
+    stream: TextIO, chunk_size: int = 64 * 1024
+) -> Iterator[tuple[bool, str, str]]:
+    """
+    It yields (is_closing, tag, text) for every tag of an OFX file, reading
+    it in chunks as OFX files may hold the whole statement in a single line.
+    Both SGML (OFX 1.x) and XML (OFX 2.x) files are supported.
+    """
+    pending = ""
+    while chunk := stream.read(chunk_size):
+        pending += chunk
+        # the last tag may still be incomplete, so it waits for the next chunk
+        last_tag = pending.rfind("<")
+        for match in OFX_TAG.finditer(pending, 0, max(last_tag, 0)):
+            yield match.group(1) == "/", match.group(2).upper(), match.group(3)
+        pending = pending[max(last_tag, 0) :]
+    for match in OFX_TAG.finditer(pending):
+        yield match.group(1) == "/", match.group(2).upper(), match.group(3)
+
+
+def parse_ofx_date(value: str) -> datetime:
+    match = OFX_DATE.match(value.strip())
+    if not match:
+        raise ValueError(f"invalid OFX date {value!r}")
+    day, time, offset = match.groups()
+    date = datetime.strptime(day + (time or "000000"), "%Y%m%d%H%M%S")
+    tz = timezone(timedelta(hours=float(offset))) if offset is not None else UTC
+    return date.replace(tzinfo=tz)
+
+
+def parse_ofx(stream: TextIO, account: Account) -> Iterator[Record]:
+    """
+    It yields the records of an OFX statement one transaction at a time
+
+    :raises: InvalidStatementException
+    """
+    transaction: dict[str, str] | None = None
+    for is_closing, tag, text in ofx_elements(stream):
+        if tag == "STMTTRN":
+            if not is_closing:
+                transaction = {}
+                continue
+            if transaction is None:
+                continue
+            try:
+                yield to_record(
+                    account,
+                    transaction.get("NAME") or transaction.get("MEMO") or "",
+                    Decimal(transaction["TRNAMT"].replace(",", ".")),
+                    parse_ofx_date(transaction["DTPOSTED"]),
+                )
+            except (KeyError, ValueError, InvalidOperation) as e:
+                raise InvalidStatementException(
+                    f"transaction {transaction.get('FITID', '')}: {e!r}"
+                ) from e
+            transaction = None
+        elif transaction is not None and not is_closing:
+            transaction[tag] = text.strip()
+
+
+def parse_statement(
+    path: str,
+    account: Account,
+    csv_format: CsvFormat = DEFAULT_CSV_FORMAT,
+    encoding: str = "utf-8",
+) -> Iterator[Record]:
+    """
+    It yields the records of the statement at `path`, guessing its format
+    from its extension, without ever loading the whole file
+
+    :raises: InvalidStatementException
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in (".csv", ".ofx", ".qfx"):
+        raise InvalidStatementException(f"unsupported statement {path}")
+    with open(path, newline="", encoding=encoding, errors="replace") as stream:
+        if extension == ".csv":
+            yield from parse_csv(stream, account, csv_format)
+        else:
+            yield from parse_ofx(stream, account)
+
+
+# put by the workers once they are done with their statement
+DONE = "done"
+
+
+def parse_into_queue(
+    path: str,
+    account: Account,
+    csv_format: CsvFormat,
+    encoding: str,
+    batch_size: int,
+    queue,
+    stop,
+) -> None:
+    try:
+        for batch in batched(
+            parse_statement(path, account, csv_format, encoding), batch_size
+        ):
+            if stop.is_set():
+                return
+            queue.put((path, batch))
+    finally:
+        queue.put((path, DONE))
+
+
+class StatementImporter:
+    """
+    It imports bank statements as records. Statements are parsed as streams
+    and written in batches of `batch_size` records, so memory use doesn't
+    depend on the size of the statements. Unless `skip_duplicates` is False,
+    records already stored, as from overlapping statements, are left out.
+    """
+
+    def __init__(
+        self,
+        record_use_cases: RecordUseCases,
+        batch_size: int = 500,
+        csv_format: CsvFormat = DEFAULT_CSV_FORMAT,
+        encoding: str = "utf-8",
+        skip_duplicates: bool = True,
+        auto_tagging: AutoTaggingUseCases | None = None,
+    ):
+        """
+        :param auto_tagging: the records are tagged by the rules of the
+            owner of the account before being written
+        """
+        self.record_use_cases = record_use_cases
+        self.batch_size = batch_size
+        self.csv_format = csv_format
+        self.encoding = encoding
+        self.skip_duplicates = skip_duplicates
+        self.auto_tagging = auto_tagging
+
+    def _write(
+        self,
+        path: str,
+        batch_number: int,
+        batch: list[Record],
+        result: ImportResult,
+        on_progress: Callable[[ImportProgress], None] | None,
+    ) -> ImportResult:
+        if self.auto_tagging is not None:
+            batch = self.auto_tagging.tag_records(batch)
+        created_records = self.record_use_cases.create_records(
+            batch, skip_duplicates=self.skip_duplicates
+        )
+        result = ImportResult(
+            records_read=result.records_read + len(batch),
+            records_created=result.records_created + len(created_records),
+        )
+        if on_progress is not None:
+            on_progress(
+                ImportProgress(
+                    path=path,
+                    batch=batch_number,
+                    records_read=result.records_read,
+                    records_created=result.records_created,
+                )
+            )
+        return result
+
+    def import_statement(
+        self,
+        path: str,
+        account: Account,
+        on_progress: Callable[[ImportProgress], None] | None = None,
+    ) -> ImportResult:
+        """
+        It imports the statement at `path` into the account, one batch of
+        records at a time, calling `on_progress` after every batch
+
+        :return: ImportResult
+        :raises: InvalidStatementException, MissingAccountException
+        """
+        result = ImportResult()
+        records = parse_statement(path, account, self.csv_format, self.encoding)
+        for batch_number, batch in enumerate(
+            batched(records, self.batch_size), start=1
+        ):
+            result = self._write(path, batch_number, batch, result, on_progress)
+        return result
+
+    def import_statements(
+        self,
+        paths: list[str],
+        account: Account,
+        on_progress: Callable[[ImportProgress], None] | None = None,
+        processes: int | None = None,
+    ) -> dict[str, ImportResult]:
+        """
+        It imports many statements into the account. They are parsed in
+        parallel by a pool of processes, while their records are written
+        by the calling one as soon as each batch is ready. At most two
+        batches per process wait to be written at any time.
+
+        :return: dict[str, ImportResult] with the result of each statement
+        :raises: InvalidStatementException, MissingAccountException
+        """
+        if len(paths) <= 1:
+            return {
+                path: self.import_statement(path, account, on_progress)
+                for path in paths
+            }
+
+        processes = min(processes or os.cpu_count() or 1, len(paths))
+        results = {path: ImportResult() for path in paths}
+        batch_numbers = {path: 0 for path in paths}
+        with Manager() as manager, ProcessPoolExecutor(processes) as pool:
+            queue = manager.Queue(maxsize=2 * processes)
+            stop = manager.Event()
+            futures = [
+                pool.submit(
+                    parse_into_queue,
+                    path,
+                    account,
+                    self.csv_format,
+                    self.encoding,
+                    self.batch_size,
+                    queue,
+                    stop,
+                )
+                for path in paths
+            ]
+            pending = len(paths)
+            while pending:
+                path, batch = queue.get()
+                if batch == DONE:
+                    pending -= 1
+                elif not stop.is_set():
+                    batch_numbers[path] += 1
+                    try:
+                        results[path] = self._write(
+                            path,
+                            batch_numbers[path],
+                            batch,
+                            results[path],
+                            on_progress,
+                        )
+                    except Exception:
+                        # the workers must not be left blocked on a full
+                        # queue, so it is drained before raising
+                        stop.set()
+                        while pending:
+                            if queue.get()[1] == DONE:
+                                pending -= 1
+                        raise
+            for future in futures:
+                # it raises the parsing errors of the workers, if any
+                future.result()
+        return results
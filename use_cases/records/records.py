@@ -1,34 +1,497 @@
-from typing import Protocol
+import hashlib
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from decimal import Decimal
+from functools import partial
+from itertools import islice
+from typing import Protocol, TypeVar
 
-from entities.entities import Record
+from entities.entities import Account, Record, RecordBatch, RecordType
+from use_cases.analytics.analytics import CubeCache
+from use_cases.changes.changes import (
+    Change,
+    ChangeLog,
+    Operation,
+    account_change,
+    atomic,
+    logged,
+    record_change,
+    record_changes,
+)
+from use_cases.retry import retry_on_conflict
+
+T = TypeVar("T")
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def signed_value(record_type: RecordType, value: Decimal) -> Decimal:
+    """
+    It returns how much a record changes the balance of its account:
+    expenses subtract their value and incomes add it
+    """
+    return value if record_type is RecordType.INCOME else -value
+
+
+def fingerprint(
+    account_id: str,
+    date: datetime,
+    record_type: RecordType,
+    value: Decimal,
+    description: str,
+) -> str:
+    """
+    It identifies what a bank statement would show for a record, so the same
+    record imported twice from overlapping statements has the same
+    fingerprint. Descriptions are compared ignoring case and spacing.
+    """
+    key = "|".join(
+        [
+            str(account_id),
+            date.astimezone(UTC).isoformat(),
+            str(signed_value(record_type, value).quantize(Decimal("0.01"))),
+            " ".join(description.casefold().split()),
+        ]
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def record_fingerprint(record: Record) -> str:
+    return fingerprint(
+        str(record.account.id),
+        record.date,
+        record.type,
+        record.value,
+        record.description,
+    )
+
+
+@dataclass(frozen=True)
+class RecordSelection:
+    """
+    The records of a user matching every filter given. With `ids`, only
+    the ones among them. Both `since` and `until` are inclusive, and the
+    description matches any starting with `description`, ignoring case.
+    """
+
+    user_id: str
+    ids: list[str] | None = None
+    account_id: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+    description: str | None = None
+
+
+@dataclass(frozen=True)
+class Retagging:
+    # the records whose tags changed, as they were left
+    records: list[Record] = field(default_factory=list)
+    added: int = 0
+    removed: int = 0
+
+
+@dataclass(frozen=True)
+class TaggingResult:
+    records_matched: int = 0
+    records_changed: int = 0
+    tags_added: int = 0
+    tags_removed: int = 0
+
+
+@dataclass(frozen=True)
+class RecordsUpdate:
+    records: list[Record] = field(default_factory=list)
+    # every account whose balance the update moved, as it was left, which
+    # includes the ones records were moved out of
+    accounts: list[Account] = field(default_factory=list)
+
+
+def update_changes(update: RecordsUpdate) -> list[Change]:
+    return record_changes(update.records, accounts=update.accounts)
+
+
+def retagging_changes(retagging: Retagging) -> list[Change]:
+    # the balances are left as they were, unlike in record_changes
+    return [record_change(record) for record in retagging.records]
 
 
 class RecordsRepository(Protocol):
     def create(self, record: Record) -> Record:
         ...
 
-    def update(self, record: Record) -> Record:
+    def create_many(self, records: Iterable[Record]) -> list[Record]:
+        ...
+
+    def update_many(self, records: Iterable[Record]) -> RecordsUpdate:
         ...
 
-    def delete(self, id: str) -> None:
+    def delete(self, id: str) -> list[Account]:
+        """
+        :return: list[Account] whose balances the deletion moved, as it
+            left them
+        """
         ...
 
     def get(self, id: str) -> Record:
         ...
 
+    def get_page(
+        self,
+        user_id: str,
+        account_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        after: tuple[datetime, str] | None = None,
+        limit: int = 100,
+    ) -> list[Record]:
+        ...
+
+    def get_batch(
+        self,
+        user_id: str,
+        account_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> RecordBatch:
+        ...
+
+    def search(
+        self,
+        user_id: str,
+        text: str,
+        account_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        tag: str | None = None,
+        limit: int = 50,
+    ) -> list[Record]:
+        ...
+
+    def get_existing_fingerprints(self, fingerprints: Iterable[str]) -> set[str]:
+        ...
+
+    def get_ids(
+        self,
+        selection: RecordSelection,
+        after: str | None = None,
+        limit: int = 500,
+    ) -> list[str]:
+        ...
+
+    def retag(
+        self,
+        user_id: str,
+        ids: list[str],
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+    ) -> Retagging:
+        ...
+
 
 class RecordUseCases:
-    def __init__(self, service: RecordsRepository):
+    """
+    Every write applies the signed value of the records involved to the
+    balance of their accounts, atomically with the write itself, so reading
+    a balance never needs to go through the records of the account.
+    """
+
+    page_size = 500
+    tagging_batch_size = 500
+
+    def __init__(
+        self,
+        service: RecordsRepository,
+        change_log: ChangeLog | None = None,
+        cubes: CubeCache | None = None,
+    ):
         self.service = service
+        self.change_log = change_log
+        self.cubes = cubes
+
+    def _written(self, records: list[Record]) -> list[Record]:
+        """
+        It invalidates the analytics cubes of the owners of the records
+        written, once the write is done, so they are loaded again with it
+        """
+        if self.cubes is not None:
+            self.cubes.invalidate(
+                *{record.account.user_id for record in records}
+            )
+        return records
 
     def create_record(self, record: Record) -> Record:
-        return self.service.create(record)
+        created_record = logged(
+            self.change_log,
+            lambda: self.service.create(record),
+            lambda created_record: record_changes([created_record]),
+        )
+        self._written([created_record])
+        return created_record
+
+    def create_records(
+        self, records: Iterable[Record], skip_duplicates: bool = False
+    ) -> list[Record]:
+        """
+        It creates all the given records at once, in a single transaction:
+        either every record is created or none is. With `skip_duplicates`,
+        the records already stored are left out, see find_duplicates.
+
+        :param records:
+        :param skip_duplicates:
+        :return: list[Record] with the records created
+        :raises: MissingAccountException, MissingTagException
+        """
+        if skip_duplicates:
+            records = list(records)
+            duplicates = self.find_duplicates(records)
+            records = [
+                record
+                for record, is_duplicate in zip(records, duplicates, strict=True)
+                if not is_duplicate
+            ]
+        return self._written(
+            logged(
+                self.change_log,
+                lambda: self.service.create_many(records),
+                record_changes,
+            )
+        )
+
+    def find_duplicates(self, records: Iterable[Record]) -> list[bool]:
+        """
+        It flags the records that match an already stored one by their
+        fingerprint, looking the whole batch up at once. Records repeated
+        within the batch are not flagged, as a statement may legitimately
+        list two equal records.
+
+        :param records:
+        :return: list[bool] in the same order as `records`
+        """
+        fingerprints = [record_fingerprint(record) for record in records]
+        existing = self.service.get_existing_fingerprints(fingerprints)
+        return [fingerprint in existing for fingerprint in fingerprints]
 
     def update_record(self, record: Record) -> Record:
-        return self.service.update(record)
+        """
+        When the record carries a version, it is only updated if it is still
+        at that version, so updates made since it was read aren't lost
+
+        :param record:
+        :return: Record with its new version
+        :raises: RecordMissingIdException, RecordNotFoundException,
+            RecordVersionConflictException, MissingAccountException,
+            MissingTagException
+        """
+        update = logged(
+            self.change_log,
+            lambda: self.service.update_many([record]),
+            update_changes,
+        )
+        self._written(update.records)
+        return update.records[0]
+
+    def change_record(
+        self, id: str, change: Callable[[Record], Record], attempts: int = 3
+    ) -> Record:
+        """
+        It reads the record, applies `change` to it and updates it at the
+        version read, reading and changing it again on conflicts
+
+        :param id:
+        :param change: it returns the changed record, keeping its version
+        :param attempts:
+        :return: Record
+        :raises: RecordNotFoundException, RecordVersionConflictException
+        """
+        return retry_on_conflict(
+            lambda: self.update_record(change(self.get(id))), attempts
+        )
+
+    def update_records(self, records: Iterable[Record]) -> list[Record]:
+        """
+        It updates all the given records at once, in a single transaction:
+        either every record is updated or none is
+
+        :param records:
+        :return: list[Record]
+        :raises: RecordMissingIdException, RecordNotFoundException,
+            RecordVersionConflictException, MissingAccountException,
+            MissingTagException
+        """
+        return self._written(
+            logged(
+                self.change_log,
+                lambda: self.service.update_many(records),
+                update_changes,
+            ).records
+        )
 
     def delete_record(self, id: str):
-        self.service.delete(id)
+        """
+        The change logged keeps the record as it was before being deleted
+
+        :raises: RecordNotFoundException
+        """
+        if self.change_log is None and self.cubes is None:
+            self.service.delete(id)
+            return
+        with atomic(self.change_log):
+            record = self.service.get(id)
+            accounts = self.service.delete(id)
+            if self.change_log is not None:
+                self.change_log.append(
+                    [
+                        record_change(record, Operation.DELETE),
+                        *map(account_change, accounts),
+                    ]
+                )
+        self._written([record])
+
+    def tag_records(
+        self,
+        selection: RecordSelection,
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+    ) -> TaggingResult:
+        """
+        It adds the tags named in `add` to the records selected and removes
+        the ones named in `remove`, a tag named in both being removed. The
+        records are retagged `tagging_batch_size` at a time, each batch in
+        its own transaction with a fixed number of statements, so locks are
+        held briefly however many records are selected. An interrupted run
+        keeps the batches done so far, and running it again is harmless.
+
+        :param selection:
+        :param add: names of tags of the user
+        :param remove: names of tags of the user
+        :return: TaggingResult
+        :raises: MissingTagException
+        """
+        remove = set(remove)
+        add = set(add) - remove
+        matched = changed = added = removed = 0
+        after = None
+        while ids := self.service.get_ids(
+            selection, after=after, limit=self.tagging_batch_size
+        ):
+            retagging = logged(
+                self.change_log,
+                partial(self.service.retag, selection.user_id, ids, add, remove),
+                retagging_changes,
+            )
+            self._written(retagging.records)
+            matched += len(ids)
+            changed += len(retagging.records)
+            added += retagging.added
+            removed += retagging.removed
+            after = ids[-1]
+        return TaggingResult(matched, changed, added, removed)
 
     def get(self, id: str) -> Record:
         return self.service.get(id)
+
+    def get_records_page(
+        self,
+        user: str,
+        account: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        after: tuple[datetime, str] | None = None,
+        limit: int = 100,
+    ) -> list[Record]:
+        """
+        It returns up to `limit` records of the user ordered by (date, id),
+        starting right after the (date, id) given by `after`. Both `since`
+        and `until` are inclusive.
+
+        Pages are found by seeking the index on their keys instead of
+        skipping rows, so any page costs the same as the first one.
+
+        :return: list[Record] or []
+        """
+        return self.service.get_page(
+            user,
+            account_id=account,
+            since=since,
+            until=until,
+            after=after,
+            limit=limit,
+        )
+
+    def search_records(
+        self,
+        user: str,
+        text: str,
+        account: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        tag: str | None = None,
+        limit: int = 50,
+    ) -> list[Record]:
+        """
+        It returns up to `limit` of the user's records whose description has
+        words starting with every word of `text`, ignoring case, the most
+        relevant first, then the latest. The other filters narrow them
+        down; both `since` and `until` are inclusive.
+
+        The descriptions are searched through a full-text index, so the
+        search doesn't scan them.
+
+        :return: list[Record] or []
+        """
+        return self.service.search(
+            user,
+            text,
+            account_id=account,
+            since=since,
+            until=until,
+            tag=tag,
+            limit=limit,
+        )
+
+    def get_records_batch(
+        self,
+        user: str,
+        account: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> RecordBatch:
+        """
+        It returns every record of the user ordered by (date, id) at once,
+        stored column-wise, for bulk reads that need all of them in memory.
+        Both `since` and `until` are inclusive.
+
+        :return: RecordBatch
+        """
+        return self.service.get_batch(
+            user, account_id=account, since=since, until=until
+        )
+
+    def iter_records(
+        self,
+        user: str,
+        account: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Iterator[Record]:
+        """
+        It yields every record of the user ordered by (date, id), holding
+        only one page of `page_size` records in memory at a time
+
+        :return: Iterator[Record]
+        """
+        after = None
+        while True:
+            page = self.get_records_page(
+                user, account, since, until, after, self.page_size
+            )
+            yield from page
+            if len(page) < self.page_size:
+                return
+            last_record = page[-1]
+            after = (last_record.date, str(last_record.id))
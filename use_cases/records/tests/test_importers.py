@@ -0,0 +1,258 @@
+import uuid
+from datetime import UTC, datetime, timedelta, timezone
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import MagicMock
+
+import pytest
+
+from entities.entities import Account, Expense, Income, Tag, TaggingRule
+from use_cases.autotagging.autotagging import AutoTaggingUseCases, RuleMatchers
+from use_cases.records.exceptions import InvalidStatementException
+from use_cases.records.importers import (
+    CsvFormat,
+    ImportProgress,
+    ImportResult,
+    StatementImporter,
+    ofx_elements,
+    parse_ofx,
+    parse_ofx_date,
+    parse_statement,
+)
+
+OFX_SGML = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20230310120000[-3:BRT]
+<TRNAMT>-10,50<FITID>1<NAME>Water
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20230301<TRNAMT>1000.00<FITID>2
+<MEMO>Salary</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+OFX_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?><?OFX OFXHEADER="200"?><OFX>'
+    + "".join(
+        f"<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20230310</DTPOSTED>"
+        f"<TRNAMT>-{i}.00</TRNAMT><FITID>{i}</FITID><NAME>Coffee {i}</NAME>"
+        "</STMTTRN>"
+        for i in range(1, 6)
+    )
+    + "</OFX>"
+)
+
+
+@pytest.fixture(scope="function")
+def account():
+    return Account(
+        str(uuid.uuid4()),
+        Decimal("0.00"),
+        user_id=str(uuid.uuid4()),
+        name="Main",
+    )
+
+
+@pytest.fixture(scope="function")
+def record_use_cases():
+    record_use_cases = MagicMock()
+    record_use_cases.create_records = MagicMock(
+        side_effect=lambda records, skip_duplicates: list(records)
+    )
+    return record_use_cases
+
+
+def _write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+def test_parse_csv_statement(tmp_path, account):
+    path = _write(
+        tmp_path,
+        "statement.csv",
+        "date;description;value\n"
+        "10/03/2023;Water;-1.010,50\n"
+        "01/03/2023; Salary ;1.000,00\n",
+    )
+    records = list(
+        parse_statement(
+            path,
+            account,
+            CsvFormat(
+                date_format="%d/%m/%Y",
+                delimiter=";",
+                decimal_separator=",",
+                thousands_separator=".",
+            ),
+        )
+    )
+    assert records == [
+        Expense(
+            None,
+            "Water",
+            Decimal("1010.50"),
+            datetime(2023, 3, 10, tzinfo=UTC),
+            account=account,
+        ),
+        Income(
+            None,
+            "Salary",
+            Decimal("1000.00"),
+            datetime(2023, 3, 1, tzinfo=UTC),
+            account=account,
+        ),
+    ]
+
+
+def test_parse_ofx_sgml_statement(tmp_path, account):
+    path = _write(tmp_path, "statement.ofx", OFX_SGML)
+    records = list(parse_statement(path, account))
+    assert records == [
+        Expense(
+            None,
+            "Water",
+            Decimal("10.50"),
+            datetime(2023, 3, 10, 12, tzinfo=timezone(timedelta(hours=-3))),
+            account=account,
+        ),
+        Income(
+            None,
+            "Salary",
+            Decimal("1000.00"),
+            datetime(2023, 3, 1, tzinfo=UTC),
+            account=account,
+        ),
+    ]
+
+
+def test_parse_ofx_xml_statement_in_small_chunks(account):
+    assert list(ofx_elements(StringIO(OFX_XML), chunk_size=7)) == list(
+        ofx_elements(StringIO(OFX_XML))
+    )
+    records = list(parse_ofx(StringIO(OFX_XML), account))
+    assert [record.description for record in records] == [
+        f"Coffee {i}" for i in range(1, 6)
+    ]
+    assert all(isinstance(record, Expense) for record in records)
+
+
+def test_parse_ofx_date():
+    assert parse_ofx_date("20230310") == datetime(2023, 3, 10, tzinfo=UTC)
+    assert parse_ofx_date("20230310235959.000[+5.5:IST]") == datetime(
+        2023, 3, 10, 23, 59, 59, tzinfo=timezone(timedelta(hours=5.5))
+    )
+    with pytest.raises(ValueError):
+        parse_ofx_date("03/10/2023")
+
+
+def test_parse_invalid_statements(tmp_path, account):
+    with pytest.raises(InvalidStatementException):
+        list(parse_statement(_write(tmp_path, "statement.pdf", ""), account))
+    with pytest.raises(InvalidStatementException):
+        list(
+            parse_statement(
+                _write(
+                    tmp_path, "statement.csv", "date,value\n2023-03-10,1.00\n"
+                ),
+                account,
+            )
+        )
+    with pytest.raises(InvalidStatementException):
+        list(
+            parse_statement(
+                _write(
+                    tmp_path,
+                    "statement.ofx",
+                    "<OFX><STMTTRN><TRNAMT>abc<DTPOSTED>20230310</STMTTRN>",
+                ),
+                account,
+            )
+        )
+
+
+def test_import_statement_in_batches(tmp_path, account, record_use_cases):
+    path = _write(tmp_path, "statement.ofx", OFX_XML)
+    progress = MagicMock()
+    result = StatementImporter(record_use_cases, batch_size=2).import_statement(
+        path, account, on_progress=progress
+    )
+    assert result == ImportResult(records_read=5, records_created=5)
+    assert [
+        len(call.args[0]) for call in record_use_cases.create_records.mock_calls
+    ] == [2, 2, 1]
+    assert progress.call_args_list[-1].args[0] == ImportProgress(
+        path=path, batch=3, records_read=5, records_created=5
+    )
+
+
+def test_import_statement_tags_records_by_rules(
+    tmp_path, account, record_use_cases
+):
+    path = _write(tmp_path, "statement.ofx", OFX_SGML)
+    rules = MagicMock()
+    rules.get_all = MagicMock(
+        return_value=[TaggingRule("1", "water", Tag("Bills"))]
+    )
+    StatementImporter(
+        record_use_cases,
+        auto_tagging=AutoTaggingUseCases(rules, RuleMatchers()),
+    ).import_statement(path, account)
+    (records,) = record_use_cases.create_records.call_args.args
+    assert [record.tags for record in records] == [[Tag("Bills")], None]
+
+
+def test_import_statement_skips_duplicates(tmp_path, account):
+    path = _write(tmp_path, "statement.ofx", OFX_XML)
+    record_use_cases = MagicMock()
+    record_use_cases.create_records = MagicMock(
+        side_effect=lambda records, skip_duplicates: records[1:]
+    )
+    result = StatementImporter(record_use_cases).import_statement(path, account)
+    assert result == ImportResult(records_read=5, records_created=4)
+    assert record_use_cases.create_records.call_args.kwargs == {
+        "skip_duplicates": True
+    }
+
+
+def test_import_statements_in_parallel(tmp_path, account, record_use_cases):
+    paths = [
+        _write(tmp_path, "first.ofx", OFX_XML),
+        _write(tmp_path, "second.ofx", OFX_SGML),
+    ]
+    progress = MagicMock()
+    results = StatementImporter(
+        record_use_cases, batch_size=2
+    ).import_statements(paths, account, on_progress=progress, processes=2)
+    assert results == {
+        paths[0]: ImportResult(records_read=5, records_created=5),
+        paths[1]: ImportResult(records_read=2, records_created=2),
+    }
+    assert record_use_cases.create_records.call_count == 4
+    assert progress.call_count == 4
+
+
+def test_import_statements_raises_worker_errors(
+    tmp_path, account, record_use_cases
+):
+    paths = [
+        _write(tmp_path, "first.ofx", OFX_XML),
+        _write(tmp_path, "second.csv", "date,value\n2023-03-10,1.00\n"),
+    ]
+    with pytest.raises(InvalidStatementException):
+        StatementImporter(record_use_cases).import_statements(
+            paths, account, processes=2
+        )
+
+
+def test_import_statements_raises_write_errors(tmp_path, account):
+    record_use_cases = MagicMock()
+    record_use_cases.create_records = MagicMock(side_effect=RuntimeError)
+    paths = [_write(tmp_path, f"{i}.ofx", OFX_XML * 50) for i in range(4)]
+    with pytest.raises(RuntimeError):
+        StatementImporter(record_use_cases, batch_size=1).import_statements(
+            paths, account, processes=2
+        )
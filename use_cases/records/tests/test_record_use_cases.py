@@ -1,16 +1,33 @@
 import uuid
-from datetime import datetime
+from collections.abc import Iterable
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta, timezone
 from decimal import Decimal
 from unittest.mock import MagicMock
 
 import pytest
 
-from entities.entities import Account, Expense, Record, RecordType, Tag
+from entities.entities import (
+    Account,
+    Expense,
+    Income,
+    Record,
+    RecordBatch,
+    RecordType,
+    Tag,
+)
 from use_cases.records.exceptions import (
     RecordMissingIdException,
     RecordNotFoundException,
+    RecordVersionConflictException,
+)
+from use_cases.records.records import (
+    RecordSelection,
+    RecordsUpdate,
+    RecordUseCases,
+    Retagging,
+    record_fingerprint,
 )
-from use_cases.records.records import RecordUseCases
 from use_cases.tags.exceptions import MissingTagException
 
 
@@ -18,15 +35,76 @@ class RecordServiceProtocolMock:
     def create(self, record: Record) -> Record:  # type: ignore
         ...
 
-    def update(self, record: Record) -> Record:  # type: ignore
+    def create_many(  # type: ignore
+        self, records: Iterable[Record]
+    ) -> list[Record]:
+        ...
+
+    def update_many(  # type: ignore
+        self, records: Iterable[Record]
+    ) -> RecordsUpdate:
         ...
 
-    def delete(self, id: str) -> None:
+    def delete(self, id: str) -> list[Account]:  # type: ignore
         ...
 
     def get(self, id: str) -> Record:  # type: ignore
         ...
 
+    def get_page(  # type: ignore
+        self,
+        user_id: str,
+        account_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        after: tuple[datetime, str] | None = None,
+        limit: int = 100,
+    ) -> list[Record]:
+        ...
+
+    def get_batch(  # type: ignore
+        self,
+        user_id: str,
+        account_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> RecordBatch:
+        ...
+
+    def search(  # type: ignore
+        self,
+        user_id: str,
+        text: str,
+        account_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        tag: str | None = None,
+        limit: int = 50,
+    ) -> list[Record]:
+        ...
+
+    def get_existing_fingerprints(  # type: ignore
+        self, fingerprints: Iterable[str]
+    ) -> set[str]:
+        ...
+
+    def get_ids(  # type: ignore
+        self,
+        selection: RecordSelection,
+        after: str | None = None,
+        limit: int = 500,
+    ) -> list[str]:
+        ...
+
+    def retag(  # type: ignore
+        self,
+        user_id: str,
+        ids: list[str],
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+    ) -> Retagging:
+        ...
+
 
 mock = RecordServiceProtocolMock()
 
@@ -97,7 +175,7 @@ def test_update_record_raising_missing_id_exception_use_case(account):
     record_to_be_updated = Expense(
         None, "Water", Decimal("10.34"), datetime(2023, 4, 8), account=account
     )
-    mock.update = MagicMock(side_effect=RecordMissingIdException)
+    mock.update_many = MagicMock(side_effect=RecordMissingIdException)
     use_cases = RecordUseCases(mock)
     with pytest.raises(RecordMissingIdException) as missingIdExc:
         use_cases.update_record(record_to_be_updated)
@@ -111,7 +189,7 @@ def test_update_record_raising_record_not_found_exception_use_case(account):
     record_to_be_updated = Expense(
         None, "Water", Decimal("10.34"), datetime(2023, 4, 8), account=account
     )
-    mock.update = MagicMock(side_effect=RecordNotFoundException)
+    mock.update_many = MagicMock(side_effect=RecordNotFoundException)
     use_cases = RecordUseCases(mock)
     with pytest.raises(RecordNotFoundException) as exc:
         use_cases.update_record(record_to_be_updated)
@@ -128,7 +206,7 @@ def test_update_record_raising_missing_tag_use_case(account):
         account=account,
         tags=[missing_tag],
     )
-    mock.update = MagicMock(side_effect=MissingTagException)
+    mock.update_many = MagicMock(side_effect=MissingTagException)
     use_cases = RecordUseCases(mock)
     with pytest.raises(MissingTagException) as exc:
         use_cases.update_record(record_to_be_updated)
@@ -160,7 +238,9 @@ def test_update_record_use_case(account):
         type=RecordType.EXPENSE,
         account=account,
     )
-    mock.update = MagicMock(return_value=expected_record)
+    mock.update_many = MagicMock(
+        return_value=RecordsUpdate([expected_record], [account])
+    )
     use_cases = RecordUseCases(mock)
     record_created = use_cases.update_record(record)
     assert record_created.id is not None
@@ -172,7 +252,7 @@ def test_update_record_use_case(account):
 
 def test_delete_record_use_case():
     record_id = str(uuid.uuid4())
-    mock.delete = MagicMock(return_value=None)
+    mock.delete = MagicMock(return_value=[])
     use_cases = RecordUseCases(mock)
     use_cases.delete_record(record_id)
     assert mock.delete.call_count == 1
@@ -213,3 +293,263 @@ def test_get_record_raising_missing_record_exception_use_case():
     with pytest.raises(RecordNotFoundException) as exc:
         use_cases.get(record_id)
         assert str(exc) == "record not found"
+
+
+def test_create_records_use_case(account):
+    records = [
+        Expense(
+            None,
+            "Water",
+            Decimal("10.34"),
+            datetime(2023, 4, 8),
+            account=account,
+        ),
+        Expense(
+            None,
+            "Power",
+            Decimal("52.10"),
+            datetime(2023, 4, 9),
+            account=account,
+        ),
+    ]
+    expected_records = [
+        Expense(
+            str(uuid.uuid4()),
+            record.description,
+            record.value,
+            record.date,
+            account=account,
+        )
+        for record in records
+    ]
+    mock.create_many = MagicMock(return_value=expected_records)
+    use_cases = RecordUseCases(mock)
+    records_created = use_cases.create_records(records)
+    mock.create_many.assert_called_once_with(records)
+    assert records_created == expected_records
+
+
+def test_create_records_raising_missing_tag_use_case(account):
+    record = Expense(
+        None,
+        "Water",
+        Decimal("10.34"),
+        datetime(2023, 4, 8),
+        account=account,
+        tags=[Tag("Car")],
+    )
+    mock.create_many = MagicMock(side_effect=MissingTagException)
+    use_cases = RecordUseCases(mock)
+    with pytest.raises(MissingTagException):
+        use_cases.create_records([record])
+
+
+def test_record_fingerprint_ignores_case_and_spacing(account):
+    record = Expense(
+        None,
+        "Water  bill",
+        Decimal("10.3"),
+        datetime(2023, 4, 8, tzinfo=UTC),
+        account=account,
+    )
+    assert record_fingerprint(record) == record_fingerprint(
+        Expense(
+            None,
+            " WATER bill",
+            Decimal("10.30"),
+            datetime(2023, 4, 7, 21, tzinfo=timezone(timedelta(hours=-3))),
+            account=account,
+        )
+    )
+    assert record_fingerprint(record) != record_fingerprint(
+        Income(
+            None,
+            record.description,
+            record.value,
+            record.date,
+            account=account,
+        )
+    )
+
+
+def test_create_records_skipping_duplicates_use_case(account):
+    records = [
+        Expense(
+            None,
+            description,
+            Decimal("10.34"),
+            datetime(2023, 4, 8, tzinfo=UTC),
+            account=account,
+        )
+        for description in ["Water", "Power", "Power"]
+    ]
+    mock.get_existing_fingerprints = MagicMock(
+        return_value={record_fingerprint(records[0])}
+    )
+    mock.create_many = MagicMock(side_effect=list)
+    use_cases = RecordUseCases(mock)
+    assert use_cases.find_duplicates(records) == [True, False, False]
+    assert use_cases.create_records(records, skip_duplicates=True) == (
+        records[1:]
+    )
+    mock.create_many.assert_called_once_with(records[1:])
+
+
+def test_update_records_use_case(account):
+    records = [
+        Expense(
+            str(uuid.uuid4()),
+            "Water",
+            Decimal("10.34"),
+            datetime(2023, 4, 8),
+            account=account,
+        )
+    ]
+    mock.update_many = MagicMock(return_value=RecordsUpdate(records, [account]))
+    use_cases = RecordUseCases(mock)
+    assert use_cases.update_records(records) == records
+
+
+def test_update_records_raising_record_not_found_exception_use_case(account):
+    record = Expense(
+        str(uuid.uuid4()),
+        "Water",
+        Decimal("10.34"),
+        datetime(2023, 4, 8),
+        account=account,
+    )
+    mock.update_many = MagicMock(side_effect=RecordNotFoundException)
+    use_cases = RecordUseCases(mock)
+    with pytest.raises(RecordNotFoundException):
+        use_cases.update_records([record])
+
+
+def test_iter_records_use_case_follows_keyset(account):
+    records = [
+        Expense(
+            str(i),
+            "Water",
+            Decimal("10.34"),
+            datetime(2023, 4, i),
+            account=account,
+        )
+        for i in range(1, 6)
+    ]
+    mock.get_page = MagicMock(
+        side_effect=[records[0:2], records[2:4], records[4:5]]
+    )
+    use_cases = RecordUseCases(mock)
+    use_cases.page_size = 2
+    assert list(use_cases.iter_records(account.user_id)) == records
+    afters = [call.kwargs["after"] for call in mock.get_page.call_args_list]
+    assert afters == [
+        None,
+        (records[1].date, records[1].id),
+        (records[3].date, records[3].id),
+    ]
+
+
+def test_iter_records_use_case_stops_on_empty_page(account):
+    mock.get_page = MagicMock(return_value=[])
+    use_cases = RecordUseCases(mock)
+    assert list(use_cases.iter_records(account.user_id, account.id)) == []
+    assert mock.get_page.call_count == 1
+
+
+def test_change_record_use_case_retries_conflicts(account):
+    record = Expense(
+        str(uuid.uuid4()),
+        "Water",
+        Decimal("10.34"),
+        datetime(2023, 4, 8),
+        account=account,
+        version=3,
+    )
+    mock.get = MagicMock(return_value=record)
+    mock.update_many = MagicMock(
+        side_effect=[
+            RecordVersionConflictException,
+            RecordVersionConflictException,
+            RecordsUpdate(
+                [replace(record, value=Decimal("12.00"), version=4)], [account]
+            ),
+        ]
+    )
+    use_cases = RecordUseCases(mock)
+    changed_record = use_cases.change_record(
+        record.id, lambda record: replace(record, value=Decimal("12.00"))
+    )
+    assert changed_record.version == 4
+    assert mock.get.call_count == 3
+    mock.update_many.assert_called_with(
+        [replace(record, value=Decimal("12.00"))]
+    )
+
+
+def test_get_records_batch_use_case(account):
+    batch = RecordBatch()
+    mock.get_batch = MagicMock(return_value=batch)
+    use_cases = RecordUseCases(mock)
+    assert use_cases.get_records_batch(account.user_id, account.id) is batch
+    mock.get_batch.assert_called_once_with(
+        account.user_id, account_id=account.id, since=None, until=None
+    )
+
+
+def test_tag_records_use_case(account):
+    record = Expense(
+        "1",
+        "Uber trip",
+        Decimal("12.00"),
+        datetime(2023, 4, 8, tzinfo=UTC),
+        account=account,
+        tags=[Tag("Transport")],
+    )
+    selection = RecordSelection(account.user_id, description="uber")
+    mock.get_ids = MagicMock(side_effect=[["1", "2"], ["3"], []])
+    mock.retag = MagicMock(
+        side_effect=[Retagging([record], added=1, removed=1), Retagging()]
+    )
+    change_log = MagicMock()
+    cubes = MagicMock()
+    use_cases = RecordUseCases(mock, change_log, cubes)
+    use_cases.tagging_batch_size = 2
+    result = use_cases.tag_records(
+        selection, add=["Transport", "Taxi"], remove=["Taxi", "Food"]
+    )
+    assert (result.records_matched, result.records_changed) == (3, 1)
+    assert (result.tags_added, result.tags_removed) == (1, 1)
+    mock.get_ids.assert_called_with(selection, after="3", limit=2)
+    # a tag both added and removed is removed
+    mock.retag.assert_called_with(
+        account.user_id, ["3"], {"Transport"}, {"Taxi", "Food"}
+    )
+    # only the records retagged are logged, without their accounts
+    (changes,) = change_log.append.call_args_list[0].args
+    assert [change.object_id for change in changes] == ["1"]
+    cubes.invalidate.assert_any_call(account.user_id)
+
+
+def test_search_records_use_case(account):
+    mock.search = MagicMock(return_value=[])
+    use_cases = RecordUseCases(mock)
+    since = datetime(2023, 4, 1, tzinfo=UTC)
+    assert (
+        use_cases.search_records(
+            account.user_id,
+            "pharmacy",
+            account=account.id,
+            since=since,
+            tag="Bills",
+        )
+        == []
+    )
+    mock.search.assert_called_once_with(
+        account.user_id,
+        "pharmacy",
+        account_id=account.id,
+        since=since,
+        until=None,
+        tag="Bills",
+        limit=50,
+    )
@@ -0,0 +1,6 @@
+class RecurrenceRuleNotFoundException(Exception):
+    msg = "recurrence rule not found"
+
+
+class InvalidRecurrenceRuleException(Exception):
+    msg = "recurrence rule is invalid"
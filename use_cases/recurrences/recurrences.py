@@ -0,0 +1,217 @@
+from calendar import monthrange
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Protocol
+
+from entities.entities import (
+    Expense,
+    Frequency,
+    Income,
+    Record,
+    RecordType,
+    RecurrenceRule,
+)
+from use_cases.analytics.analytics import CubeCache
+from use_cases.changes.changes import ChangeLog, logged, record_changes
+from use_cases.recurrences.exceptions import InvalidRecurrenceRuleException
+
+# the smallest step of a datetime, to turn an inclusive bound into an
+# exclusive one
+TICK = timedelta(microseconds=1)
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    index = moment.year * 12 + moment.month - 1 + months
+    year, month = index // 12, index % 12 + 1
+    return moment.replace(
+        year=year, month=month, day=min(moment.day, monthrange(year, month)[1])
+    )
+
+
+def nth_occurrence(rule: RecurrenceRule, n: int) -> datetime:
+    if rule.frequency is Frequency.MONTHLY:
+        return add_months(rule.starts, n * rule.interval)
+    days = 7 if rule.frequency is Frequency.WEEKLY else 1
+    return rule.starts + timedelta(days=days * rule.interval * n)
+
+
+def first_occurrence_index(rule: RecurrenceRule, since: datetime) -> int:
+    """
+    It returns the index of the first occurrence at or after `since`,
+    computed from the distance to `since` instead of walking every
+    occurrence before it
+    """
+    if since <= rule.starts:
+        return 0
+    if rule.frequency is Frequency.MONTHLY:
+        months = (since.year - rule.starts.year) * 12 + (
+            since.month - rule.starts.month
+        )
+        # the clamped day may put the estimate one occurrence too far back
+        n = max(0, months // rule.interval - 1)
+    else:
+        days = 7 if rule.frequency is Frequency.WEEKLY else 1
+        step = timedelta(days=days * rule.interval)
+        n = (since - rule.starts) // step
+    while nth_occurrence(rule, n) < since:
+        n += 1
+    return n
+
+
+def occurrences(
+    rule: RecurrenceRule, since: datetime, until: datetime
+) -> Iterator[datetime]:
+    """
+    It lazily yields the dates the rule occurs on between `since` and
+    `until`, both inclusive. Only the occurrences in the window are ever
+    computed, however long the rule has been running.
+    """
+    if rule.ends is not None:
+        until = min(until, rule.ends)
+    n = first_occurrence_index(rule, since)
+    while (occurrence := nth_occurrence(rule, n)) <= until:
+        yield occurrence
+        n += 1
+
+
+def expand(
+    rule: RecurrenceRule, since: datetime, until: datetime
+) -> Iterator[Record]:
+    """
+    It lazily yields the records the rule stands for between `since` and
+    `until`, both inclusive, skipping the ones already materialized
+    """
+    if rule.materialized_until is not None:
+        since = max(since, rule.materialized_until + TICK)
+    record_class = Income if rule.type is RecordType.INCOME else Expense
+    for occurrence in occurrences(rule, since, until):
+        yield record_class(
+            None,
+            rule.description,
+            rule.value,
+            occurrence,
+            account=rule.account,
+            tags=rule.tags,
+        )
+
+
+class RecurrencesRepository(Protocol):
+    def create(self, rule: RecurrenceRule) -> RecurrenceRule:
+        ...
+
+    def get(self, id: str) -> RecurrenceRule:
+        ...
+
+    def delete(self, id: str) -> None:
+        ...
+
+    def get_active(
+        self, user_id: str, since: datetime, until: datetime
+    ) -> list[RecurrenceRule]:
+        ...
+
+    def get_due(
+        self, until: datetime, after_id: str | None = None, limit: int = 100
+    ) -> list[RecurrenceRule]:
+        ...
+
+    def save_occurrences(
+        self,
+        rule: RecurrenceRule,
+        records: list[Record],
+        materialized_until: datetime,
+    ) -> list[Record]:
+        ...
+
+
+class RecurrenceUseCases:
+    """
+    Rules are stored once and expanded into records only when needed:
+    queries expand them lazily over the window they ask for, and the
+    materialize job turns the due occurrences into real records in batches.
+    """
+
+    batch_size = 100
+
+    def __init__(
+        self,
+        repository: RecurrencesRepository,
+        change_log: ChangeLog | None = None,
+        cubes: CubeCache | None = None,
+    ):
+        self.repository = repository
+        self.change_log = change_log
+        self.cubes = cubes
+
+    def create_rule(self, rule: RecurrenceRule) -> RecurrenceRule:
+        """
+        :param rule:
+        :return: RecurrenceRule
+        :raises: InvalidRecurrenceRuleException, MissingAccountException,
+            MissingTagException
+        """
+        if rule.interval < 1 or (
+            rule.ends is not None and rule.ends < rule.starts
+        ):
+            raise InvalidRecurrenceRuleException()
+        return self.repository.create(rule)
+
+    def get_rule(self, id: str) -> RecurrenceRule:
+        return self.repository.get(id)
+
+    def delete_rule(self, id: str) -> None:
+        """
+        The records already materialized from the rule are kept
+        """
+        self.repository.delete(id)
+
+    def get_occurrences(
+        self, user_id: str, since: datetime, until: datetime
+    ) -> list[Record]:
+        """
+        It returns the records the user's rules stand for between `since` and
+        `until`, both inclusive, which are not records yet. They have no id.
+
+        :return: list[Record] ordered by date, or []
+        """
+        return sorted(
+            (
+                record
+                for rule in self.repository.get_active(user_id, since, until)
+                for record in expand(rule, since, until)
+            ),
+            key=lambda record: record.date,
+        )
+
+    def materialize(self, until: datetime) -> int:
+        """
+        It creates the records of every occurrence due up to `until`, going
+        through the rules `batch_size` at a time. Each rule is materialized
+        in its own transaction, so an interrupted run keeps the rules done
+        so far and the next one picks up the others.
+
+        :return: int, the number of records created
+        """
+        created = 0
+        after_id = None
+        while rules := self.repository.get_due(
+            until, after_id=after_id, limit=self.batch_size
+        ):
+            for rule in rules:
+                records = list(expand(rule, rule.starts, until))
+                saved = logged(
+                    self.change_log,
+                    partial(
+                        self.repository.save_occurrences,
+                        rule,
+                        records,
+                        until,
+                    ),
+                    record_changes,
+                )
+                if saved and self.cubes is not None:
+                    self.cubes.invalidate(str(rule.account.user_id))
+                created += len(saved)
+            after_id = rules[-1].id
+        return created
@@ -0,0 +1,238 @@
+import uuid
+from datetime import UTC, datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+
+from entities.entities import (
+    Account,
+    Expense,
+    Frequency,
+    Income,
+    Record,
+    RecordType,
+    RecurrenceRule,
+)
+from use_cases.recurrences.exceptions import InvalidRecurrenceRuleException
+from use_cases.recurrences.recurrences import (
+    RecurrenceUseCases,
+    expand,
+    occurrences,
+)
+
+
+class RecurrencesRepositoryMock:
+    def create(self, rule: RecurrenceRule) -> RecurrenceRule:  # type: ignore
+        ...
+
+    def get(self, id: str) -> RecurrenceRule:  # type: ignore
+        ...
+
+    def delete(self, id: str) -> None:
+        ...
+
+    def get_active(  # type: ignore
+        self, user_id: str, since: datetime, until: datetime
+    ) -> list[RecurrenceRule]:
+        ...
+
+    def get_due(  # type: ignore
+        self, until: datetime, after_id: str | None = None, limit: int = 100
+    ) -> list[RecurrenceRule]:
+        ...
+
+    def save_occurrences(  # type: ignore
+        self,
+        rule: RecurrenceRule,
+        records: list[Record],
+        materialized_until: datetime,
+    ) -> list[Record]:
+        ...
+
+
+mock = RecurrencesRepositoryMock()
+
+
+@pytest.fixture(scope="function")
+def account():
+    return Account(
+        str(uuid.uuid4()),
+        Decimal("0.00"),
+        user_id=str(uuid.uuid4()),
+        name="Main",
+    )
+
+
+def _rule(account, frequency, starts, **kwargs):
+    return RecurrenceRule(
+        kwargs.pop("id", None),
+        "Rent",
+        Decimal("500.00"),
+        account,
+        RecordType.EXPENSE,
+        frequency,
+        starts,
+        **kwargs,
+    )
+
+
+def _dates(*dates):
+    return [datetime(*date, tzinfo=UTC) for date in dates]
+
+
+def test_monthly_occurrences_keep_the_day_of_the_month(account):
+    rule = _rule(account, Frequency.MONTHLY, datetime(2023, 1, 31, tzinfo=UTC))
+    assert list(
+        occurrences(
+            rule,
+            datetime(2023, 1, 1, tzinfo=UTC),
+            datetime(2023, 5, 1, tzinfo=UTC),
+        )
+    ) == _dates((2023, 1, 31), (2023, 2, 28), (2023, 3, 31), (2023, 4, 30))
+
+
+def test_occurrences_start_at_the_window(account):
+    rule = _rule(
+        account,
+        Frequency.MONTHLY,
+        datetime(2000, 1, 31, tzinfo=UTC),
+        interval=3,
+    )
+    assert list(
+        occurrences(
+            rule,
+            datetime(2023, 2, 1, tzinfo=UTC),
+            datetime(2023, 12, 31, tzinfo=UTC),
+        )
+    ) == _dates((2023, 4, 30), (2023, 7, 31), (2023, 10, 31))
+
+
+def test_weekly_and_daily_occurrences(account):
+    starts = datetime(2023, 1, 2, 9, tzinfo=UTC)
+    since = datetime(2023, 1, 10, tzinfo=UTC)
+    until = datetime(2023, 1, 31, tzinfo=UTC)
+    weekly = _rule(account, Frequency.WEEKLY, starts, interval=2)
+    assert list(occurrences(weekly, since, until)) == _dates(
+        (2023, 1, 16, 9), (2023, 1, 30, 9)
+    )
+    daily = _rule(
+        account,
+        Frequency.DAILY,
+        starts,
+        interval=10,
+        ends=datetime(2023, 1, 22, 9, tzinfo=UTC),
+    )
+    assert list(occurrences(daily, since, until)) == _dates(
+        (2023, 1, 12, 9), (2023, 1, 22, 9)
+    )
+
+
+def test_expand_skips_materialized_occurrences(account):
+    rule = _rule(
+        account,
+        Frequency.MONTHLY,
+        datetime(2023, 1, 5, tzinfo=UTC),
+        materialized_until=datetime(2023, 2, 5, tzinfo=UTC),
+    )
+    assert list(
+        expand(
+            rule,
+            datetime(2023, 1, 1, tzinfo=UTC),
+            datetime(2023, 3, 31, tzinfo=UTC),
+        )
+    ) == [
+        Expense(
+            None,
+            "Rent",
+            Decimal("500.00"),
+            datetime(2023, 3, 5, tzinfo=UTC),
+            account=account,
+        )
+    ]
+
+
+def test_create_rule_use_case(account):
+    rule = _rule(account, Frequency.WEEKLY, datetime(2023, 1, 5, tzinfo=UTC))
+    mock.create = MagicMock(return_value=rule)
+    use_cases = RecurrenceUseCases(mock)
+    assert use_cases.create_rule(rule) == rule
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"interval": 0}, {"ends": datetime(2022, 1, 1, tzinfo=UTC)}],
+)
+def test_create_rule_raising_invalid_rule_use_case(account, kwargs):
+    rule = _rule(
+        account, Frequency.WEEKLY, datetime(2023, 1, 5, tzinfo=UTC), **kwargs
+    )
+    mock.create = MagicMock()
+    use_cases = RecurrenceUseCases(mock)
+    with pytest.raises(InvalidRecurrenceRuleException):
+        use_cases.create_rule(rule)
+    mock.create.assert_not_called()
+
+
+def test_get_occurrences_use_case(account):
+    salary = RecurrenceRule(
+        None,
+        "Salary",
+        Decimal("1000.00"),
+        account,
+        RecordType.INCOME,
+        Frequency.MONTHLY,
+        datetime(2023, 1, 1, tzinfo=UTC),
+    )
+    rent = _rule(account, Frequency.MONTHLY, datetime(2023, 1, 5, tzinfo=UTC))
+    mock.get_active = MagicMock(return_value=[rent, salary])
+    use_cases = RecurrenceUseCases(mock)
+    records = use_cases.get_occurrences(
+        account.user_id,
+        datetime(2023, 1, 1, tzinfo=UTC),
+        datetime(2023, 2, 28, tzinfo=UTC),
+    )
+    assert [(type(record), record.date.month) for record in records] == [
+        (Income, 1),
+        (Expense, 1),
+        (Income, 2),
+        (Expense, 2),
+    ]
+
+
+def test_materialize_use_case_goes_through_rules_in_batches(account):
+    rules = [
+        _rule(
+            account,
+            Frequency.MONTHLY,
+            datetime(2023, 1, 5, tzinfo=UTC),
+            id=str(i),
+        )
+        for i in range(3)
+    ]
+    mock.get_due = MagicMock(side_effect=[rules[:2], rules[2:], []])
+    mock.save_occurrences = MagicMock(
+        side_effect=lambda rule, records, until: records
+    )
+    use_cases = RecurrenceUseCases(mock)
+    use_cases.batch_size = 2
+    until = datetime(2023, 3, 31, tzinfo=UTC)
+    assert use_cases.materialize(until) == 9
+    assert [call.kwargs["after_id"] for call in mock.get_due.mock_calls] == [
+        None,
+        "1",
+        "2",
+    ]
+    assert mock.save_occurrences.call_args.args[2] == until
+
+
+def test_materialize_use_case_invalidates_cubes(account):
+    rule = _rule(account, Frequency.MONTHLY, datetime(2023, 1, 5, tzinfo=UTC))
+    mock.get_due = MagicMock(side_effect=[[rule], []])
+    mock.save_occurrences = MagicMock(
+        side_effect=lambda rule, records, until: records
+    )
+    cubes = MagicMock()
+    use_cases = RecurrenceUseCases(mock, cubes=cubes)
+    assert use_cases.materialize(datetime(2023, 3, 31, tzinfo=UTC)) == 3
+    cubes.invalidate.assert_called_once_with(account.user_id)
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Protocol
+
+from entities.entities import RecordType, Tag
+
+
+@dataclass(frozen=True)
+class MonthlyTotal:
+    """
+    The total of the records of one type in a month. When `tag` is None the
+    total covers every record, tagged or not.
+    """
+
+    month: date
+    type: RecordType
+    tag: Tag | None
+    total: Decimal
+    count: int
+
+
+class ReportsRepository(Protocol):
+    def get_monthly_totals(
+        self,
+        user_id: str,
+        since: date,
+        until: date,
+        type: RecordType,
+        account_id: str | None = None,
+    ) -> list[MonthlyTotal]:
+        ...
+
+    def rebuild(self, user_id: str | None = None) -> None:
+        ...
+
+
+def months_back(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class ReportUseCases:
+    def __init__(self, reports_repository: ReportsRepository):
+        self.reports_repository = reports_repository
+
+    def monthly_totals_per_tag(
+        self,
+        user_id: str,
+        until: date,
+        months: int = 24,
+        type: RecordType = RecordType.EXPENSE,
+        account_id: str | None = None,
+    ) -> list[MonthlyTotal]:
+        """
+        It returns, for each of the last `months` months up to the month of
+        `until`, the total of the records of the given type carrying each
+        tag, plus the total of all of them under the `None` tag.
+
+        Totals are read from rollups maintained by every record write, so it
+        costs the same whatever the number of records.
+
+        :return: list[MonthlyTotal] or []
+        """
+        last_month = until.replace(day=1)
+        return self.reports_repository.get_monthly_totals(
+            user_id,
+            since=months_back(last_month, months - 1),
+            until=last_month,
+            type=type,
+            account_id=account_id,
+        )
+
+    def rebuild_rollups(self, user_id: str | None = None) -> None:
+        """
+        It rebuilds the rollups of the user, or of everyone, from scratch
+
+        :return: None
+        """
+        self.reports_repository.rebuild(user_id)
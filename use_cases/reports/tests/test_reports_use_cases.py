@@ -0,0 +1,74 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from entities.entities import RecordType, Tag
+from use_cases.reports.reports import (
+    MonthlyTotal,
+    ReportUseCases,
+    months_back,
+)
+
+
+class ReportsRepositoryMock:
+    def get_monthly_totals(  # type: ignore
+        self,
+        user_id: str,
+        since: date,
+        until: date,
+        type: RecordType,
+        account_id: str | None = None,
+    ) -> list[MonthlyTotal]:
+        ...
+
+    def rebuild(self, user_id: str | None = None) -> None:
+        ...
+
+
+mock = ReportsRepositoryMock()
+
+
+def test_months_back():
+    assert months_back(date(2023, 4, 1), 0) == date(2023, 4, 1)
+    assert months_back(date(2023, 4, 1), 3) == date(2023, 1, 1)
+    assert months_back(date(2023, 4, 1), 4) == date(2022, 12, 1)
+    assert months_back(date(2023, 4, 1), 23) == date(2021, 5, 1)
+
+
+def test_monthly_totals_per_tag_use_case():
+    user_id = str(uuid.uuid4())
+    expected_totals = [
+        MonthlyTotal(
+            month=date(2023, 4, 1),
+            type=RecordType.EXPENSE,
+            tag=None,
+            total=Decimal("30.00"),
+            count=2,
+        ),
+        MonthlyTotal(
+            month=date(2023, 4, 1),
+            type=RecordType.EXPENSE,
+            tag=Tag("Bills"),
+            total=Decimal("10.00"),
+            count=1,
+        ),
+    ]
+    mock.get_monthly_totals = MagicMock(return_value=expected_totals)
+    use_cases = ReportUseCases(mock)
+    totals = use_cases.monthly_totals_per_tag(user_id, until=date(2023, 4, 8))
+    assert totals == expected_totals
+    mock.get_monthly_totals.assert_called_once_with(
+        user_id,
+        since=date(2021, 5, 1),
+        until=date(2023, 4, 1),
+        type=RecordType.EXPENSE,
+        account_id=None,
+    )
+
+
+def test_rebuild_rollups_use_case():
+    mock.rebuild = MagicMock(return_value=None)
+    use_cases = ReportUseCases(mock)
+    use_cases.rebuild_rollups("1")
+    mock.rebuild.assert_called_once_with("1")
@@ -0,0 +1,37 @@
+import time
+from collections.abc import Callable
+from typing import TypeVar
+
+from use_cases.accounts.exceptions import AccountVersionConflictException
+from use_cases.records.exceptions import RecordVersionConflictException
+
+T = TypeVar("T")
+
+CONFLICTS: tuple[type[Exception], ...] = (
+    AccountVersionConflictException,
+    RecordVersionConflictException,
+)
+
+
+def retry_on_conflict(
+    operation: Callable[[], T],
+    attempts: int = 3,
+    backoff: float = 0.01,
+    conflicts: tuple[type[Exception], ...] = CONFLICTS,
+) -> T:
+    """
+    It runs `operation` until it doesn't raise a version conflict, up to
+    `attempts` times, waiting a little longer after each conflict. The
+    operation must read what it changes again on every run, otherwise it
+    conflicts every time.
+
+    :raises: the last conflict when every attempt conflicted
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return operation()
+        except conflicts:
+            if attempt == attempts:
+                raise
+            time.sleep(backoff * attempt)
+    raise ValueError("attempts must be positive")
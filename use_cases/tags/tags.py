@@ -1,6 +1,23 @@
-from typing import Protocol
+import heapq
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from typing import Protocol, TypeVar
 
 from entities.entities import Tag
+from use_cases.analytics.analytics import CubeCache
+from use_cases.autotagging.autotagging import RuleMatchers
+from use_cases.cache import UserCache
+from use_cases.changes.changes import (
+    Change,
+    ChangeKind,
+    ChangeLog,
+    Operation,
+    logged,
+    tag_change,
+)
+from use_cases.tags.exceptions import MissingTagException
+
+T = TypeVar("T")
 
 
 class TagsRepository(Protocol):
@@ -10,7 +27,13 @@ class TagsRepository(Protocol):
     def update(self, name: str, tag: Tag) -> Tag:
         ...
 
-    def delete(self, name: str) -> None:
+    def rename(self, name: str, new_name: str) -> int:
+        ...
+
+    def delete(self, name: str) -> int:
+        ...
+
+    def merge(self, source: str, target: str) -> int:
         ...
 
     def get_all(self) -> list[Tag]:
@@ -19,10 +42,198 @@ class TagsRepository(Protocol):
     def get_tag(self, name: str) -> Tag:
         ...
 
+    def get_usage(self) -> list[tuple[Tag, int]]:
+        ...
+
+
+class TagRegistry:
+    """
+    The tags of a user, each one a single Tag object shared by everything
+    mapped with it, found by its name or by the id the repository gives it
+    """
+
+    def __init__(self, tags: Iterable[tuple[str, Tag]]):
+        self.by_id: dict[str, Tag] = {}
+        self.by_name: dict[str, Tag] = {}
+        for id, tag in tags:
+            self.by_id[id] = self.by_name[tag.name] = tag
+
+    def get(self, name: str) -> Tag:
+        """
+        :raises: MissingTagException
+        """
+        try:
+            return self.by_name[name]
+        except KeyError as e:
+            raise MissingTagException() from e
+
+    def get_all(self) -> list[Tag]:
+        return sorted(self.by_name.values(), key=lambda tag: tag.name)
+
+
+class TagRegistries(UserCache[TagRegistry]):
+    """
+    The tag registries of the users used the latest, each loaded with a
+    single call to `load`, which returns the tags of a user by their ids.
+    Writes to the tags of a user must invalidate their registry.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[str], Iterable[tuple[str, Tag]]],
+        max_size: int = 1024,
+        max_age: float = 300,
+    ):
+        super().__init__(max_size, max_age)
+        self.load = load
+
+    def get_registry(self, user_id: str) -> TagRegistry:
+        return self.get(user_id, lambda: TagRegistry(self.load(user_id)))
+
+    def resolve(self, user_id: str, ids: Iterable[str]) -> list[Tag]:
+        """
+        It returns the tags with the given ids ordered by name, reloading
+        the registry once if any of them is unknown to it, as it may predate
+        the tag. Ids still unknown are left out.
+        """
+        ids = list(ids)
+        registry = self.get_registry(user_id)
+        if any(id not in registry.by_id for id in ids):
+            self.invalidate(user_id)
+            registry = self.get_registry(user_id)
+        return sorted(
+            (registry.by_id[id] for id in ids if id in registry.by_id),
+            key=lambda tag: tag.name,
+        )
+
+
+class TagIndex:
+    """
+    The tags of a user sorted by their names ignoring case, along with how
+    many records carry each one. The tags starting with a prefix are next
+    to each other, so they are found by bisecting the names, without going
+    through the others.
+    """
+
+    def __init__(self, usage: Iterable[tuple[Tag, int]]):
+        entries = sorted(
+            (tag.name.casefold(), -count, tag.name, tag) for tag, count in usage
+        )
+        self.keys = [key for key, *_ in entries]
+        # (-count, name) ranks the most used first, ties in name order
+        self.ranks = [(rank, name) for _, rank, name, _ in entries]
+        self.tags = [tag for *_, tag in entries]
+        self.ranked = [
+            self.tags[position]
+            for _, position in sorted(
+                (rank, position) for position, rank in enumerate(self.ranks)
+            )
+        ]
+
+    def search(self, prefix: str, limit: int) -> list[Tag]:
+        """
+        :return: list[Tag], up to `limit` of the tags whose name starts with
+            `prefix`, ignoring case, the ones on more records first
+        """
+        if not prefix:
+            return self.ranked[:limit]
+        prefix = prefix.casefold()
+        start = bisect_left(self.keys, prefix)
+        # every name starting with the prefix sorts before it followed by
+        # the last code point
+        end = bisect_left(self.keys, prefix + "\U0010ffff", lo=start)
+        return [
+            self.tags[position]
+            for _, position in heapq.nsmallest(
+                limit,
+                (
+                    (self.ranks[position], position)
+                    for position in range(start, end)
+                ),
+            )
+        ]
+
+
+class TagIndexes(UserCache[TagIndex]):
+    """
+    The tag indexes of the users searching tags the latest. Writes to the
+    tags of a user must invalidate their index, while record writes don't:
+    the usage of the tags is only a ranking, so it is left to be refreshed
+    once the index is older than `max_age`.
+    """
+
+    def __init__(self, max_size: int = 1024, max_age: float = 300):
+        super().__init__(max_size, max_age)
+
 
 class TagsUseCases:
-    def __init__(self, tag_service: TagsRepository):
+    def __init__(
+        self,
+        tag_service: TagsRepository,
+        change_log: ChangeLog | None = None,
+        user_id: str | None = None,
+        tag_registries: TagRegistries | None = None,
+        rule_matchers: RuleMatchers | None = None,
+        tag_indexes: TagIndexes | None = None,
+        cubes: CubeCache | None = None,
+    ):
+        """
+        :param change_log: it logs the changes as made by `user_id`
+        :param tag_registries: tags of `user_id` are read from them instead
+            of the repository, and invalidated by every write
+        :param rule_matchers: the matcher of `user_id` is invalidated by
+            every write, as it gives the tags by name
+        :param tag_indexes: tags of `user_id` are searched in them, and
+            invalidated by every write
+        :param cubes: the cube of `user_id` is invalidated by every write, as
+            it groups records by the names of their tags
+        """
         self.tag_service = tag_service
+        self.change_log = change_log
+        self.user_id = user_id
+        self.tag_registries = tag_registries
+        self.rule_matchers = rule_matchers
+        self.tag_indexes = tag_indexes
+        self.cubes = cubes
+
+    def _registry(self) -> TagRegistry | None:
+        if self.tag_registries is None or self.user_id is None:
+            return None
+        return self.tag_registries.get_registry(self.user_id)
+
+    def _get_tag(self, name: str) -> Tag:
+        registry = self._registry()
+        if registry is None:
+            return self.tag_service.get_tag(name)
+        return registry.get(name)
+
+    def _written(self, result: T) -> T:
+        if self.user_id is not None:
+            for cache in (
+                self.tag_registries,
+                self.rule_matchers,
+                self.tag_indexes,
+                self.cubes,
+            ):
+                if cache is not None:
+                    cache.invalidate(self.user_id)
+        return result
+
+    def _changes(self, *changes: tuple[Tag, Operation]) -> list[Change]:
+        return [
+            tag_change(str(self.user_id), tag, operation)
+            for tag, operation in changes
+        ]
+
+    def _replaced(self, source: str, target: str) -> Change:
+        # so clients give the records carrying `source` the `target` tag
+        return Change(
+            str(self.user_id),
+            ChangeKind.TAG,
+            Operation.DELETE,
+            source,
+            {"name": source, "replaced_by": target},
+        )
 
     def create_tag(self, name, color) -> Tag:
         """It creates a new tag with the given name and color
@@ -30,20 +241,43 @@ class TagsUseCases:
         :returns: Tag
         :raises: ExistingTagException
         """
-        return self.tag_service.create(name, color)
+        return self._written(
+            logged(
+                self.change_log,
+                lambda: self.tag_service.create(name, color),
+                lambda tag: self._changes((tag, Operation.UPSERT)),
+            )
+        )
 
-    def update_tag_name(self, current_name: str, new_name: str) -> Tag:
+    def update_tag_name(self, current_name: str, new_name: str) -> int:
         """
-        It updates the name of the tag with the given new name
+        It updates the name of the tag with the given new name, which its
+        records keep carrying
 
         :param current_name
         :param new_name
-        :return: Tag
+        :return: int, the number of records carrying the tag
         :raises: ExistingTagException, MissingTagException
         """
-        tag = self.tag_service.get_tag(current_name)
+        tag = self._get_tag(current_name)
         new_tag = Tag(new_name, tag.color)
-        return self.tag_service.update(current_name, new_tag)
+        # tags are known by their names, so a renamed tag is a new one,
+        # replacing the old one on its records
+        replaced = (
+            [self._replaced(current_name, new_name)]
+            if current_name != new_name
+            else []
+        )
+        return self._written(
+            logged(
+                self.change_log,
+                lambda: self.tag_service.rename(current_name, new_name),
+                lambda _: [
+                    *replaced,
+                    *self._changes((new_tag, Operation.UPSERT)),
+                ],
+            )
+        )
 
     def update_tag_color(self, current_name: str, new_color: str) -> Tag:
         """
@@ -53,22 +287,80 @@ class TagsUseCases:
         :return: Tag
         :raises: ExistingTagException, MissingTagException
         """
-        tag = self.tag_service.get_tag(current_name)
+        tag = self._get_tag(current_name)
         new_tag = Tag(tag.name, new_color)
-        return self.tag_service.update(current_name, new_tag)
+        return self._written(
+            logged(
+                self.change_log,
+                lambda: self.tag_service.update(current_name, new_tag),
+                lambda updated_tag: self._changes(
+                    (updated_tag, Operation.UPSERT)
+                ),
+            )
+        )
 
-    def delete_tag(self, label) -> None:
+    def delete_tag(self, label, reassign_to: str | None = None) -> int:
         """
-        It deletes the tag with the given label
+        It deletes the tag with the given label, see merge_tags for when it
+        is reassigned
         :param label:
-        :return: None
+        :param reassign_to: the tag its records are given instead, if any
+        :return: int, the number of records that carried the tag
+        :raises: MissingTagException
+        """
+        if reassign_to is not None:
+            return self.merge_tags(label, reassign_to)
+        return self._written(
+            logged(
+                self.change_log,
+                lambda: self.tag_service.delete(label),
+                lambda _: self._changes((Tag(label), Operation.DELETE)),
+            )
+        )
+
+    def merge_tags(self, source: str, target: str) -> int:
+        """
+        It gives the records carrying the `source` tag the `target` one
+        instead and deletes `source`, all at once however many records
+        carry them
+        :param source:
+        :param target:
+        :return: int, the number of records that carried `source`
         :raises: MissingTagException
         """
-        self.tag_service.delete(label)
+        return self._written(
+            logged(
+                self.change_log,
+                lambda: self.tag_service.merge(source, target),
+                # merged into itself, a tag is left as it was
+                lambda _: [self._replaced(source, target)]
+                if source != target
+                else [],
+            )
+        )
 
     def get_all_tags(self) -> list[Tag]:
         """
         It returns all the tags
         :return: list[Tag] or []
         """
-        return self.tag_service.get_all()
+        registry = self._registry()
+        if registry is None:
+            return self.tag_service.get_all()
+        return registry.get_all()
+
+    def search_tags(self, prefix: str, limit: int = 10) -> list[Tag]:
+        """
+        It returns the tags whose name starts with `prefix`, ignoring case,
+        the ones carried by more records first. Without an index cache, the
+        index is built for this search alone.
+
+        :param prefix:
+        :param limit:
+        :return: list[Tag] or []
+        """
+        if self.tag_indexes is None or self.user_id is None:
+            return TagIndex(self.tag_service.get_usage()).search(prefix, limit)
+        return self.tag_indexes.get(
+            self.user_id, lambda: TagIndex(self.tag_service.get_usage())
+        ).search(prefix, limit)
@@ -0,0 +1,60 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from entities.entities import Tag
+from use_cases.tags.exceptions import MissingTagException
+from use_cases.tags.tags import TagRegistries, TagRegistry, TagsUseCases
+
+bills = Tag("Bills", "#FF0000")
+house = Tag("House", "#00FF00")
+
+
+@pytest.fixture(scope="function")
+def load():
+    return MagicMock(return_value=[("2", house), ("1", bills)])
+
+
+def test_tag_registry():
+    registry = TagRegistry([("2", house), ("1", bills)])
+    assert registry.get("Bills") is bills
+    assert registry.by_id["2"] is house
+    assert registry.get_all() == [bills, house]
+    with pytest.raises(MissingTagException):
+        registry.get("Car")
+
+
+def test_tag_registries_load_each_user_once(load):
+    registries = TagRegistries(load)
+    assert registries.resolve("1", ["2", "1"]) == [bills, house]
+    assert registries.resolve("1", ["1"])[0] is bills
+    load.assert_called_once_with("1")
+    registries.invalidate("1")
+    registries.get_registry("1")
+    assert load.call_count == 2
+
+
+def test_tag_registries_reload_on_unknown_ids(load):
+    registries = TagRegistries(load)
+    registries.get_registry("1")
+    car = Tag("Car")
+    load.return_value = [("1", bills), ("3", car)]
+    assert registries.resolve("1", ["3", "4"]) == [car]
+    assert load.call_count == 2
+
+
+def test_tags_use_cases_read_from_registries(load):
+    tag_service = MagicMock()
+    tag_service.update = MagicMock(return_value=Tag("Bills", "#FFFFFF"))
+    registries = TagRegistries(load)
+    use_cases = TagsUseCases(tag_service, user_id="1", tag_registries=registries)
+    assert use_cases.get_all_tags() == [bills, house]
+    use_cases.update_tag_color("Bills", "#FFFFFF")
+    tag_service.get_tag.assert_not_called()
+    tag_service.get_all.assert_not_called()
+    tag_service.update.assert_called_once_with("Bills", Tag("Bills", "#FFFFFF"))
+    # the write invalidated the registry
+    use_cases.get_all_tags()
+    assert load.call_count == 2
+    with pytest.raises(MissingTagException):
+        use_cases.update_tag_name("Car", "Cars")
@@ -0,0 +1,63 @@
+from unittest.mock import MagicMock
+
+from entities.entities import Tag
+from use_cases.tags.tags import TagIndex, TagIndexes, TagsUseCases
+
+usage = [
+    (Tag("Uber"), 10),
+    (Tag("uber eats"), 30),
+    (Tag("Ubuntu"), 1),
+    (Tag("Bills"), 50),
+    (Tag("Übung"), 5),
+    (Tag("UB"), 0),
+]
+
+
+def _names(tags):
+    return [tag.name for tag in tags]
+
+
+def test_tag_index_search():
+    index = TagIndex(usage)
+    assert _names(index.search("ub", 10)) == [
+        "uber eats",
+        "Uber",
+        "Ubuntu",
+        "UB",
+    ]
+    assert _names(index.search("UBER", 10)) == ["uber eats", "Uber"]
+    assert _names(index.search("ub", 2)) == ["uber eats", "Uber"]
+    assert _names(index.search("üb", 10)) == ["Übung"]
+    assert index.search("car", 10) == []
+    assert _names(index.search("", 3)) == ["Bills", "uber eats", "Uber"]
+    assert TagIndex([]).search("ub", 10) == []
+
+
+def test_tag_index_search_matches_a_scan():
+    names = [
+        f"{prefix}{i}" for prefix in ("a", "ab", "abc", "b") for i in range(30)
+    ]
+    index = TagIndex((Tag(name), len(name) * 7 % 11) for name in names)
+    for prefix in ("a", "ab", "abc", "abc1", "b2", "c", ""):
+        expected = sorted(
+            (name for name in names if name.startswith(prefix)),
+            key=lambda name: (-(len(name) * 7 % 11), name),
+        )[:10]
+        assert _names(index.search(prefix, 10)) == expected
+
+
+def test_search_tags_use_case():
+    tag_service = MagicMock()
+    tag_service.get_usage = MagicMock(return_value=usage)
+    indexes = TagIndexes()
+    use_cases = TagsUseCases(tag_service, user_id="1", tag_indexes=indexes)
+    assert _names(use_cases.search_tags("ub", 1)) == ["uber eats"]
+    assert _names(use_cases.search_tags("bi")) == ["Bills"]
+    tag_service.get_usage.assert_called_once_with()
+    # the write invalidated the index
+    use_cases.delete_tag("Bills")
+    tag_service.get_usage.return_value = usage[:3]
+    assert use_cases.search_tags("bi") == []
+    assert tag_service.get_usage.call_count == 2
+    # without indexes, every search reads the usage
+    assert _names(TagsUseCases(tag_service).search_tags("ubu")) == ["Ubuntu"]
@@ -19,7 +19,13 @@ class TagServiceProtocolMock:
     def update(self, name: str, new_tag: Tag) -> Tag:  # type: ignore
         ...
 
-    def delete(self, name: str) -> None:
+    def rename(self, name: str, new_name: str) -> int:  # type: ignore
+        ...
+
+    def delete(self, name: str) -> int:  # type: ignore
+        ...
+
+    def merge(self, source: str, target: str) -> int:  # type: ignore
         ...
 
     def get_all(self) -> list[Tag]:  # type: ignore
@@ -51,16 +57,15 @@ def test_create_existing_tag_use_case():
 
 def test_update_tag_name_use_case():
     mock.get_tag = MagicMock(return_value=Tag(mock_name, mock_color))
-    mock.update = MagicMock(return_value=Tag(new_name, mock_color))
+    mock.rename = MagicMock(return_value=3)
     tags_use_cases = TagsUseCases(mock)
-    tag = tags_use_cases.update_tag_name(mock_name, new_name)
-    assert tag.name == new_name
-    assert tag.color == mock_color
+    assert tags_use_cases.update_tag_name(mock_name, new_name) == 3
+    mock.rename.assert_called_once_with(mock_name, new_name)
 
 
 def test_update_tag_name_to_existing_tag_use_case():
     mock.get_tag = MagicMock(return_value=Tag(new_name, mock_color))
-    mock.update = MagicMock(side_effect=ExistingTagException)
+    mock.rename = MagicMock(side_effect=ExistingTagException)
     tags_use_cases = TagsUseCases(mock)
     with pytest.raises(ExistingTagException) as ex:
         tags_use_cases.update_tag_name(new_name, mock_name)
@@ -69,7 +74,7 @@ def test_update_tag_name_to_existing_tag_use_case():
 
 def test_update_tag_name_to_non_existing_tag_use_case():
     mock.get_tag = MagicMock(return_value=Tag(mock_name, mock_color))
-    mock.update = MagicMock(side_effect=MissingTagException)
+    mock.rename = MagicMock(side_effect=MissingTagException)
     tags_use_cases = TagsUseCases(mock)
     with pytest.raises(MissingTagException) as ex:
         tags_use_cases.update_tag_name(new_name, mock_name)
@@ -115,3 +120,44 @@ def test_delete_non_existing_tag_use_case():
     with pytest.raises(MissingTagException) as ex:
         tags_use_cases.delete_tag(mock_name)
         assert str(ex) == MissingTagException.msg
+
+
+def test_delete_tag_reassigning_it_use_case():
+    mock.delete = MagicMock()
+    mock.merge = MagicMock(return_value=3)
+    tags_use_cases = TagsUseCases(mock)
+    assert tags_use_cases.delete_tag(mock_name, reassign_to=new_name) == 3
+    mock.merge.assert_called_once_with(mock_name, new_name)
+    mock.delete.assert_not_called()
+
+
+def test_merge_tags_use_case():
+    mock.merge = MagicMock(return_value=2)
+    change_log = MagicMock()
+    tags_use_cases = TagsUseCases(mock, change_log, user_id="1")
+    assert tags_use_cases.merge_tags(mock_name, new_name) == 2
+    (changes,) = change_log.append.call_args.args
+    assert [change.data for change in changes] == [
+        {"name": mock_name, "replaced_by": new_name}
+    ]
+
+
+def test_merge_tags_into_non_existing_tag_use_case():
+    mock.merge = MagicMock(side_effect=MissingTagException)
+    tags_use_cases = TagsUseCases(mock)
+    with pytest.raises(MissingTagException):
+        tags_use_cases.merge_tags(mock_name, new_name)
+
+
+def test_tag_writes_invalidate_cube():
+    mock.get_tag = MagicMock(return_value=Tag(mock_name, mock_color))
+    mock.rename = MagicMock(return_value=1)
+    mock.merge = MagicMock(return_value=1)
+    mock.delete = MagicMock(return_value=1)
+    cubes = MagicMock()
+    tags_use_cases = TagsUseCases(mock, user_id="1", cubes=cubes)
+    tags_use_cases.update_tag_name(mock_name, new_name)
+    tags_use_cases.merge_tags(new_name, mock_name)
+    tags_use_cases.delete_tag(mock_name)
+    assert cubes.invalidate.call_count == 3
+    cubes.invalidate.assert_called_with("1")
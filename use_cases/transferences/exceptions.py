@@ -0,0 +1,2 @@
+class InvalidTransferenceException(Exception):
+    msg = "transference must move a positive value between two accounts"
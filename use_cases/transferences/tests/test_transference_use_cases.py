@@ -0,0 +1,82 @@
+import uuid
+from dataclasses import replace
+from datetime import UTC, datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+
+from entities.entities import Account, Expense, Income, Transference
+from use_cases.records.tests.test_record_use_cases import (
+    RecordServiceProtocolMock,
+)
+from use_cases.transferences.exceptions import InvalidTransferenceException
+from use_cases.transferences.transferences import TransferenceUseCases
+
+mock = RecordServiceProtocolMock()
+
+
+@pytest.fixture(scope="function")
+def transference():
+    user_id = str(uuid.uuid4())
+    return Transference(
+        Account(str(uuid.uuid4()), None, user_id=user_id, name="Main"),
+        Account(str(uuid.uuid4()), None, user_id=user_id, name="Savings"),
+        "Savings",
+        Decimal("100.00"),
+        datetime(2023, 4, 8, tzinfo=UTC),
+    )
+
+
+def test_transfer_use_case(transference):
+    mock.create_many = MagicMock(
+        side_effect=lambda records: [
+            replace(record, id=str(uuid.uuid4())) for record in records
+        ]
+    )
+    use_cases = TransferenceUseCases(mock)
+    outgoing, incoming = use_cases.transfer(transference)
+    assert isinstance(outgoing, Expense)
+    assert outgoing.account == transference.origin_account
+    assert isinstance(incoming, Income)
+    assert incoming.account == transference.destination_account
+    assert outgoing.value == incoming.value == transference.value
+    mock.create_many.assert_called_once()
+
+
+def test_transfer_many_use_case_writes_once(transference):
+    mock.create_many = MagicMock(side_effect=list)
+    use_cases = TransferenceUseCases(mock)
+    legs = use_cases.transfer_many([transference] * 3)
+    assert len(legs) == 3
+    assert len(mock.create_many.call_args.args[0]) == 6
+    mock.create_many.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "invalid",
+    [
+        lambda t: replace(t, value=Decimal("0.00")),
+        lambda t: replace(t, value=Decimal("-1.00")),
+        lambda t: replace(t, destination_account=t.origin_account),
+        lambda t: replace(
+            t,
+            destination_account=replace(
+                t.destination_account, user_id=str(uuid.uuid4())
+            ),
+        ),
+    ],
+)
+def test_transfer_raising_invalid_transference_use_case(transference, invalid):
+    mock.create_many = MagicMock()
+    use_cases = TransferenceUseCases(mock)
+    with pytest.raises(InvalidTransferenceException):
+        use_cases.transfer(invalid(transference))
+    mock.create_many.assert_not_called()
+
+
+def test_transfer_use_case_invalidates_cube(transference):
+    mock.create_many = MagicMock(side_effect=list)
+    cubes = MagicMock()
+    TransferenceUseCases(mock, cubes=cubes).transfer(transference)
+    cubes.invalidate.assert_called_once_with(transference.origin_account.user_id)
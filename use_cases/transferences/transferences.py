@@ -0,0 +1,96 @@
+from collections.abc import Iterable
+
+from entities.entities import Expense, Income, Record, Transference
+from use_cases.analytics.analytics import CubeCache
+from use_cases.changes.changes import ChangeLog, logged, record_changes
+from use_cases.records.records import RecordsRepository
+from use_cases.transferences.exceptions import InvalidTransferenceException
+
+
+def to_legs(transference: Transference) -> tuple[Record, Record]:
+    """
+    It returns the expense leaving the origin account and the income
+    entering the destination one
+    """
+    if (
+        transference.value <= 0
+        or transference.origin_account.id is None
+        or transference.origin_account.id == transference.destination_account.id
+        or transference.origin_account.user_id
+        != transference.destination_account.user_id
+    ):
+        raise InvalidTransferenceException()
+    return (
+        Expense(
+            None,
+            transference.description,
+            transference.value,
+            transference.date,
+            account=transference.origin_account,
+        ),
+        Income(
+            None,
+            transference.description,
+            transference.value,
+            transference.date,
+            account=transference.destination_account,
+        ),
+    )
+
+
+class TransferenceUseCases:
+    """
+    Both legs of a transference are written as records by a single
+    create_many call, so they and the balances of both accounts change in
+    one transaction. The repository locks every account involved with one
+    SELECT ... FOR UPDATE ordered by id, so concurrent transferences between
+    the same accounts, in whichever direction, wait on each other instead
+    of deadlocking.
+    """
+
+    def __init__(
+        self,
+        records_repository: RecordsRepository,
+        change_log: ChangeLog | None = None,
+        cubes: CubeCache | None = None,
+    ):
+        self.records_repository = records_repository
+        self.change_log = change_log
+        self.cubes = cubes
+
+    def transfer(self, transference: Transference) -> tuple[Record, Record]:
+        """
+        :param transference:
+        :return: tuple[Record, Record] with the outgoing and incoming legs
+        :raises: InvalidTransferenceException, MissingAccountException
+        """
+        return self.transfer_many([transference])[0]
+
+    def transfer_many(
+        self, transferences: Iterable[Transference]
+    ) -> list[tuple[Record, Record]]:
+        """
+        It applies all the transferences at once, in a single transaction,
+        with a fixed number of statements per batch of the repository
+        whatever the number of transferences
+
+        :param transferences:
+        :return: list[tuple[Record, Record]] with the outgoing and incoming
+            legs of each transference
+        :raises: InvalidTransferenceException, MissingAccountException
+        """
+        legs = [
+            leg
+            for transference in transferences
+            for leg in to_legs(transference)
+        ]
+        records = logged(
+            self.change_log,
+            lambda: self.records_repository.create_many(legs),
+            record_changes,
+        )
+        if self.cubes is not None:
+            self.cubes.invalidate(
+                *{record.account.user_id for record in records}
+            )
+        return list(zip(records[::2], records[1::2], strict=True))
@@ -5,7 +5,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from users.entities import User
-from users.models import CustomUser
+from users.models import USERS_BY_EMAIL, CustomUser
 from users.use_cases.exceptions import (
     ExistingUserException,
     UserNotFoundException,
@@ -17,6 +17,14 @@ def api_client():
     return APIClient()
 
 
+@pytest.fixture(autouse=True)
+def users_by_email():
+    # ids are reused by rolled back tests, so no user may outlive its test
+    USERS_BY_EMAIL.entries.clear()
+    yield USERS_BY_EMAIL
+    USERS_BY_EMAIL.entries.clear()
+
+
 @pytest.mark.parametrize(
     "payload, expected_error",
     [
@@ -190,3 +198,40 @@ def test_user_get(api_client):
     created_user = CustomUser.objects.create_user(**asdict(user))
     response = api_client.get(f"/api/users/{created_user.id}/")
     assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db()
+def test_user_get_by_email(api_client):
+    created_user = CustomUser.objects.create_user(
+        first_name="John",
+        last_name="Doe",
+        email="johndoe@me.com",
+        password="password",
+    )
+    response = api_client.get("/api/users/", {"email": "JohnDoe@Me.com"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {
+        "first_name": "John",
+        "last_name": "Doe",
+        "email": "johndoe@me.com",
+        "id": str(created_user.id),
+    }
+
+    # updates are seen by the next lookup
+    response = api_client.put(
+        f"/api/users/{created_user.id}/",
+        {"first_name": "Jane", "last_name": "Doe"},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    response = api_client.get("/api/users/", {"email": "johndoe@me.com"})
+    assert response.data["first_name"] == "Jane"
+
+
+@pytest.mark.django_db()
+def test_user_get_by_email_not_found(api_client):
+    response = api_client.get("/api/users/", {"email": "johndoe@me.com"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.data == {"message": UserNotFoundException.msg, "extra": {}}
+    response = api_client.get("/api/users/")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -1,7 +1,6 @@
 from rest_framework import serializers, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.exceptions import MethodNotAllowed
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
@@ -10,7 +9,7 @@ from drf_spectacular.utils import (
 )
 
 from users.entities import User
-from users.models import UserRepository
+from users.models import USERS_BY_EMAIL, UserRepository
 from users.use_cases.exceptions import (
     ExistingUserException,
     UserNotFoundException,
@@ -39,7 +38,9 @@ class UsersCreation(APIView):
 
     serializer = CreationSerializer
 
-    use_cases = UserUseCases(user_repository=UserRepository())
+    use_cases = UserUseCases(
+        user_repository=UserRepository(), users_by_email=USERS_BY_EMAIL
+    )
 
     @extend_schema(
         request=serializer,
@@ -85,13 +86,55 @@ class UsersCreation(APIView):
             status=status.HTTP_201_CREATED,
         )
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="email",
+                required=True,
+                location=OpenApiParameter.QUERY,
+                description="The email of the user, in any case",
+            ),
+        ],
+        responses={
+            "200": OutputSerializer,
+            "404": OpenApiResponse(
+                description="User not found",
+                response=StandardErrorSerializer,
+                examples=[
+                    OpenApiExample(
+                        "Default response",
+                        value={
+                            "message": UserNotFoundException.msg,
+                            "extra": {},
+                        },
+                    )
+                ],
+            ),
+        },
+        methods=["GET"],
+    )
+    def get(self, request):
+        email = request.query_params.get("email", "")
+        try:
+            return Response(
+                OutputSerializer(self.use_cases.get_user_by_email(email)).data,
+                status=status.HTTP_200_OK,
+            )
+        except UserNotFoundException as e:
+            return Response(
+                {"message": e.msg, "extra": {}},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
 
 class UsersDetail(APIView):
     class UpdateSerializer(serializers.Serializer):
         first_name = serializers.CharField(required=False)
         last_name = serializers.CharField(required=False)
 
-    use_cases = UserUseCases(user_repository=UserRepository())
+    use_cases = UserUseCases(
+        user_repository=UserRepository(), users_by_email=USERS_BY_EMAIL
+    )
 
     @extend_schema(
         parameters=[
@@ -120,34 +163,17 @@ class UsersDetail(APIView):
         },
         methods=["GET"],
     )
-    def get(self, request, id=None):
-        email = request.query_params.get("email")
-        if email:
-            try:
-                return Response(
-                    self.OutputSerializer(
-                        self.use_cases.get_user_by_email(email)
-                    ).data,
-                    status=status.HTTP_200_OK,
-                )
-            except UserNotFoundException as e:
-                return Response(
-                    {"message": e.msg, "extra": {}},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-        elif id:
-            try:
-                return Response(
-                    OutputSerializer(self.use_cases.get_user(id)).data,
-                    status=status.HTTP_200_OK,
-                )
-            except UserNotFoundException as e:
-                return Response(
-                    {"message": e.msg, "extra": {}},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-
-        raise MethodNotAllowed(method="GET")
+    def get(self, request, id):
+        try:
+            return Response(
+                OutputSerializer(self.use_cases.get_user(id)).data,
+                status=status.HTTP_200_OK,
+            )
+        except UserNotFoundException as e:
+            return Response(
+                {"message": e.msg, "extra": {}},
+                status=status.HTTP_404_NOT_FOUND,
+            )
 
     @extend_schema(
         request=UpdateSerializer,
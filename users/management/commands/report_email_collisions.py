@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Lists the users whose emails only differ in case, which can only "
+        "log in with their exact email until they are merged or renamed"
+    )
+
+    def handle(self, *args, **options):
+        collisions = CustomUser.objects.email_collisions()
+        for emails in collisions:
+            self.stdout.write(", ".join(emails))
+        if collisions:
+            self.stdout.write(
+                self.style.WARNING(f"Collisions found: {len(collisions)}")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("No emails collide"))
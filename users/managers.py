@@ -1,6 +1,10 @@
 from django.contrib.auth.base_user import BaseUserManager
+from django.db.models import Count
+from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 
+from .use_cases.users import normalize_email
+
 
 class CustomUserManager(BaseUserManager):
     """
@@ -9,6 +13,56 @@ class CustomUserManager(BaseUserManager):
     for authentication instead of usernames.
     """
 
+    @classmethod
+    def normalize_email(cls, email):
+        """
+        The whole email is lower cased, not only its domain, so users are
+        found by it whatever case it is typed in
+        """
+        return normalize_email(super().normalize_email(email))
+
+    def get_by_natural_key(self, email):
+        """
+        Users log in with their email in whatever case they type it. Both
+        the email as typed and the normalized one are looked up, by a single
+        query on the unique index, and the exact match wins, so the users
+        whose emails migration 0002 couldn't lower case still log in with
+        theirs, see email_collisions.
+        """
+        normalized_email = self.normalize_email(email)
+        users = {
+            user.email: user
+            for user in self.filter(email__in={email, normalized_email})
+        }
+        user = users.get(email) or users.get(normalized_email)
+        if user is None:
+            raise self.model.DoesNotExist()
+        return user
+
+    def email_collisions(self) -> list[list[str]]:
+        """
+        The emails that only differ in case, which migration 0002 left as
+        they were for their owners to sort out. Looking one of them up by
+        anything but its exact email finds the lower cased one.
+
+        :return: list[list[str]] with the emails of each collision
+        """
+        colliding = (
+            self.values(normalized_email=Lower("email"))
+            .annotate(users=Count("id"))
+            .filter(users__gt=1)
+            .values("normalized_email")
+        )
+        collisions: dict[str, list[str]] = {}
+        for email in (
+            self.annotate(normalized_email=Lower("email"))
+            .filter(normalized_email__in=colliding)
+            .order_by("normalized_email", "email")
+            .values_list("email", flat=True)
+        ):
+            collisions.setdefault(email.lower(), []).append(email)
+        return list(collisions.values())
+
     def create_user(self, email, password, **extra_fields):
         """
         Create and save a User with the given email and password.
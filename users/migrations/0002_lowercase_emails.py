@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:08
+
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def lowercase_emails(apps, schema_editor):
+    """
+    Emails are lower cased, as new ones are, unless another user already
+    has the lower cased one. Those are kept as they are, for their owners
+    to sort out, and are listed by the report_email_collisions command.
+    """
+    CustomUser = apps.get_model("users", "CustomUser")
+    emails = set(CustomUser.objects.values_list("email", flat=True))
+    users = CustomUser.objects.exclude(email=Lower("email")).order_by("id")
+    for user in users:
+        email = user.email.lower()
+        if email in emails:
+            continue
+        emails.add(email)
+        user.email = email
+        user.save(update_fields=["email"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,14 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import IntegrityError, models
+from django.db import IntegrityError, connection, models
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ObjectDoesNotExist
 
 from .entities import User
 from .managers import CustomUserManager
 from .use_cases.exceptions import ExistingUserException, UserNotFoundException
+from .use_cases.users import UsersByEmail
+
+USERS_BY_EMAIL = UsersByEmail(max_size=1024, max_age=60)
 
 
 class CustomUser(AbstractUser):
@@ -48,18 +51,37 @@ class UserRepository:
         )
 
     def update(self, id: str, user: User) -> User:
-        user_to_update = self.get(id)
-        user_updated = {
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-        }
-        CustomUser.objects.update(**user_updated)
+        """
+        Only the row of the user is written, and what the entity needs
+        besides the new names is read back from it by the same statement,
+        with `UPDATE ... RETURNING`, which the ORM can't issue
+
+        :raises: UserNotFoundException
+        """
+        try:
+            id = str(int(id))
+        except (ValueError, TypeError) as e:
+            raise UserNotFoundException() from e
+        meta = CustomUser._meta
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {quote(meta.db_table)} "
+                f"SET {quote(meta.get_field('first_name').column)} = %s, "
+                f"{quote(meta.get_field('last_name').column)} = %s "
+                f"WHERE {quote(meta.get_field('id').column)} = %s "
+                f"RETURNING {quote(meta.get_field('email').column)}",
+                [user.first_name, user.last_name, id],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            raise UserNotFoundException()
         return User(
             first_name=user.first_name,
             last_name=user.last_name,
-            email=user_to_update.email,
-            password=user_to_update.password,
-            id=user_to_update.id,
+            email=row[0],
+            password="",
+            id=id,
         )
 
     def get(self, id: str) -> User:
@@ -74,3 +96,23 @@ class UserRepository:
             )
         except ObjectDoesNotExist as e:
             raise UserNotFoundException() from e
+
+    def get_by_email(self, email: str) -> User:
+        """
+        :param email: normalized, so it is matched exactly by the unique
+            index of the email
+        :raises: UserNotFoundException
+        """
+        try:
+            custom_user = CustomUser.objects.only(
+                "first_name", "last_name", "email"
+            ).get(email=email)
+        except ObjectDoesNotExist as e:
+            raise UserNotFoundException() from e
+        return User(
+            first_name=custom_user.first_name,
+            last_name=custom_user.last_name,
+            email=custom_user.email,
+            password="",
+            id=str(custom_user.id),
+        )
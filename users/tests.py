@@ -1,7 +1,10 @@
 import contextlib
+from dataclasses import replace
+from io import StringIO
 
 import pytest
-from django.contrib.auth import get_user_model
+from django.contrib.auth import authenticate, get_user_model
+from django.core.management import call_command
 from users.entities import User
 from users.models import UserRepository
 from users.use_cases.exceptions import (
@@ -98,11 +101,35 @@ def test_user_repository_update(repo, user):
     assert updated_user.last_name == changed_user.last_name
 
 
+@pytest.mark.django_db
+def test_user_repository_update_is_a_single_statement(
+    repo, user, django_assert_num_queries
+):
+    created_user = repo.create(user)
+    other_user = repo.create(replace(user, email="janedoe@me.com"))
+    changed_user = replace(user, first_name="Jane", last_name="Doe")
+    with django_assert_num_queries(1) as context:
+        updated_user = repo.update(str(created_user.id), changed_user)
+    assert updated_user == User(
+        first_name="Jane",
+        last_name="Doe",
+        email="johndoe@me.com",
+        password="",
+        id=str(created_user.id),
+    )
+    assert "WHERE" in context.captured_queries[0]["sql"]
+    # the other users are left as they were
+    assert repo.get(str(other_user.id)).first_name == "John"
+    assert repo.get(str(created_user.id)).first_name == "Jane"
+
+
 @pytest.mark.django_db
 def test_user_repository_update_user_not_found(repo, user):
     with pytest.raises(UserNotFoundException) as e:
         repo.update(user.id, user)
         assert str(e.value) == UserNotFoundException.msg
+    with pytest.raises(UserNotFoundException):
+        repo.update("404", user)
 
 
 @pytest.mark.django_db
@@ -117,3 +144,70 @@ def test_user_repository_get_user_not_found(repo, user):
     with pytest.raises(UserNotFoundException) as e:
         repo.get(user.id)
         assert str(e.value) == UserNotFoundException.msg
+
+
+@pytest.mark.django_db
+def test_user_repository_get_by_email(repo, user, django_assert_num_queries):
+    created_user = repo.create(replace(user, email="JohnDoe@Me.com"))
+    assert created_user.email == "johndoe@me.com"
+    with django_assert_num_queries(1):
+        user_found = repo.get_by_email("johndoe@me.com")
+    assert user_found == User(
+        first_name="John",
+        last_name="Smith",
+        email="johndoe@me.com",
+        password="",
+        id=str(created_user.id),
+    )
+    with pytest.raises(UserNotFoundException):
+        repo.get_by_email("janedoe@me.com")
+
+
+@pytest.mark.django_db
+def test_emails_are_lower_cased(repo, user):
+    User = get_user_model()
+    created_user = User.objects.create_user(
+        email=" Normal@User.COM ", password="foo"
+    )
+    assert created_user.email == "normal@user.com"
+    repo.create(replace(user, email="JOHNDOE@me.com"))
+    # the same email in another case is the same user
+    with pytest.raises(ExistingUserException):
+        repo.create(user)
+
+
+@pytest.mark.django_db
+def test_users_log_in_with_their_email_in_any_case():
+    User = get_user_model()
+    created_user = User.objects.create_user(
+        email="JohnDoe@Me.com", password="foo"
+    )
+    for email in ["johndoe@me.com", "JohnDoe@Me.com", " JOHNDOE@ME.COM "]:
+        assert authenticate(email=email, password="foo") == created_user
+    assert authenticate(email="janedoe@me.com", password="foo") is None
+
+
+@pytest.mark.django_db
+def test_colliding_emails_log_in_with_their_exact_email():
+    User = get_user_model()
+    lower_cased_user = User.objects.create_user(
+        email="johndoe@me.com", password="foo"
+    )
+    # as migration 0002 leaves the emails it couldn't lower case
+    colliding_user = User.objects.create_user(
+        email="other@me.com", password="bar"
+    )
+    User.objects.filter(id=colliding_user.id).update(email="JohnDoe@Me.com")
+    assert authenticate(email="JohnDoe@Me.com", password="bar") == (
+        colliding_user
+    )
+    assert authenticate(email="JOHNDOE@me.com", password="foo") == (
+        lower_cased_user
+    )
+    assert User.objects.email_collisions() == [
+        ["JohnDoe@Me.com", "johndoe@me.com"]
+    ]
+    output = StringIO()
+    call_command("report_email_collisions", stdout=output)
+    assert "JohnDoe@Me.com, johndoe@me.com" in output.getvalue()
+    assert "Collisions found: 1" in output.getvalue()
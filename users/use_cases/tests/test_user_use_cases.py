@@ -1,5 +1,7 @@
 import hashlib
 import uuid
+from dataclasses import replace
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
 import pytest
@@ -9,7 +11,7 @@ from users.use_cases.exceptions import (
     ExistingUserException,
     UserNotFoundException,
 )
-from users.use_cases.users import UserUseCases
+from users.use_cases.users import UserUseCases, UsersByEmail
 
 
 class UserRepositoryMock:
@@ -22,6 +24,9 @@ class UserRepositoryMock:
     def get(self, id: str) -> User:  # type: ignore
         ...
 
+    def get_by_email(self, email: str) -> User:  # type: ignore
+        ...
+
 
 mock = UserRepositoryMock()
 
@@ -111,3 +116,71 @@ def test_user_not_found_use_case():
     use_cases = UserUseCases(mock)
     with pytest.raises(UserNotFoundException):
         use_cases.get_user(str(uuid.uuid4()))
+
+
+def test_get_user_by_email_use_case():
+    user = User(
+        id=str(uuid.uuid4()),
+        first_name="Matheus",
+        last_name="Cardoso",
+        email="kjqfr@example.com",
+        password="",
+    )
+    mock.get_by_email = MagicMock(return_value=user)
+    use_cases = UserUseCases(mock)
+    assert use_cases.get_user_by_email(" kJqfR@Example.com") == user
+    mock.get_by_email.assert_called_once_with("kjqfr@example.com")
+
+
+def test_get_user_by_email_is_cached_until_updated():
+    user = User(
+        id=str(uuid.uuid4()),
+        first_name="Matheus",
+        last_name="Cardoso",
+        email="kjqfr@example.com",
+        password="",
+    )
+    updated_user = replace(user, first_name="Math")
+    mock.get_by_email = MagicMock(return_value=user)
+    mock.update = MagicMock(return_value=updated_user)
+    use_cases = UserUseCases(mock, UsersByEmail())
+    assert use_cases.get_user_by_email("kJqfR@example.com") == user
+    assert use_cases.get_user_by_email("kjqfr@example.com") == user
+    mock.get_by_email.assert_called_once_with("kjqfr@example.com")
+
+    use_cases.update_user(user.id, updated_user)
+    mock.get_by_email.return_value = updated_user
+    assert use_cases.get_user_by_email("kjqfr@example.com") == updated_user
+    assert mock.get_by_email.call_count == 2
+
+
+def test_get_user_by_email_not_found_is_not_cached():
+    mock.get_by_email = MagicMock(side_effect=UserNotFoundException)
+    use_cases = UserUseCases(mock, UsersByEmail())
+    for _ in range(2):
+        with pytest.raises(UserNotFoundException):
+            use_cases.get_user_by_email("kjqfr@example.com")
+    assert mock.get_by_email.call_count == 2
+
+
+def test_get_user_by_email_cache_expires(monkeypatch):
+    user = User(
+        id=str(uuid.uuid4()),
+        first_name="Matheus",
+        last_name="Cardoso",
+        email="kjqfr@example.com",
+        password="",
+    )
+    now = 1000.0
+    monkeypatch.setattr(
+        "use_cases.cache.time", SimpleNamespace(monotonic=lambda: now)
+    )
+    mock.get_by_email = MagicMock(return_value=user)
+    use_cases = UserUseCases(mock, UsersByEmail(max_age=60))
+    use_cases.get_user_by_email("kjqfr@example.com")
+    now += 59
+    use_cases.get_user_by_email("kjqfr@example.com")
+    assert mock.get_by_email.call_count == 1
+    now += 1
+    use_cases.get_user_by_email("kjqfr@example.com")
+    assert mock.get_by_email.call_count == 2
@@ -1,8 +1,17 @@
 from typing import Protocol
 
+from use_cases.cache import UserCache
 from users.entities import User
 
 
+def normalize_email(email: str) -> str:
+    """
+    Emails are stored and looked up in lower case, so a lookup is an exact
+    match on the unique index of the email, whatever case it is typed in
+    """
+    return email.strip().lower()
+
+
 class UserRepository(Protocol):
     def create(self, user: User) -> User:
         ...
@@ -13,16 +22,50 @@ class UserRepository(Protocol):
     def get(self, id: str) -> User:
         ...
 
+    def get_by_email(self, email: str) -> User:
+        ...
+
+
+class UsersByEmail(UserCache[User]):
+    """
+    The users looked up by email the latest, by their normalized email.
+    Updates to a user must invalidate them.
+    """
+
 
 class UserUseCases:
-    def __init__(self, user_repository: UserRepository):
+    def __init__(
+        self,
+        user_repository: UserRepository,
+        users_by_email: UsersByEmail | None = None,
+    ):
         self.user_repository = user_repository
+        self.users_by_email = users_by_email
 
     def create_user(self, user: User) -> User:
         return self.user_repository.create(user)
 
     def update_user(self, id: str, user: User) -> User:
-        return self.user_repository.update(id, user)
+        updated_user = self.user_repository.update(id, user)
+        if self.users_by_email is not None:
+            self.users_by_email.invalidate(normalize_email(updated_user.email))
+        return updated_user
 
     def get_user(self, id: str) -> User:
         return self.user_repository.get(id)
+
+    def get_user_by_email(self, email: str) -> User:
+        """
+        Client apps resolve their user by email every session they start,
+        so the users found are kept in the cache, if any, until they are
+        updated or grow older than its `max_age`. Missing users are not.
+
+        :return: User
+        :raises: UserNotFoundException
+        """
+        email = normalize_email(email)
+        if self.users_by_email is None:
+            return self.user_repository.get_by_email(email)
+        return self.users_by_email.get(
+            email, lambda: self.user_repository.get_by_email(email)
+        )